@@ -0,0 +1,200 @@
+"""
+Split, memory-mappable classifier artifact.
+
+Layout of an artifact directory (e.g. backend/urgency_model/):
+
+    manifest.json    format version, embedder model name, head metadata
+    coef.npy         LogisticRegression coef_       (n_classes, dim)
+    intercept.npy    LogisticRegression intercept_  (n_classes,)
+    classes.npy      class labels                   (n_classes,)
+    lexical_*.npy    optional cascade tier: hashing-vectorizer LR head
+    injection_attacks.npy  optional known-attack embedding bank (n_attacks, dim)
+
+Arrays are plain .npy files loaded with mmap_mode="r", so every worker
+process maps the same page-cache pages and nothing is unpickled at load time.
+
+Convert an existing joblib pipeline:
+    python -m backend.artifact backend/urgency_model.joblib backend/urgency_model
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from .inference import LinearHead, UrgencyClassifier
+from .injection import InjectionDetector
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = "empathicgateway-classifier"
+ARTIFACT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_ARTIFACT_DIR = "backend/urgency_model"
+
+
+def _save_head(out_dir, head, prefix="", dtype=None):
+    arrays = {
+        "coef": np.ascontiguousarray(head.coef_, dtype=dtype),
+        "intercept": np.ascontiguousarray(head.intercept_, dtype=dtype),
+        "classes": np.asarray(head.classes_).astype(str),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{prefix}{name}.npy"), array, allow_pickle=False)
+    return {name: f"{prefix}{name}.npy" for name in arrays}
+
+
+def save_artifact(pipeline, out_dir=DEFAULT_ARTIFACT_DIR, lexical=None, injection=None):
+    """
+    Writes a fitted Pipeline([("bert", BertEmbedder), ("clf", LogisticRegression)])
+    as a versioned artifact directory. The embedder is recorded by name only.
+    `lexical` is an optional fitted Pipeline([("hash", HashingVectorizer),
+    ("clf", LogisticRegression)]) stored as the cascade's first tier.
+    `injection` is an optional calibrated InjectionDetector.
+    """
+    embedder = pipeline.steps[0][1]
+    head = LinearHead.from_estimator(pipeline.steps[-1][1])
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = _save_head(out_dir, head)
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "embedder": {
+            "model_name": embedder.model_name,
+            "dim": int(head.coef_.shape[1]),
+        },
+        "head": {
+            "type": "logistic_regression",
+            "multi_class": head.multi_class,
+            "n_classes": int(len(head.classes_)),
+            "files": files,
+        },
+    }
+    if lexical is not None:
+        vectorizer = lexical.steps[0][1]
+        lexical_head = LinearHead.from_estimator(lexical.steps[-1][1])
+        manifest["lexical"] = {
+            "vectorizer": {
+                "type": "hashing",
+                "params": {
+                    "n_features": vectorizer.n_features,
+                    "ngram_range": list(vectorizer.ngram_range),
+                    "alternate_sign": vectorizer.alternate_sign,
+                    "lowercase": vectorizer.lowercase,
+                    "norm": vectorizer.norm,
+                },
+            },
+            "multi_class": lexical_head.multi_class,
+            # float32 halves the (n_classes x n_features) matrix on disk and in RAM
+            "files": _save_head(out_dir, lexical_head, prefix="lexical_", dtype=np.float32),
+        }
+    if injection is not None:
+        np.save(os.path.join(out_dir, "injection_attacks.npy"), injection.attacks, allow_pickle=False)
+        manifest["injection"] = {
+            "threshold": injection.threshold,
+            "n_attacks": int(injection.attacks.shape[0]),
+            "files": {"attacks": "injection_attacks.npy"},
+        }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return out_dir
+
+
+def read_manifest(artifact_dir=DEFAULT_ARTIFACT_DIR):
+    with open(os.path.join(artifact_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{artifact_dir} is not a {ARTIFACT_FORMAT} artifact")
+    if manifest.get("version", 0) > ARTIFACT_VERSION:
+        raise ValueError(
+            f"Artifact version {manifest['version']} is newer than supported ({ARTIFACT_VERSION})"
+        )
+    return manifest
+
+
+def _load_arrays(artifact_dir, files, mmap):
+    mode = "r" if mmap else None
+    return {
+        name: np.load(os.path.join(artifact_dir, filename), mmap_mode=mode, allow_pickle=False)
+        for name, filename in files.items()
+    }
+
+
+def load_head(artifact_dir=DEFAULT_ARTIFACT_DIR, mmap=True):
+    manifest = read_manifest(artifact_dir)
+    arrays = _load_arrays(artifact_dir, manifest["head"]["files"], mmap)
+    if arrays["coef"].shape[1] != manifest["embedder"]["dim"]:
+        raise ValueError(
+            f"coef dim {arrays['coef'].shape[1]} != embedder dim {manifest['embedder']['dim']}"
+        )
+    return LinearHead(
+        arrays["coef"],
+        arrays["intercept"],
+        arrays["classes"],
+        manifest["head"]["multi_class"],
+    )
+
+
+def load_lexical_tier(artifact_dir=DEFAULT_ARTIFACT_DIR, mmap=True):
+    """
+    Returns (HashingVectorizer, LinearHead) for the cascade's first tier,
+    or None if the artifact was saved without one.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    section = read_manifest(artifact_dir).get("lexical")
+    if section is None:
+        return None
+    params = dict(section["vectorizer"]["params"])
+    params["ngram_range"] = tuple(params["ngram_range"])
+    arrays = _load_arrays(artifact_dir, section["files"], mmap)
+    head = LinearHead(
+        arrays["coef"], arrays["intercept"], arrays["classes"], section["multi_class"]
+    )
+    return HashingVectorizer(**params), head
+
+
+def load_injection_detector(artifact_dir=DEFAULT_ARTIFACT_DIR, mmap=True):
+    """
+    Returns the artifact's InjectionDetector, or None if it was saved without one.
+    """
+    section = read_manifest(artifact_dir).get("injection")
+    if section is None:
+        return None
+    arrays = _load_arrays(artifact_dir, section["files"], mmap)
+    return InjectionDetector(arrays["attacks"], section["threshold"])
+
+
+def load_artifact(artifact_dir=DEFAULT_ARTIFACT_DIR, embedder_backend="torch", mmap=True, num_threads=0):
+    """
+    Assembles an UrgencyClassifier from an artifact directory: the embedder is
+    built fresh from the manifest's model name and the head from mmapped arrays.
+    """
+    from .embedders import make_embedder
+
+    manifest = read_manifest(artifact_dir)
+    embedder = make_embedder(
+        embedder_backend, manifest["embedder"]["model_name"], num_threads=num_threads
+    )
+    return UrgencyClassifier(embedder, load_head(artifact_dir, mmap=mmap))
+
+
+if __name__ == "__main__":
+    import joblib
+
+    import backend.train_model
+
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    # Legacy joblib files reference __main__.BertEmbedder
+    sys.modules["__main__"].BertEmbedder = backend.train_model.BertEmbedder
+    src, dst = sys.argv[1], sys.argv[2]
+    save_artifact(joblib.load(src), dst)
+    print(f"✅ Converted {src} -> {dst}")
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls into micro-batches.
+
+    A batch is flushed when it holds `max_batch_size` items or when
+    `max_wait_ms` has elapsed since its first item arrived, whichever comes
+    first. `batch_fn(items) -> results` runs once per batch on `executor`
+    and must return one result per item, in order. Up to `max_in_flight`
+    batches run concurrently (one per executor worker).
+    """
+
+    def __init__(
+        self,
+        batch_fn,
+        executor,
+        max_batch_size=32,
+        max_wait_ms=5.0,
+        max_in_flight=1,
+        name="batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.name = name
+
+        self._pending = []
+        self._wakeup = None
+        self._slots = None
+        self._in_flight = set()
+        self._worker = None
+        self.stats = {"batches": 0, "items": 0, "max_batch_size_seen": 0}
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.create_task(self._run())
+            logger.info(
+                f"🧺 {self.name} started (max_batch_size={self.max_batch_size}, "
+                f"window={self.max_wait * 1000:.1f}ms, in_flight={self.max_in_flight})"
+            )
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._in_flight):
+            task.cancel()
+        # Fail anything still waiting so callers don't hang on shutdown
+        for _, fut in self._pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError(f"{self.name} stopped"))
+        self._pending.clear()
+
+    async def submit(self, item):
+        """
+        Enqueue one item and wait for its individual result.
+        """
+        self.start()
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((item, fut))
+        self._wakeup.set()
+        return await fut
+
+    def snapshot(self):
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "avg_batch_size": round(self.stats["items"] / batches, 2) if batches else 0.0,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            if not self._pending:
+                self._wakeup.clear()
+                continue
+
+            # Wait for a free worker first, so requests arriving meanwhile
+            # still join this batch instead of waiting behind it
+            await self._slots.acquire()
+
+            # Hold the batch open until it is full or the window closes
+            deadline = loop.time() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            if self._pending:
+                self._wakeup.set()
+            else:
+                self._wakeup.clear()
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task):
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _dispatch(self, batch):
+        # Callers that gave up (cancelled) should not cost a forward pass
+        batch = [(item, fut) for item, fut in batch if not fut.done()]
+        if not batch:
+            return
+
+        items = [item for item, _ in batch]
+        self.stats["batches"] += 1
+        self.stats["items"] += len(items)
+        self.stats["max_batch_size_seen"] = max(self.stats["max_batch_size_seen"], len(items))
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+        except Exception as e:
+            logger.error(f"❌ {self.name} batch of {len(items)} failed: {e}")
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
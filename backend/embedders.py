@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from .train_model import BertEmbedder
+
+logger = logging.getLogger(__name__)
+
+# EMBEDDER_BACKEND values accepted at load time
+EMBEDDER_BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", "backend/onnx")
+
+
+def export_onnx(model_name="all-MiniLM-L6-v2", out_dir=ONNX_EXPORT_DIR, quantize=False):
+    """
+    Exports the SentenceTransformer's transformer body to ONNX (and optionally
+    a dynamically int8-quantized copy). Pooling and normalization are done in
+    numpy by OnnxBertEmbedder, so only last_hidden_state is exported.
+    Returns the path of the requested .onnx file.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        logger.info(f"📦 Exporting {model_name} to ONNX ({fp32_path})...")
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer = st_model[0].auto_model.eval()
+
+        class _HiddenStates(torch.nn.Module):
+            def __init__(self, body):
+                super().__init__()
+                self.body = body
+
+            def forward(self, input_ids, attention_mask, token_type_ids):
+                return self.body(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    token_type_ids=token_type_ids,
+                ).last_hidden_state
+
+        dummy = st_model.tokenizer(["export the gateway embedder"], return_tensors="pt")
+        input_names = ["input_ids", "attention_mask", "token_type_ids"]
+        with torch.no_grad():
+            torch.onnx.export(
+                _HiddenStates(transformer),
+                tuple(dummy[name] for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                    "last_hidden_state": {0: "batch", 1: "sequence"},
+                },
+                opset_version=14,
+            )
+
+        st_model.tokenizer.save_pretrained(out_dir)
+        manifest = {
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "normalize": any(type(m).__name__ == "Normalize" for m in st_model),
+        }
+        with open(os.path.join(out_dir, "embedder.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"📦 Quantizing ONNX embedder to int8 ({int8_path})...")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxBertEmbedder(BertEmbedder):
+    """
+    Drop-in BertEmbedder that runs all-MiniLM-L6-v2 on onnxruntime (CPU).
+    Reproduces the SentenceTransformer stack: transformer -> mean pooling
+    over the attention mask -> L2 normalization.
+    """
+
+    def __init__(self, model_name="all-MiniLM-L6-v2", quantize=False, num_threads=0):
+        super().__init__(model_name=model_name)
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.session = None
+        self.tokenizer = None
+        self._session_pid = None
+
+    @property
+    def cache_namespace(self):
+        return f"{self.model_name}:onnx{'-int8' if self.quantize else ''}"
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.update(session=None, tokenizer=None, _session_pid=None)
+        return state
+
+    def fit(self, X, y=None):
+        return self.load()
+
+    def load(self):
+        # onnxruntime thread pools do not survive fork(), so every forked
+        # inference worker builds its own session on first use
+        if self.session is None or self._session_pid != os.getpid():
+            self._load_session()
+        return self
+
+    def _load_session(self):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        out_dir = os.path.join(ONNX_EXPORT_DIR, self.model_name.replace("/", "__"))
+        path = export_onnx(self.model_name, out_dir, quantize=self.quantize)
+        with open(os.path.join(out_dir, "embedder.json")) as f:
+            manifest = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(out_dir)
+        self.max_seq_length = manifest["max_seq_length"]
+        self.normalize = manifest["normalize"]
+        self._session_pid = os.getpid()
+        logger.info(f"✅ ONNX embedder ready: {path}")
+
+    def _encode(self, texts):
+        self.load()
+        encoded = self.tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {
+            node.name: encoded[node.name].astype(np.int64)
+            for node in self.session.get_inputs()
+        }
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+
+def make_embedder(backend="torch", model_name="all-MiniLM-L6-v2", num_threads=0):
+    """
+    Builds the embedder for EMBEDDER_BACKEND (torch | onnx | onnx-int8).
+    """
+    if backend == "torch":
+        return BertEmbedder(model_name=model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxBertEmbedder(
+            model_name=model_name,
+            quantize=backend == "onnx-int8",
+            num_threads=num_threads,
+        )
+    raise ValueError(f"Unknown embedder backend '{backend}', expected one of {EMBEDDER_BACKENDS}")
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Rough per-entry bookkeeping cost (key bytes, tuple, OrderedDict node)
+ENTRY_OVERHEAD_BYTES = 160
+
+
+def normalize_text(text: str) -> str:
+    # all-MiniLM-L6-v2 uses an uncased tokenizer, so case and whitespace
+    # differences produce identical embeddings and can share one entry.
+    return " ".join(text.split()).lower()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, memory-bounded LRU cache of sentence embeddings.
+
+    Keys are a digest of (namespace, normalized text), where the namespace is
+    the embedder model name, so vectors from different embedders never mix.
+    Values are stored as read-only float32 vectors. Entries are evicted in LRU
+    order once `max_bytes` is exceeded and expire after `ttl_seconds` (if set).
+    Thread-safe: the inference executor may call it from several threads.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl_seconds=None):
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+
+        self._entries = OrderedDict()  # key -> (vector, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> bytes:
+        payload = f"{namespace}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def get_many(self, namespace: str, texts):
+        """
+        Returns one vector per text, or None for each miss.
+        """
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            for text in texts:
+                key = self.make_key(namespace, text)
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl_seconds and now - entry[1] > self.ttl_seconds:
+                    self._drop(key)
+                    self.expirations += 1
+                    entry = None
+
+                if entry is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found.append(entry[0])
+        return found
+
+    def put_many(self, namespace: str, texts, vectors):
+        if self.max_bytes <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                vec = np.array(vector, dtype=np.float32, copy=True)
+                vec.setflags(write=False)
+
+                key = self.make_key(namespace, text)
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (vec, now)
+                self._bytes += vec.nbytes + ENTRY_OVERHEAD_BYTES
+
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        # Drops every entry and resets the counters (e.g. after warmup)
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _drop(self, key):
+        vec, _ = self._entries.pop(key)
+        self._bytes -= vec.nbytes + ENTRY_OVERHEAD_BYTES
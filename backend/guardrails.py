@@ -0,0 +1,304 @@
+"""
+Compiled guardrail rule engine (prompt-injection input rules, blocked
+output patterns).
+
+Each rule set is compiled once at load time into a single matcher (literal
+anchor index + one alternation for unanchored rules); a check reports which
+rule fired. Rule sets are loaded from a JSON file and can be swapped at
+runtime (reload endpoint, file watcher) without a restart:
+
+    {
+      "version": "2024-06-01",
+      "input":  [{"name": "ignore_previous", "pattern": "ignore previous"}],
+      "output": [{"name": "password_hash", "pattern": "hashed_password"}]
+    }
+
+Rules are case-insensitive unless "ignore_case": false. Patterns with
+nested unbounded quantifiers (e.g. "(a+)+") are rejected at load time.
+
+Streamed responses are checked chunk by chunk with OutputStreamFilter,
+which holds back just enough text to catch matches spanning chunks.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+GUARDRAIL_RULES_PATH = os.getenv("GUARDRAIL_RULES_PATH", "backend/guardrail_rules.json")
+# Hold-back used for output rules whose match length is unbounded
+OUTPUT_STREAM_MAX_HOLDBACK = int(os.getenv("OUTPUT_STREAM_MAX_HOLDBACK", "256"))
+
+# Used when the rules file is missing. ".*" gaps stay unbounded (within a
+# line): bounding them would let filler between the keywords slip through.
+DEFAULT_RULES = {
+    "version": "builtin",
+    "input": [
+        {"name": "ignore_previous", "pattern": r"ignore previous"},
+        {"name": "ignore_all", "pattern": r"ignore all"},
+        {"name": "ignore_instructions", "pattern": r"ignore.*instructions"},
+        {"name": "ignore_rules", "pattern": r"ignore.*rules"},
+        {"name": "system_prompt", "pattern": r"system prompt"},
+        {"name": "dan_persona", "pattern": r"you are now DAN"},
+        {"name": "do_anything_now", "pattern": r"do anything now"},
+        {"name": "browse_web", "pattern": r"browse the web"},
+        {"name": "delete_data", "pattern": r"delete your data"},
+    ],
+    "output": [
+        {"name": "password_hash", "pattern": r"hashed_password"},
+        {"name": "private_key", "pattern": r"private_key"},
+        {"name": "internal_error", "pattern": r"internal_server_error"},
+    ],
+}
+
+# A quantified group that itself contains an unbounded quantifier:
+# "(a+)+", "(?:\w*x)*", "(a|b*){2,}" ...
+_NESTED_QUANTIFIER = re.compile(r"\((?:[^()\\]|\\.)*[+*](?:[^()\\]|\\.)*\)(?:[+*]|\{\d*,\})")
+
+
+class Rule(NamedTuple):
+    name: str
+    pattern: str
+    ignore_case: bool = True
+
+
+# Characters that end a rule's literal prefix
+_META = set("\\.^$*+?{}[]|()")
+_MIN_ANCHOR = 3
+
+
+def literal_anchor(pattern: str) -> Optional[str]:
+    """
+    Lowercase literal prefix every match of `pattern` must start with, or
+    None if there is no usable one (alternation, inline flags, a leading
+    class or escape...).
+    """
+    if "|" in pattern:
+        return None
+    prefix = []
+    for ch in pattern:
+        if ch in _META:
+            # "abc*" / "abc?" / "abc{0,2}": the last char is optional
+            if ch in "*?{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(ch)
+    anchor = "".join(prefix).lower()
+    return anchor if len(anchor) >= _MIN_ANCHOR else None
+
+
+def max_match_width(pattern: str, ignore_case=True) -> Optional[int]:
+    """
+    Longest possible match of `pattern` in characters, or None if unbounded.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    _, hi = sre_parse.parse(pattern, flags).getwidth()
+    return hi if hi < sre_parse.MAXREPEAT - 1 else None
+
+
+class RuleSet:
+    """
+    A list of rules compiled once into a single matcher:
+
+    - rules with a literal prefix are indexed by it; a check lowercases the
+      text once and only runs a rule's regex when its anchor occurs
+      (a C-speed substring scan per distinct anchor), starting at the
+      first occurrence;
+    - the remaining rules share one combined alternation.
+
+    match(text, pos) returns the name of the leftmost rule that fired at or
+    after `pos` (earlier text still counts as context for \\b etc.), or None.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self.hits = {rule.name: 0 for rule in self.rules}
+        self.anchored = {}  # anchor -> [(rule name, compiled)]
+        self._names = {}
+        alternatives = []
+        for i, rule in enumerate(self.rules):
+            _validate(rule)
+            flags = re.IGNORECASE if rule.ignore_case else 0
+            anchor = literal_anchor(rule.pattern)
+            if anchor is not None:
+                compiled = re.compile(rule.pattern, flags)
+                self.anchored.setdefault(anchor, []).append((rule.name, compiled))
+            else:
+                group = f"r{i}"
+                self._names[group] = rule.name
+                scope = "i" if rule.ignore_case else "-i"
+                alternatives.append(f"(?P<{group}>(?{scope}:{rule.pattern}))")
+        self.unanchored = re.compile("|".join(alternatives)) if alternatives else None
+
+        widths = [max_match_width(rule.pattern, rule.ignore_case) for rule in self.rules]
+        self.max_width = None if None in widths else max(widths, default=0)
+
+    def match(self, text: str, pos: int = 0) -> Optional[str]:
+        best_start, best_name = None, None
+
+        if self.anchored:
+            lowered = text.lower()
+            # Offsets only carry over if lowercasing kept the length
+            same_offsets = len(lowered) == len(text)
+            for anchor, candidates in self.anchored.items():
+                found = lowered.find(anchor, pos) if same_offsets else 0
+                if found < 0:
+                    continue
+                for name, compiled in candidates:
+                    m = compiled.search(text, max(found, pos))
+                    if m and (best_start is None or m.start() < best_start):
+                        best_start, best_name = m.start(), name
+
+        if self.unanchored is not None:
+            m = self.unanchored.search(text, pos)
+            if m and (best_start is None or m.start() < best_start):
+                best_start, best_name = m.start(), self._names[m.lastgroup]
+
+        if best_name is not None:
+            self.hits[best_name] += 1
+        return best_name
+
+    @classmethod
+    def from_list(cls, entries):
+        return cls([Rule(e["name"], e["pattern"], e.get("ignore_case", True)) for e in entries])
+
+
+class OutputStreamFilter:
+    """
+    Incremental output check for a streamed response.
+
+    feed(chunk) returns (text safe to send now, rule name or None). The last
+    (longest possible match - 1) characters are held back, so a blocked
+    pattern split across chunks is caught before any of it is sent; once a
+    rule fires the stream is cut and every later feed() returns ("", rule).
+    Each feed only rescans the new chunk plus the held-back tail (the whole
+    text for rules with unbounded matches). flush() releases the tail at the
+    end of the stream.
+    """
+
+    def __init__(self, rules: RuleSet):
+        self.rules = rules
+        self.unbounded = rules.max_width is None
+        if self.unbounded:
+            self.holdback = OUTPUT_STREAM_MAX_HOLDBACK
+        else:
+            self.holdback = max(0, rules.max_width - 1)
+        self.text = ""
+        self.sent = 0
+        self.blocked = None
+
+    def feed(self, chunk: str) -> Tuple[str, Optional[str]]:
+        if self.blocked:
+            return "", self.blocked
+        scan_from = 0 if self.unbounded else max(0, len(self.text) - self.holdback)
+        self.text += chunk
+        self.blocked = self.rules.match(self.text, scan_from)
+        if self.blocked:
+            return "", self.blocked
+        safe_end = max(self.sent, len(self.text) - self.holdback)
+        safe, self.sent = self.text[self.sent : safe_end], safe_end
+        return safe, None
+
+    def flush(self) -> str:
+        if self.blocked:
+            return ""
+        rest, self.sent = self.text[self.sent :], len(self.text)
+        return rest
+
+
+def _validate(rule: Rule):
+    try:
+        re.compile(rule.pattern)
+    except re.error as e:
+        raise ValueError(f"Rule '{rule.name}': invalid pattern ({e})") from e
+    if _NESTED_QUANTIFIER.search(rule.pattern):
+        raise ValueError(
+            f"Rule '{rule.name}': nested unbounded quantifier (catastrophic backtracking risk)"
+        )
+
+
+class GuardrailEngine:
+    """
+    Holds the active input/output rule sets. Reloads build and validate the
+    new sets first and then swap them in, so a bad update never replaces
+    working rules and requests always see one consistent version.
+    """
+
+    def __init__(self, path=GUARDRAIL_RULES_PATH):
+        self.path = path
+        self.input_rules = RuleSet([])
+        self.output_rules = RuleSet([])
+        self.version = None
+        self.source = None
+        self.loaded_at = None
+        self.reloads = 0
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def load_dict(self, config, source="inline"):
+        input_rules = RuleSet.from_list(config.get("input", []))
+        output_rules = RuleSet.from_list(config.get("output", []))
+        with self._lock:
+            self.input_rules, self.output_rules = input_rules, output_rules
+            self.version = str(config.get("version", "unversioned"))
+            self.source = source
+            self.loaded_at = time.time()
+            self.reloads += 1
+        logger.info(
+            f"🛡️ Guardrail rules v{self.version} loaded from {source} "
+            f"({len(input_rules.rules)} input, {len(output_rules.rules)} output)"
+        )
+        return self.snapshot()
+
+    def load_file(self, path=None):
+        path = path or self.path
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ {path} not found, using built-in guardrail rules")
+            return self.load_dict(DEFAULT_RULES, source="builtin")
+        mtime = os.path.getmtime(path)
+        with open(path) as f:
+            config = json.load(f)
+        snapshot = self.load_dict(config, source=path)
+        self._mtime = mtime
+        return snapshot
+
+    def reload_if_changed(self):
+        """
+        Reloads the rules file if its mtime changed. Returns True on reload.
+        """
+        if not os.path.exists(self.path):
+            return False
+        if os.path.getmtime(self.path) == self._mtime:
+            return False
+        self.load_file()
+        return True
+
+    def check_input(self, text: str) -> Optional[str]:
+        return self.input_rules.match(text)
+
+    def check_output(self, text: str) -> Optional[str]:
+        return self.output_rules.match(text)
+
+    def output_stream(self) -> OutputStreamFilter:
+        # Pinned to the current rule set for the whole stream
+        return OutputStreamFilter(self.output_rules)
+
+    def snapshot(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "input_rules": len(self.input_rules.rules),
+            "output_rules": len(self.output_rules.rules),
+            "hits": {"input": dict(self.input_rules.hits), "output": dict(self.output_rules.hits)},
+        }
@@ -0,0 +1,217 @@
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Below this confidence the intent is reported as "uncertain" and routed NORMAL
+UNCERTAIN_THRESHOLD = 0.40
+
+
+# --- PRIORITY MAPPING ---
+def map_priority(intent):
+    # CRITICAL: Money related, complaints
+    if intent in [
+        "payment_issue",
+        "get_refund",
+        "track_refund",
+        "complaint",
+        "check_cancellation_fee",
+        "fraud_report",
+    ]:
+        return 1
+    # HIGH: Order changes, shipping, delivery
+    elif intent in [
+        "cancel_order",
+        "change_order",
+        "change_shipping_address",
+        "place_order",
+        "track_order",
+        "delivery_options",
+        "delivery_period",
+    ]:
+        return 2
+    # NORMAL: Info, account, newsletter
+    else:
+        return 3
+
+
+class InferenceResult(NamedTuple):
+    intent: str
+    priority: int
+    confidence: float
+    explainability: Dict[str, float]
+    # Sentence embedding the decision was made from (reusable by other stages)
+    embedding: Optional[np.ndarray] = None
+    # Which cascade tier decided: "lexical" or "bert"
+    tier: str = "bert"
+    # Similarity to the nearest known attack (None if no detector/embedding)
+    injection_score: Optional[float] = None
+
+
+UNKNOWN_RESULT = InferenceResult("unknown", 3, 0.0, {})
+
+
+class LinearHead:
+    """
+    LogisticRegression head evaluated with plain numpy.
+
+    Built from (optionally memory-mapped) coef/intercept/classes arrays so the
+    serving process never unpickles the fitted estimator. Reproduces
+    LogisticRegression.predict_proba for binary, multinomial and OvR models.
+    """
+
+    def __init__(self, coef, intercept, classes, multi_class="multinomial"):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+        self.multi_class = multi_class
+
+    @classmethod
+    def from_estimator(cls, clf):
+        if len(clf.classes_) == 2:
+            multi_class = "binary"
+        elif getattr(clf, "multi_class", "auto") == "ovr" or clf.solver == "liblinear":
+            multi_class = "ovr"
+        else:
+            multi_class = "multinomial"
+        return cls(clf.coef_, clf.intercept_, clf.classes_, multi_class)
+
+    def decision_function(self, X):
+        if not hasattr(X, "tocsr"):  # dense embeddings; sparse hashed features stay sparse
+            X = np.asarray(X, dtype=self.coef_.dtype)
+        return np.asarray(X @ self.coef_.T) + self.intercept_
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if self.multi_class == "binary":
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if self.multi_class == "ovr":
+            probs = 1.0 / (1.0 + np.exp(-scores))
+            return probs / probs.sum(axis=1, keepdims=True)
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+def result_from_probs(
+    probs, classes, embedding=None, tier="bert", injection_score=None
+) -> InferenceResult:
+    best = int(np.argmax(probs))
+    max_prob = float(probs[best])
+    explainability = {str(c): float(p) for c, p in zip(classes, probs)}
+
+    if max_prob < UNCERTAIN_THRESHOLD:
+        intent, priority = "uncertain", 3
+    else:
+        intent = str(classes[best])
+        priority = map_priority(intent)
+
+    return InferenceResult(
+        intent, priority, max_prob, explainability, embedding, tier, injection_score
+    )
+
+
+class UrgencyClassifier:
+    """
+    Single-pass inference around a fitted embedder + classifier head.
+
+    Every text is embedded exactly once and the head is applied exactly once;
+    intent, confidence, priority and explainability are all derived from that
+    one probability vector. An optional InjectionDetector scores the same
+    embeddings against known attacks.
+    """
+
+    def __init__(self, embedder, clf, injection=None):
+        self.embedder = embedder
+        self.clf = clf
+        self.injection = injection
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        # Pipeline([("bert", BertEmbedder()), ("clf", LogisticRegression())])
+        return cls(pipeline.steps[0][1], pipeline.steps[-1][1])
+
+    @property
+    def classes_(self):
+        return self.clf.classes_
+
+    def embed(self, texts) -> np.ndarray:
+        return np.asarray(self.embedder.transform(list(texts)), dtype=np.float32)
+
+    def predict_from_embeddings(self, embeddings) -> List[InferenceResult]:
+        probs_matrix = self.clf.predict_proba(embeddings)
+        if self.injection is not None:
+            injection_scores = [float(s) for s in self.injection.scores(embeddings)]
+        else:
+            injection_scores = [None] * len(probs_matrix)
+        return [
+            result_from_probs(probs, self.classes_, embedding=embedding, injection_score=score)
+            for embedding, probs, score in zip(embeddings, probs_matrix, injection_scores)
+        ]
+
+    def predict(self, texts) -> List[InferenceResult]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.predict_from_embeddings(self.embed(texts))
+
+    def predict_one(self, text: str) -> InferenceResult:
+        return self.predict([text])[0]
+
+
+class CascadeClassifier:
+    """
+    Two-tier cascade in front of an UrgencyClassifier.
+
+    A hashing-vectorizer linear model (no transformer) scores every text
+    first; only texts whose top lexical probability is below `threshold`
+    go on to the embedding tier. Results record which tier decided.
+    Lexical-tier results carry no embedding (and so no injection score).
+    """
+
+    def __init__(self, vectorizer, lexical_head, fallback, threshold=0.9):
+        self.vectorizer = vectorizer
+        self.lexical_head = lexical_head
+        self.fallback = fallback
+        self.threshold = threshold
+
+    @property
+    def embedder(self):
+        return self.fallback.embedder
+
+    @property
+    def classes_(self):
+        return self.fallback.classes_
+
+    def predict(self, texts) -> List[InferenceResult]:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        probs_matrix = self.lexical_head.predict_proba(self.vectorizer.transform(texts))
+        results = [None] * len(texts)
+        escalate = []
+        for i, probs in enumerate(probs_matrix):
+            if probs.max() >= self.threshold:
+                results[i] = result_from_probs(probs, self.lexical_head.classes_, tier="lexical")
+            else:
+                escalate.append(i)
+
+        if escalate:
+            for i, result in zip(escalate, self.fallback.predict([texts[i] for i in escalate])):
+                results[i] = result
+        return results
+
+    def predict_one(self, text: str) -> InferenceResult:
+        return self.predict([text])[0]
+
+    def guess_priority(self, text: str) -> int:
+        """
+        Lexical tier only, whatever its confidence: a cheap provisional
+        priority (used to pick a lane before paying for triage).
+        """
+        probs = self.lexical_head.predict_proba(self.vectorizer.transform([text]))[0]
+        return result_from_probs(probs, self.lexical_head.classes_, tier="lexical").priority
@@ -0,0 +1,475 @@
+"""
+Cluster-wide lane accounting: LLM slots are leased from a store shared by
+every gateway process, so `uvicorn --workers N` or N replicas enforce
+LANE_CONFIG together instead of N times over.
+
+A lease takes one slot under several keys at once ("pool" for the whole
+pool, plus the lane's own key), all or nothing, and expires after `ttl_s`
+unless renewed. Holders renew their leases on a heartbeat, so a worker that
+crashes (or hangs) gives its slots back within one TTL.
+
+Backends (LANE_STATE_BACKEND):
+
+- "local": an in-process table; per-process limits, the old behaviour.
+- "shm": a fixed lease table in a memory-mapped file (/dev/shm), guarded by
+  flock; shared by all workers on one host.
+- "network": a small JSON-lines TCP protocol, served by LaneStateServer
+  (`python -m scripts.lane_state_server`); shared across hosts.
+
+The local scheduler (backend/lanes.py) still orders and queues requests
+inside each process; the lease is the cluster-wide cap on top of it.
+"""
+import asyncio
+import fcntl
+import itertools
+import json
+import logging
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LANE_STATE_BACKENDS = ("local", "shm", "network")
+
+# How often a request that was denied a lease retries until its deadline
+LEASE_POLL_S = 0.025
+
+# Shared-memory lease table row: expiry (CLOCK_MONOTONIC, system-wide),
+# generation (guards against releasing a reused row) and key bitmask
+SHM_ENTRY = np.dtype([("expires", "<f8"), ("gen", "<u8"), ("mask", "<u8")])
+
+
+def default_shm_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "empathic-lanes")
+
+
+class LaneStateError(Exception):
+    """
+    Raised when the shared lane state cannot be reached.
+    """
+
+
+class LeaseTable:
+    """
+    In-memory lease table (the "local" backend and the network server).
+    """
+
+    def __init__(self):
+        self.leases = {}  # lease id -> (keys, expires_at)
+        self._ids = itertools.count()
+        self._prefix = uuid.uuid4().hex[:8]
+
+    def _expire(self, now: float):
+        expired = [lease for lease, (_, expires) in self.leases.items() if expires <= now]
+        for lease in expired:
+            del self.leases[lease]
+        return len(expired)
+
+    def usage(self) -> Dict[str, int]:
+        self._expire(time.monotonic())
+        counts: Dict[str, int] = {}
+        for keys, _ in self.leases.values():
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def acquire(self, limits: Dict[str, int], ttl_s: float) -> Optional[str]:
+        counts = self.usage()
+        if any(counts.get(key, 0) >= limit for key, limit in limits.items()):
+            return None
+        lease = f"{self._prefix}-{next(self._ids)}"
+        self.leases[lease] = (tuple(limits), time.monotonic() + ttl_s)
+        return lease
+
+    def renew(self, leases: Iterable[str], ttl_s: float) -> List[str]:
+        """
+        Extends live leases; returns the ones that had already expired.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        lost = []
+        for lease in leases:
+            entry = self.leases.get(lease)
+            if entry is None:
+                lost.append(lease)
+            else:
+                self.leases[lease] = (entry[0], now + ttl_s)
+        return lost
+
+    def release(self, lease: str):
+        self.leases.pop(lease, None)
+
+
+class LocalLaneState:
+    kind = "local"
+
+    def __init__(self):
+        self.table = LeaseTable()
+
+    async def acquire(self, limits, ttl_s):
+        return self.table.acquire(limits, ttl_s)
+
+    async def renew(self, leases, ttl_s):
+        return self.table.renew(leases, ttl_s)
+
+    async def release(self, lease):
+        self.table.release(lease)
+
+    async def usage(self):
+        return self.table.usage()
+
+    async def close(self):
+        pass
+
+
+class SharedMemoryLaneState:
+    """
+    Lease table in a memory-mapped file, one row per lease, shared by every
+    process on the host that opens the same `path` with the same `keys`.
+    Each operation holds an exclusive flock on the file for a few
+    microseconds; rows whose expiry passed are free again.
+    """
+
+    kind = "shm"
+
+    def __init__(self, path: str, keys: Iterable[str], capacity: int = 4096):
+        self.path = path
+        self.bits = {key: 1 << i for i, key in enumerate(keys)}
+        if len(self.bits) > 64:
+            raise ValueError("Shared lane state supports at most 64 keys")
+        self.capacity = capacity
+        self._pid = None
+        self._open()
+
+    def _open(self):
+        # flock belongs to the open file, so a forked child must reopen it
+        # or it would share the parent's lock instead of contending for it
+        self._pid = os.getpid()
+        size = self.capacity * SHM_ENTRY.itemsize
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)  # new file: zero-filled, all rows free
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, size)
+        self.rows = np.ndarray((self.capacity,), dtype=SHM_ENTRY, buffer=self._mm)
+
+    @contextmanager
+    def _locked(self):
+        if self._pid != os.getpid():
+            self._open()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _mask(self, keys) -> int:
+        try:
+            return sum(self.bits[key] for key in keys)
+        except KeyError as e:
+            raise ValueError(f"Unknown lane state key {e}, expected one of {list(self.bits)}")
+
+    def _usage(self, live) -> Dict[str, int]:
+        masks = self.rows["mask"][live]
+        return {key: int(np.count_nonzero(masks & np.uint64(bit))) for key, bit in self.bits.items()}
+
+    async def acquire(self, limits, ttl_s):
+        mask = self._mask(limits)
+        with self._locked():
+            now = time.monotonic()
+            live = self.rows["expires"] > now
+            counts = self._usage(live)
+            if any(counts[key] >= limit for key, limit in limits.items()):
+                return None
+            free = np.flatnonzero(~live)
+            if not len(free):
+                raise LaneStateError(f"Shared lane table {self.path} is full")
+            row = int(free[0])
+            gen = int(self.rows["gen"][row]) + 1
+            self.rows[row] = (now + ttl_s, gen, mask)
+        return f"{row}:{gen}"
+
+    def _row(self, lease: str):
+        row, gen = lease.split(":")
+        return int(row), int(gen)
+
+    async def renew(self, leases, ttl_s):
+        lost = []
+        with self._locked():
+            now = time.monotonic()
+            for lease in leases:
+                row, gen = self._row(lease)
+                entry = self.rows[row]
+                if entry["gen"] != gen or entry["expires"] <= now:
+                    lost.append(lease)
+                else:
+                    self.rows["expires"][row] = now + ttl_s
+        return lost
+
+    async def release(self, lease):
+        row, gen = self._row(lease)
+        with self._locked():
+            if self.rows["gen"][row] == gen:
+                self.rows["expires"][row] = 0.0
+                self.rows["mask"][row] = 0
+
+    async def usage(self):
+        with self._locked():
+            return self._usage(self.rows["expires"] > time.monotonic())
+
+    async def close(self):
+        self.rows = None
+        self._mm.close()
+        os.close(self._fd)
+
+
+class NetworkLaneState:
+    """
+    Client for LaneStateServer: one JSON object per line each way, requests
+    serialized over a single connection that is reopened after an error.
+    Each request carries an id the server echoes, so a reply can never be
+    matched to the wrong call.
+    """
+
+    kind = "network"
+
+    def __init__(self, host: str, port: int, timeout_s: float = 1.0):
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+
+    async def _call(self, request: dict, field: str):
+        request = {**request, "id": next(self._ids)}
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    self._reader, self._writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout_s
+                    )
+                self._writer.write(json.dumps(request).encode() + b"\n")
+                await self._writer.drain()
+                line = await asyncio.wait_for(self._reader.readline(), self.timeout_s)
+                if not line:
+                    raise ConnectionError("connection closed")
+                reply = json.loads(line)
+                if not isinstance(reply, dict) or reply.get("id") != request["id"]:
+                    raise ValueError(f"reply {reply!r} does not match request {request['id']}")
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                self._drop()
+                raise LaneStateError(f"Lane state server {self.host}:{self.port}: {e!r}")
+            except BaseException:
+                # Cancelled mid-call: the unread reply would answer the next call
+                self._drop()
+                raise
+        if "error" in reply:
+            raise LaneStateError(reply["error"])
+        if field not in reply:
+            raise LaneStateError(f"Lane state server reply has no {field!r}: {reply!r}")
+        return reply[field]
+
+    def _drop(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def acquire(self, limits, ttl_s):
+        return await self._call({"op": "acquire", "limits": limits, "ttl_s": ttl_s}, "lease")
+
+    async def renew(self, leases, ttl_s):
+        return await self._call({"op": "renew", "leases": list(leases), "ttl_s": ttl_s}, "lost")
+
+    async def release(self, lease):
+        await self._call({"op": "release", "lease": lease}, "ok")
+
+    async def usage(self):
+        return await self._call({"op": "usage"}, "usage")
+
+    async def close(self):
+        self._drop()
+
+
+class LaneStateServer:
+    """
+    Stand-in lane state service for the "network" backend: one LeaseTable
+    behind a JSON-lines TCP protocol.
+    """
+
+    def __init__(self):
+        self.table = LeaseTable()
+
+    def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "acquire":
+            return {"lease": self.table.acquire(request["limits"], request["ttl_s"])}
+        if op == "renew":
+            return {"lost": self.table.renew(request["leases"], request["ttl_s"])}
+        if op == "release":
+            self.table.release(request["lease"])
+            return {"ok": True}
+        if op == "usage":
+            return {"usage": self.table.usage()}
+        return {"error": f"unknown op {op!r}"}
+
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    reply = self.handle(request)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    reply = {"error": f"bad request: {e!r}"}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 7070):
+        server = await asyncio.start_server(self._serve_client, host, port)
+        logger.info(f"🗄️ Lane state server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def make_lane_state(kind: str, keys: Iterable[str], shm_path: str = "", url: str = ""):
+    """
+    Builds the backend for LANE_STATE_BACKEND. `url` is "host:port".
+    """
+    if kind == "local":
+        return LocalLaneState()
+    if kind == "shm":
+        return SharedMemoryLaneState(shm_path or default_shm_path(), keys)
+    if kind == "network":
+        host, _, port = url.rpartition(":")
+        return NetworkLaneState(host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown lane state backend '{kind}', expected one of {LANE_STATE_BACKENDS}")
+
+
+class LaneLeases:
+    """
+    The gateway side of the lease protocol: takes a lease per admitted
+    request, retries until the request's deadline, renews everything this
+    process holds on a heartbeat and releases leases in the background.
+
+    If the backend is unreachable, `fail_open` admits on local limits alone
+    (counted in stats) rather than turning a state-store outage into an
+    outage of the gateway.
+    """
+
+    def __init__(self, backend, ttl_s: float = 10.0, fail_open: bool = True):
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.fail_open = fail_open
+        self.held = set()
+        self._releases = set()
+        self.stats = {
+            "acquired": 0,
+            "denied": 0,
+            "retries": 0,
+            "lost": 0,
+            "errors": 0,
+            "failed_open": 0,
+        }
+
+    async def acquire(self, limits: Dict[str, int], deadline_s: float) -> Optional[str]:
+        """
+        Returns a lease id, "" if admitted without one (fail-open), or None
+        if the cluster stayed full until the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + max(0.0, deadline_s)
+        while True:
+            try:
+                lease = await self.backend.acquire(limits, self.ttl_s)
+            except LaneStateError as e:
+                self.stats["errors"] += 1
+                if not self.fail_open:
+                    raise
+                self.stats["failed_open"] += 1
+                logger.warning(f"⚠️ Lane state unavailable, admitting on local limits: {e}")
+                return ""
+            if lease is not None:
+                self.held.add(lease)
+                self.stats["acquired"] += 1
+                return lease
+            if loop.time() + LEASE_POLL_S > give_up:
+                self.stats["denied"] += 1
+                return None
+            self.stats["retries"] += 1
+            await asyncio.sleep(LEASE_POLL_S)
+
+    def release(self, lease: Optional[str]):
+        """
+        Releases without blocking the caller; if it fails, the TTL does it.
+        """
+        if not lease or lease not in self.held:
+            return
+        self.held.discard(lease)
+        task = asyncio.get_running_loop().create_task(self._release(lease))
+        self._releases.add(task)
+        task.add_done_callback(self._releases.discard)
+
+    async def _release(self, lease: str):
+        try:
+            await self.backend.release(lease)
+        except LaneStateError as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Lease release failed (expires in {self.ttl_s}s): {e}")
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(self.ttl_s / 3)
+            if not self.held:
+                continue
+            try:
+                lost = await self.backend.renew(list(self.held), self.ttl_s)
+            except LaneStateError as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Lease renewal failed: {e}")
+                continue
+            if lost:
+                # Expired before renewal (e.g. a stalled event loop); the
+                # requests keep running, but their slots may be reused.
+                self.stats["lost"] += len(lost)
+                self.held.difference_update(lost)
+                logger.warning(f"⚠️ {len(lost)} lane lease(s) expired before renewal")
+
+    async def snapshot(self):
+        try:
+            usage = await self.backend.usage()
+        except LaneStateError as e:
+            usage = {"error": str(e)}
+        return {
+            "backend": self.backend.kind,
+            "lease_ttl_s": self.ttl_s,
+            "held_here": len(self.held),
+            "cluster_usage": usage,
+            **self.stats,
+        }
+
+    async def close(self):
+        if self._releases:
+            await asyncio.gather(*self._releases, return_exceptions=True)
+        await self.backend.close()
@@ -0,0 +1,465 @@
+"""
+Lane admission: a work-conserving, weighted scheduler over one pool of LLM
+slots, with a bounded priority queue per lane.
+
+- Every lane is guaranteed `reserved` slots. The pool is the sum of the
+  reservations, and slots a lane isn't using are lent to the other lanes
+  (up to each borrower's `max_borrow`).
+- When several lanes are waiting, a free slot goes to a lane below its
+  reservation first, then to the lane with the lowest active/weight.
+- A lane with `can_preempt` that is below its reservation while others hold
+  borrowed slots reclaims them: the newest borrowed admission is marked
+  preempted (see run_preemptible), and its slot comes back on release.
+- A lane's reservation can follow observed upstream latency through an
+  adaptive limiter (backend/limits.py, fed by observe()).
+- AdmissionGate rejects requests before triage once no lane could serve
+  them in time, so overload doesn't burn CPU on requests that get shed.
+- Within a lane, requests wait in priority order (lower value first, FIFO
+  within a priority) until a slot frees or their deadline passes. They are
+  shed (LaneFull) only when the queue is full, when the expected wait
+  already exceeds their deadline, or when the deadline expires.
+
+Everything runs on the event loop, so no locks are needed.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the slot hold-time average
+HOLD_EWMA_ALPHA = 0.2
+
+
+class LaneFull(Exception):
+    """
+    Raised when a request cannot be admitted. `reason` is "queue_full" or
+    "deadline".
+    """
+
+    def __init__(self, lane: str, reason: str):
+        super().__init__(f"{lane} Full ({reason})")
+        self.lane = lane
+        self.reason = reason
+
+
+class Preempted(Exception):
+    """
+    Raised by run_preemptible when the slot was reclaimed by another lane.
+    """
+
+
+class Admission:
+    """
+    A granted slot. `borrowed` is True if the lane was at or above its
+    reservation when it was granted; only borrowed slots can be preempted.
+    """
+
+    def __init__(self, lane: "Lane", waited_s: float, borrowed: bool):
+        self.lane = lane
+        self.waited_s = waited_s
+        self.granted_at = time.perf_counter()
+        self.borrowed = borrowed
+        self.preempted = asyncio.Event()
+        self.reclaimed_for: Optional["Lane"] = None
+        # Cluster-wide slot lease (backend/lane_state.py), if one was taken
+        self.lease: Optional[str] = None
+        self.released = False
+
+
+class Lane:
+    def __init__(
+        self,
+        name: str,
+        reserved: int,
+        weight: float = 1.0,
+        max_borrow: Optional[int] = None,
+        can_preempt: bool = False,
+        max_queue: int = 64,
+        label: Optional[str] = None,
+        limiter=None,
+    ):
+        self.name = name
+        self.label = label or name
+        self.reserved = limiter.limit if limiter is not None else reserved
+        # Optional backend.limits.AdaptiveLimit that moves `reserved`
+        self.limiter = limiter
+        self.weight = weight
+        # None = may borrow every idle slot; 0 = never borrows
+        self.max_borrow = max_borrow
+        self.can_preempt = can_preempt
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        # Slots being reclaimed from other lanes on this lane's behalf
+        self.reclaiming = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._borrowed = []  # live borrowed admissions, oldest first
+        # Average seconds a slot is held (drives the expected-wait estimate)
+        self.hold_ewma_s = 0.0
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "borrowed_total": 0,
+            "preempted_total": 0,
+            "shed_queue_full": 0,
+            "shed_deadline": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+        }
+
+    @property
+    def borrowing(self) -> int:
+        return max(0, self.active - self.reserved)
+
+    def may_take(self, free: int) -> bool:
+        if free <= 0:
+            return False
+        if self.active < self.reserved:
+            return True
+        return self.max_borrow is None or self.borrowing < self.max_borrow
+
+    def expected_wait(self, priority: int) -> float:
+        """
+        Rough time until a new request at `priority` gets a slot: waiters
+        ahead of it (same or more urgent) drain `reserved` at a time, one
+        average hold time per round.
+        """
+        if not self.hold_ewma_s:
+            return 0.0
+        ahead = sum(1 for p, _, fut in self._waiters if p <= priority and not fut.done())
+        return (ahead // max(1, self.reserved) + 1) * self.hold_ewma_s
+
+    def headroom(self, deadline_s: float) -> int:
+        """
+        How many more requests the queue could take and still serve within
+        `deadline_s`: queue space, capped by the slot turnovers that fit in
+        the deadline (the same estimate expected_wait sheds on).
+        """
+        room = self.max_queue - self.waiting
+        if self.hold_ewma_s:
+            turnovers = int(deadline_s / self.hold_ewma_s)
+            room = min(room, turnovers * max(1, self.reserved) - self.waiting)
+        return max(0, room)
+
+    def snapshot(self, total: int):
+        admitted = self.stats["admitted"]
+        return {
+            "active": self.active,
+            "reserved": self.reserved,
+            "weight": self.weight,
+            "max_borrow": self.max_borrow,
+            "borrowing": self.borrowing,
+            "utilization": round(self.active / self.reserved, 3) if self.reserved else None,
+            "pool_share": round(self.active / total, 3) if total else 0.0,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "avg_wait_ms": round(self.stats["wait_total_s"] / admitted * 1000, 2) if admitted else 0.0,
+            "max_wait_ms": round(self.stats["wait_max_s"] * 1000, 2),
+            "avg_hold_ms": round(self.hold_ewma_s * 1000, 2),
+            **{k: v for k, v in self.stats.items() if not k.startswith("wait_")},
+            "adaptive_limit": self.limiter.snapshot() if self.limiter is not None else None,
+        }
+
+
+class LaneScheduler:
+    def __init__(self, lanes: Iterable[Lane]):
+        self.lanes: Dict[str, Lane] = {}
+        for lane in lanes:
+            self.lanes[lane.name] = lane
+
+    @property
+    def total(self) -> int:
+        return sum(lane.reserved for lane in self.lanes.values())
+
+    @property
+    def active(self) -> int:
+        return sum(lane.active for lane in self.lanes.values())
+
+    async def acquire(self, lane_name: str, priority: int, deadline_s: float) -> Admission:
+        """
+        Waits up to `deadline_s` seconds for a slot in `lane_name`. Raises
+        LaneFull if the request is shed.
+        """
+        lane = self.lanes[lane_name]
+        start = time.perf_counter()
+        if not lane.waiting and lane.may_take(self.total - self.active):
+            return self._grant(lane, start)
+
+        if lane.waiting >= lane.max_queue:
+            lane.stats["shed_queue_full"] += 1
+            raise LaneFull(lane.label, "queue_full")
+        if lane.expected_wait(priority) > deadline_s:
+            # It would time out in the queue anyway; fail fast instead
+            lane.stats["shed_deadline"] += 1
+            raise LaneFull(lane.label, "deadline")
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane._waiters, (priority, next(lane._seq), fut))
+        lane.waiting += 1
+        lane.stats["queued"] += 1
+        # A waiter below its reservation may trigger preemption
+        self._dispatch()
+        try:
+            admission = await asyncio.wait_for(fut, timeout=deadline_s)
+        except asyncio.TimeoutError:
+            if not fut.done() or fut.cancelled():
+                lane.waiting -= 1
+                lane.stats["shed_deadline"] += 1
+                raise LaneFull(lane.label, "deadline")
+            # Slot was handed over just as the deadline hit: keep it
+            admission = fut.result()
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(fut.result())
+            else:
+                lane.waiting -= 1
+            raise
+        admission.waited_s = time.perf_counter() - start
+        self._record_wait(lane, admission.waited_s)
+        return admission
+
+    def _grant(self, lane: Lane, start: Optional[float] = None) -> Admission:
+        borrowed = lane.active >= lane.reserved
+        lane.active += 1
+        admission = Admission(lane, 0.0, borrowed)
+        lane.stats["admitted"] += 1
+        if borrowed:
+            lane.stats["borrowed_total"] += 1
+            lane._borrowed.append(admission)
+        if start is not None:
+            self._record_wait(lane, time.perf_counter() - start)
+        return admission
+
+    @staticmethod
+    def _record_wait(lane: Lane, waited: float):
+        lane.stats["wait_total_s"] += waited
+        lane.stats["wait_max_s"] = max(lane.stats["wait_max_s"], waited)
+
+    def release(self, admission: Admission):
+        # Idempotent: a cancelled request may be released from two places
+        if admission.released:
+            return
+        admission.released = True
+        lane = admission.lane
+        held = time.perf_counter() - admission.granted_at
+        if lane.hold_ewma_s:
+            lane.hold_ewma_s += HOLD_EWMA_ALPHA * (held - lane.hold_ewma_s)
+        else:
+            lane.hold_ewma_s = held
+        if admission.borrowed and admission in lane._borrowed:
+            lane._borrowed.remove(admission)
+        if admission.reclaimed_for is not None:
+            admission.reclaimed_for.reclaiming -= 1
+        # Prevent negative (just in case)
+        if lane.active > 0:
+            lane.active -= 1
+        self._dispatch()
+
+    def set_reserved(self, lane_name: str, reserved: int):
+        lane = self.lanes[lane_name]
+        if lane.limiter is not None:
+            lane.limiter.set_limit(reserved)
+            reserved = lane.limiter.limit
+        lane.reserved = reserved
+        self._dispatch()
+
+    def observe(self, admission: Admission, latency_s: float, failed: bool = False):
+        """
+        Feeds one upstream call's latency to the lane's adaptive limiter
+        (if any) and applies the resulting reservation.
+        """
+        lane = admission.lane
+        if lane.limiter is None:
+            return
+        limit = lane.limiter.update(latency_s, failed)
+        if limit != lane.reserved:
+            lane.reserved = limit
+            self._dispatch()
+
+    def _pick_lane(self, free: int) -> Optional[Lane]:
+        candidates = [
+            lane for lane in self.lanes.values() if lane.waiting and lane.may_take(free)
+        ]
+        if not candidates:
+            return None
+        # Reservations first, then weighted fair share of what is left
+        return min(
+            candidates,
+            key=lambda lane: (lane.active >= lane.reserved, lane.active / max(lane.weight, 1e-9)),
+        )
+
+    def _dispatch(self):
+        # Hand free slots to the most deserving lanes' most urgent waiters
+        while True:
+            lane = self._pick_lane(self.total - self.active)
+            if lane is None:
+                break
+            while lane._waiters:
+                _, _, fut = heapq.heappop(lane._waiters)
+                if fut.done():
+                    continue  # timed out / cancelled, already uncounted
+                lane.waiting -= 1
+                fut.set_result(self._grant(lane))
+                break
+            else:
+                lane.waiting = 0  # heap held only stale entries
+
+        self._preempt()
+
+    def _preempt(self):
+        # Lanes below their reservation with waiters reclaim borrowed slots
+        for lane in self.lanes.values():
+            if not lane.can_preempt:
+                continue
+            needed = min(lane.waiting, lane.reserved - lane.active) - lane.reclaiming
+            while needed > 0:
+                victim = self._newest_borrowed(exclude=lane)
+                if victim is None:
+                    break
+                victim.reclaimed_for = lane
+                victim.preempted.set()
+                victim.lane.stats["preempted_total"] += 1
+                lane.reclaiming += 1
+                needed -= 1
+                logger.warning(
+                    f"⚡ {lane.label} reclaiming a slot borrowed by {victim.lane.label}"
+                )
+
+    def _newest_borrowed(self, exclude: Lane) -> Optional[Admission]:
+        newest = None
+        for other in self.lanes.values():
+            if other is exclude:
+                continue
+            # Never push the lender below its own reservation
+            pending = sum(1 for a in other._borrowed if a.preempted.is_set())
+            if other.active - pending <= other.reserved:
+                continue
+            for admission in reversed(other._borrowed):
+                if not admission.preempted.is_set():
+                    if newest is None or admission.granted_at > newest.granted_at:
+                        newest = admission
+                    break
+        return newest
+
+    def headroom(self, deadlines: Dict[str, float]) -> int:
+        """
+        Free slots plus what every lane's queue can still absorb in time.
+        """
+        free = max(0, self.total - self.active)
+        return free + sum(lane.headroom(deadlines[name]) for name, lane in self.lanes.items())
+
+    def lane_headroom(self, lane_name: str, deadline_s: float) -> int:
+        """
+        Free slots `lane_name` may take now plus what its queue can absorb.
+        """
+        lane = self.lanes[lane_name]
+        free = max(0, self.total - self.active)
+        if lane.active >= lane.reserved and lane.max_borrow is not None:
+            free = min(free, max(0, lane.max_borrow - lane.borrowing))
+        return free + lane.headroom(deadline_s)
+
+    def snapshot(self):
+        total, active = self.total, self.active
+        return {
+            "total_slots": total,
+            "active": active,
+            "utilization": round(active / total, 3) if total else 0.0,
+            "lanes": {name: lane.snapshot(total) for name, lane in self.lanes.items()},
+        }
+
+
+class AdmissionGate:
+    """
+    Cheap overload check in front of triage (guardrails, PII/NER,
+    classification), which is where the CPU goes. A request is let into
+    triage only while it could still get a slot, otherwise it is rejected
+    before any model runs:
+
+    - with a `lane_hint` (a provisional lane from a cheap signal), while
+      fewer requests bound for that lane are in triage than its headroom;
+    - without one, while fewer requests are in triage than the headroom of
+      all lanes together (so it only trips when every lane is saturated).
+
+    Requests that pass the gate but are still shed by their lane are
+    counted as wasted triage.
+    """
+
+    def __init__(self, scheduler: LaneScheduler, deadlines: Dict[str, float], enabled: bool = True):
+        self.scheduler = scheduler
+        self.deadlines = deadlines
+        self.enabled = enabled
+        self.in_triage = 0
+        self.in_triage_by_lane = {name: 0 for name in scheduler.lanes}
+        self.stats = {
+            "rejected": 0,
+            "hinted": 0,
+            "triaged": 0,
+            "shed_after_triage": 0,
+            "wasted_triage_s": 0.0,
+        }
+
+    def saturated(self, lane_hint: Optional[str] = None) -> bool:
+        if lane_hint is None:
+            return self.in_triage >= self.scheduler.headroom(self.deadlines)
+        room = self.scheduler.lane_headroom(lane_hint, self.deadlines[lane_hint])
+        return self.in_triage_by_lane[lane_hint] >= room
+
+    def enter(self, lane_hint: Optional[str] = None) -> bool:
+        """
+        True if the request may start triage (call leave() with the same
+        hint once triage is done, before queueing for a lane).
+        """
+        if self.enabled and self.saturated(lane_hint):
+            self.stats["rejected"] += 1
+            return False
+        self.in_triage += 1
+        self.stats["triaged"] += 1
+        if lane_hint is not None:
+            self.in_triage_by_lane[lane_hint] += 1
+            self.stats["hinted"] += 1
+        return True
+
+    def leave(self, lane_hint: Optional[str] = None):
+        # Once in a lane queue the request counts against `waiting` instead
+        self.in_triage -= 1
+        if lane_hint is not None:
+            self.in_triage_by_lane[lane_hint] -= 1
+
+    def record_shed(self, triage_s: float):
+        self.stats["shed_after_triage"] += 1
+        self.stats["wasted_triage_s"] += triage_s
+
+    def snapshot(self):
+        triaged = self.stats["triaged"]
+        return {
+            "enabled": self.enabled,
+            "in_triage": self.in_triage,
+            "in_triage_by_lane": dict(self.in_triage_by_lane),
+            "headroom": self.scheduler.headroom(self.deadlines),
+            **self.stats,
+            "wasted_triage_s": round(self.stats["wasted_triage_s"], 3),
+            "wasted_ratio": round(self.stats["shed_after_triage"] / triaged, 3) if triaged else 0.0,
+        }
+
+
+async def run_preemptible(admission: Admission, awaitable):
+    """
+    Awaits `awaitable` unless the admission's slot is reclaimed first, in
+    which case the work is cancelled and Preempted is raised.
+    """
+    work = asyncio.ensure_future(awaitable)
+    preempted = asyncio.ensure_future(admission.preempted.wait())
+    try:
+        await asyncio.wait({work, preempted}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not work.done():
+            work.cancel()
+        preempted.cancel()
+    if work.done() and not work.cancelled():
+        return work.result()
+    raise Preempted(f"{admission.lane.label} slot reclaimed")
@@ -0,0 +1,159 @@
+"""
+Adaptive concurrency limits driven by observed upstream (LLM) latency.
+
+A limiter gets one sample per finished LLM call (latency, and whether the
+call failed) and returns the lane's new slot reservation:
+
+- "aimd": +1 slot per window of samples while latency stays within
+  `tolerance` x baseline; x`backoff` when it doesn't or a call fails (at
+  most once per window, so one slow burst isn't punished repeatedly).
+- "gradient": once per window of `limit` samples, limit x (baseline
+  latency / window mean latency), clamped to [0.5, 1] after the tolerance,
+  plus a sqrt(limit) queue allowance, with smoothing (after the gradient2
+  scheme). Shrinks in proportion to how far latency drifted instead of in
+  fixed steps.
+
+Both stay within [min_limit, max_limit]. "static" never changes the limit.
+"""
+import math
+import time
+from collections import deque
+from typing import Optional
+
+LIMIT_MODES = ("static", "aimd", "gradient")
+
+# How fast the no-load baseline follows latency upwards (it follows
+# decreases immediately); small so saturation doesn't become the new normal
+BASELINE_DRIFT = 0.0005
+
+
+class AdaptiveLimit:
+    """
+    Base class: baseline/latency tracking, bounds and decision history.
+    """
+
+    mode = "static"
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 100, tolerance: float = 1.5):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.tolerance = tolerance
+        self.estimate = float(self._clamp(initial))
+        self.baseline_s: Optional[float] = None
+        self.recent_s: Optional[float] = None
+        self.decisions = deque(maxlen=20)
+        self.stats = {"samples": 0, "increases": 0, "decreases": 0, "failures": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._clamp(round(self.estimate)))
+
+    def _clamp(self, value):
+        return max(self.min_limit, min(self.max_limit, value))
+
+    def set_limit(self, limit: int):
+        # Operator override (POST /config); adaptation continues from here
+        self.estimate = float(self._clamp(limit))
+        self._decide("override", None)
+
+    def update(self, latency_s: float, failed: bool = False) -> int:
+        self.stats["samples"] += 1
+        self.stats["failures"] += failed
+        if self.baseline_s is None or latency_s < self.baseline_s:
+            self.baseline_s = latency_s
+        else:
+            self.baseline_s += BASELINE_DRIFT * (latency_s - self.baseline_s)
+        if self.recent_s is None:
+            self.recent_s = latency_s
+        else:
+            self.recent_s += 0.1 * (latency_s - self.recent_s)
+
+        before = self.limit
+        self.estimate = float(self._clamp(self._next(latency_s, failed)))
+        if self.limit > before:
+            self.stats["increases"] += 1
+            self._decide("increase", latency_s)
+        elif self.limit < before:
+            self.stats["decreases"] += 1
+            self._decide("decrease", latency_s)
+        return self.limit
+
+    def _next(self, latency_s: float, failed: bool) -> float:
+        return self.estimate
+
+    def _decide(self, action: str, latency_s: Optional[float]):
+        self.decisions.append(
+            {
+                "at": round(time.time(), 3),
+                "action": action,
+                "limit": self.limit,
+                "latency_ms": round(latency_s * 1000, 1) if latency_s is not None else None,
+            }
+        )
+
+    def snapshot(self):
+        return {
+            "mode": self.mode,
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "baseline_ms": round(self.baseline_s * 1000, 1) if self.baseline_s else None,
+            "recent_ms": round(self.recent_s * 1000, 1) if self.recent_s else None,
+            **self.stats,
+            "recent_decisions": list(self.decisions),
+        }
+
+
+class AimdLimit(AdaptiveLimit):
+    mode = "aimd"
+
+    def __init__(self, initial, min_limit=1, max_limit=100, tolerance=1.5, backoff=0.9):
+        super().__init__(initial, min_limit, max_limit, tolerance)
+        self.backoff = backoff
+        self._cooldown = 0
+
+    def _next(self, latency_s, failed):
+        self._cooldown = max(0, self._cooldown - 1)
+        if failed or latency_s > self.baseline_s * self.tolerance:
+            if self._cooldown:
+                return self.estimate
+            self._cooldown = max(1, int(self.estimate))
+            return self.estimate * self.backoff
+        # +1 per `limit` good samples
+        return self.estimate + 1.0 / max(1.0, self.estimate)
+
+
+class GradientLimit(AdaptiveLimit):
+    mode = "gradient"
+
+    def __init__(self, initial, min_limit=1, max_limit=100, tolerance=1.5, smoothing=0.2, backoff=0.9):
+        super().__init__(initial, min_limit, max_limit, tolerance)
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self._window = []
+
+    def _next(self, latency_s, failed):
+        if failed:
+            self._window = []
+            return self.estimate * self.backoff
+        self._window.append(latency_s)
+        if len(self._window) < max(1, int(self.estimate)):
+            return self.estimate
+        window_s = sum(self._window) / len(self._window)
+        self._window = []
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline_s / window_s))
+        target = self.estimate * gradient + math.sqrt(self.estimate)
+        return self.estimate * (1 - self.smoothing) + target * self.smoothing
+
+
+def make_limit(mode: str, initial: int, min_limit: int = 1, max_limit: int = 100, tolerance: float = 1.5):
+    """
+    Builds the limiter for LANE_LIMIT_MODE, or None for "static".
+    """
+    if mode == "static":
+        return None
+    if mode == "aimd":
+        return AimdLimit(initial, min_limit, max_limit, tolerance)
+    if mode == "gradient":
+        return GradientLimit(initial, min_limit, max_limit, tolerance)
+    raise ValueError(f"Unknown lane limit mode '{mode}', expected one of {LIMIT_MODES}")
@@ -0,0 +1,119 @@
+"""
+Upstream LLM client: one shared, pooled httpx.AsyncClient per process.
+
+Connections are kept alive and reused across requests (no TCP/TLS handshake
+per call), capped by `max_connections` to the upstream host, with separate
+connect / read / pool-wait timeouts. HTTP/2 (many calls multiplexed over one
+connection) is used when the optional `h2` package is installed.
+
+Speaks the small API of scripts/mock_llm_server.py:
+
+- POST /v1/complete {"prompt", "ticket_id"} -> {"text"}
+- POST /v1/stream   {"prompt", "ticket_id"} -> SSE `token` events
+  ({"text"}), then `done`
+"""
+import importlib.util
+import json
+import logging
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    """
+    Raised when the upstream LLM call fails (connection, timeout, bad status).
+    """
+
+
+class LLMClient:
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry_s: float = 30.0,
+        connect_timeout_s: float = 2.0,
+        read_timeout_s: float = 30.0,
+        pool_timeout_s: float = 5.0,
+        http2: bool = True,
+    ):
+        self.base_url = base_url
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.info("ℹ️ h2 not installed, upstream LLM client uses HTTP/1.1")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self.timeout = httpx.Timeout(
+            read_timeout_s, connect=connect_timeout_s, pool=pool_timeout_s
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url, limits=self.limits, timeout=self.timeout, http2=self.http2
+        )
+        self.stats = {"requests": 0, "failures": 0, "streams": 0, "total_s": 0.0}
+
+    async def complete(self, prompt: str, ticket_id: str) -> str:
+        start = time.perf_counter()
+        self.stats["requests"] += 1
+        try:
+            resp = await self._client.post(
+                "/v1/complete", json={"prompt": prompt, "ticket_id": ticket_id}
+            )
+            resp.raise_for_status()
+            return resp.json()["text"]
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            self.stats["failures"] += 1
+            raise UpstreamError(f"LLM call failed: {e!r}") from e
+        finally:
+            self.stats["total_s"] += time.perf_counter() - start
+
+    async def stream(self, prompt: str, ticket_id: str):
+        """
+        Yields response chunks as the upstream produces them.
+        """
+        start = time.perf_counter()
+        self.stats["requests"] += 1
+        self.stats["streams"] += 1
+        try:
+            async with self._client.stream(
+                "POST", "/v1/stream", json={"prompt": prompt, "ticket_id": ticket_id}
+            ) as resp:
+                resp.raise_for_status()
+                event = None
+                async for line in resp.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:") and event == "token":
+                        yield json.loads(line[5:])["text"]
+                    elif event == "done":
+                        return
+                # Connection closed before `done`: the answer is cut short
+                raise UpstreamError("stream ended without done")
+        except UpstreamError:
+            self.stats["failures"] += 1
+            raise
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            self.stats["failures"] += 1
+            raise UpstreamError(f"LLM stream failed: {e!r}") from e
+        finally:
+            self.stats["total_s"] += time.perf_counter() - start
+
+    def snapshot(self):
+        requests = self.stats["requests"]
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+            "keepalive_expiry_s": self.limits.keepalive_expiry,
+            **{k: v for k, v in self.stats.items() if k != "total_s"},
+            "avg_ms": round(self.stats["total_s"] / requests * 1000, 1) if requests else 0.0,
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -1,16 +1,44 @@
 import asyncio
+import json
+import math
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 import joblib
 import logging
-import re
 import os
-from concurrent.futures import ThreadPoolExecutor
-from fastapi import FastAPI, HTTPException, status, Security, Depends
+from fastapi import FastAPI, HTTPException, Request, Response, status, Security, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.security.api_key import APIKeyHeader
 from contextlib import asynccontextmanager
-from .models import ChatRequest, ChatResponse
-from .worker import simulate_llm_processing
-from transformers import pipeline
+from .models import ChatRequest, ChatResponse, PiiSpan
+from .worker import (
+    LLM_TOTAL_S,
+    SimulatedLLMError,
+    simulate_llm_processing,
+    simulator,
+    stream_llm_processing,
+)
+from .batching import MicroBatcher
+from .inference import UrgencyClassifier, CascadeClassifier, InferenceResult, UNKNOWN_RESULT
+from .embedding_cache import EmbeddingCache
+from .worker_pool import POOL_KINDS, create_inference_pool, default_torch_threads
+from .artifact import (
+    load_artifact,
+    load_injection_detector,
+    load_lexical_tier,
+    DEFAULT_ARTIFACT_DIR,
+)
+from .injection import InjectionDetector
+from .pii import PiiResult, find_regex_spans, mask_spans, ner_spans
+from .ner_gate import NerGate, load_gazetteer
+from .ner_backends import make_ner_backend
+from .guardrails import GuardrailEngine, GUARDRAIL_RULES_PATH
+from .lanes import Admission, AdmissionGate, Lane, LaneFull, LaneScheduler, Preempted, run_preemptible
+from .limits import make_limit
+from .rate_limit import TokenBucketLimiter
+from .llm_client import LLMClient, UpstreamError
+from .lane_state import LaneLeases, LaneStateError, default_shm_path, make_lane_state
 from huggingface_hub import hf_hub_download
 
 # Import Custom Transformer Class to ensure Pickle can find it
@@ -25,9 +53,177 @@ logger = logging.getLogger(__name__)
 # --- ARCHITECTURE CONSTANTS (Mutable) ---
 LANE_CONFIG = {"fast_limit": 10, "normal_limit": 2}
 
-# Lane Counters
-lane_state = {"fast_active": 0, "normal_active": 0}
-state_lock = asyncio.Lock()
+# Lanes: concurrency limit + bounded priority queue (CRITICAL before HIGH).
+# A request waits up to its lane deadline for a slot instead of an instant 429.
+LANE_QUEUE_CONFIG = {
+    "max_depth": int(os.getenv("LANE_QUEUE_MAX_DEPTH", "64")),
+    "fast_deadline_s": float(os.getenv("LANE_QUEUE_DEADLINE_FAST_S", "1.0")),
+    "normal_deadline_s": float(os.getenv("LANE_QUEUE_DEADLINE_NORMAL_S", "3.0")),
+}
+
+# Overload gate in front of triage: once no lane could serve another request
+# within its deadline, new requests get 429 before guardrails/NER/inference run.
+# With CASCADE_MODE=on the lexical tier guesses the lane, so the gate can
+# reject per lane; otherwise it trips only when all lanes are saturated.
+ADMISSION_GATE_ENABLED = os.getenv("ADMISSION_GATE", "on") == "on"
+
+# End-to-end deadlines: clients send X-Deadline-Ms (their remaining budget);
+# DEFAULT_DEADLINE_MS applies without one (0 = none). Lane waits are capped
+# at it, and a request whose deadline passes or whose client disconnects is
+# cancelled wherever it is (triage, lane queue, LLM call), freeing its slot.
+DEADLINE_HEADER = "X-Deadline-Ms"
+DEADLINE_CONFIG = {
+    "default_ms": int(os.getenv("DEFAULT_DEADLINE_MS", "0")),
+    "disconnect_poll_s": float(os.getenv("DISCONNECT_POLL_S", "0.1")),
+}
+cancel_counts = {
+    "disconnected": 0,
+    "deadline_exceeded": 0,
+    "slots_freed": 0,
+    "slot_seconds_recovered": 0.0,
+}
+# Upstream LLM: LLM_BACKEND=simulated (in-process sleep, backend/worker.py) |
+# http (pooled keep-alive client to LLM_BASE_URL, e.g. scripts/mock_llm_server.py)
+LLM_CONFIG = {
+    "backend": os.getenv("LLM_BACKEND", "simulated"),
+    "base_url": os.getenv("LLM_BASE_URL", "http://127.0.0.1:9000"),
+    "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+    "max_keepalive": int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+    "connect_timeout_s": float(os.getenv("LLM_CONNECT_TIMEOUT_S", "2")),
+    "read_timeout_s": float(os.getenv("LLM_READ_TIMEOUT_S", "30")),
+    "http2": os.getenv("LLM_HTTP2", "on") == "on",
+}
+llm_client = (
+    LLMClient(
+        LLM_CONFIG["base_url"],
+        max_connections=LLM_CONFIG["max_connections"],
+        max_keepalive=LLM_CONFIG["max_keepalive"],
+        connect_timeout_s=LLM_CONFIG["connect_timeout_s"],
+        read_timeout_s=LLM_CONFIG["read_timeout_s"],
+        http2=LLM_CONFIG["http2"],
+    )
+    if LLM_CONFIG["backend"] == "http"
+    else None
+)
+
+
+def llm_complete(text: str, ticket_id: str, lane=None, intent=None):
+    if llm_client is not None:
+        return llm_client.complete(text, ticket_id)
+    # lane/intent pick the simulator profile (LLM_SIM_CONFIG)
+    return simulate_llm_processing(text, ticket_id, lane, intent)
+
+
+def llm_stream(text: str, ticket_id: str, lane=None, intent=None):
+    if llm_client is not None:
+        return llm_client.stream(text, ticket_id)
+    return stream_llm_processing(text, ticket_id, lane, intent)
+
+
+# Average duration of completed LLM calls, what a cancelled call would have cost
+llm_call_ewma_s = LLM_TOTAL_S
+
+
+def _max_borrow(value: str):
+    return None if value == "unlimited" else int(value)
+
+
+# Work-conserving scheduler: fast_limit / normal_limit are each lane's
+# guaranteed slots in one shared pool; idle slots are lent to the other lane
+# (weighted fair share, capped by *_max_borrow). With LANE_PREEMPT=on the
+# fast lane reclaims slots the normal lane borrowed as soon as it needs them.
+LANE_SCHEDULER_CONFIG = {
+    "fast_weight": float(os.getenv("LANE_FAST_WEIGHT", "3")),
+    "normal_weight": float(os.getenv("LANE_NORMAL_WEIGHT", "1")),
+    "fast_max_borrow": _max_borrow(os.getenv("LANE_FAST_MAX_BORROW", "unlimited")),
+    "normal_max_borrow": _max_borrow(os.getenv("LANE_NORMAL_MAX_BORROW", "5")),
+    "preempt": os.getenv("LANE_PREEMPT", "on") == "on",
+}
+# Adaptive lane limits: LANE_LIMIT_MODE=static | aimd | gradient. Adaptive
+# modes move each lane's reservation with observed LLM latency, within
+# [min, max]; fast_limit / normal_limit are the starting points.
+LANE_LIMIT_CONFIG = {
+    "mode": os.getenv("LANE_LIMIT_MODE", "static"),
+    "fast_min": int(os.getenv("LANE_FAST_MIN_LIMIT", "2")),
+    "fast_max": int(os.getenv("LANE_FAST_MAX_LIMIT", "40")),
+    "normal_min": int(os.getenv("LANE_NORMAL_MIN_LIMIT", "1")),
+    "normal_max": int(os.getenv("LANE_NORMAL_MAX_LIMIT", "10")),
+    "tolerance": float(os.getenv("LANE_LIMIT_TOLERANCE", "1.5")),
+}
+
+
+def _lane_limiter(lane_key: str):
+    return make_limit(
+        LANE_LIMIT_CONFIG["mode"],
+        LANE_CONFIG[f"{lane_key}_limit"],
+        LANE_LIMIT_CONFIG[f"{lane_key}_min"],
+        LANE_LIMIT_CONFIG[f"{lane_key}_max"],
+        LANE_LIMIT_CONFIG["tolerance"],
+    )
+
+
+lane_scheduler = LaneScheduler(
+    [
+        Lane(
+            "fast",
+            LANE_CONFIG["fast_limit"],
+            weight=LANE_SCHEDULER_CONFIG["fast_weight"],
+            max_borrow=LANE_SCHEDULER_CONFIG["fast_max_borrow"],
+            can_preempt=LANE_SCHEDULER_CONFIG["preempt"],
+            max_queue=LANE_QUEUE_CONFIG["max_depth"],
+            label="FAST LANE",
+            limiter=_lane_limiter("fast"),
+        ),
+        Lane(
+            "normal",
+            LANE_CONFIG["normal_limit"],
+            weight=LANE_SCHEDULER_CONFIG["normal_weight"],
+            max_borrow=LANE_SCHEDULER_CONFIG["normal_max_borrow"],
+            max_queue=LANE_QUEUE_CONFIG["max_depth"],
+            label="NORMAL LANE",
+            limiter=_lane_limiter("normal"),
+        ),
+    ]
+)
+lanes = lane_scheduler.lanes
+admission_gate = AdmissionGate(
+    lane_scheduler,
+    {key: LANE_QUEUE_CONFIG[f"{key}_deadline_s"] for key in lanes},
+    enabled=ADMISSION_GATE_ENABLED,
+)
+
+# Cluster-wide lane accounting: LANE_STATE_BACKEND=local (limits per process)
+# | shm (shared by all uvicorn workers on this host) | network (shared by all
+# replicas via LANE_STATE_URL, see scripts/lane_state_server.py). Every admitted
+# request also leases a slot from the shared counts; leases expire after
+# LANE_LEASE_TTL_S unless renewed, so a crashed worker's slots come back.
+LANE_STATE_CONFIG = {
+    "backend": os.getenv("LANE_STATE_BACKEND", "local"),
+    "shm_path": os.getenv("LANE_STATE_SHM_PATH", default_shm_path()),
+    "url": os.getenv("LANE_STATE_URL", "127.0.0.1:7070"),
+    "lease_ttl_s": float(os.getenv("LANE_LEASE_TTL_S", "10")),
+    "fail_open": os.getenv("LANE_STATE_FAIL_OPEN", "on") == "on",
+}
+lane_leases = LaneLeases(
+    make_lane_state(
+        LANE_STATE_CONFIG["backend"],
+        ["pool", *lanes],
+        shm_path=LANE_STATE_CONFIG["shm_path"],
+        url=LANE_STATE_CONFIG["url"],
+    ),
+    ttl_s=LANE_STATE_CONFIG["lease_ttl_s"],
+    fail_open=LANE_STATE_CONFIG["fail_open"],
+)
+
+
+def cluster_limits(lane: Lane):
+    """
+    Cluster-wide caps for one slot in `lane`: the whole pool, and the lane's
+    reservation plus what it may borrow.
+    """
+    total = lane_scheduler.total
+    lane_cap = total if lane.max_borrow is None else min(total, lane.reserved + lane.max_borrow)
+    return {"pool": total, lane.name: lane_cap}
 
 # --- SECURITY ---
 API_KEY_NAME = "X-API-Key"
@@ -43,219 +239,461 @@ async def get_api_key(api_key_header: str = Security(api_key_header)):
     )
 
 
+# Per-client token buckets, checked before any guardrail/inference work:
+# one per ChatRequest.user_id ("anonymous" has none) and one per API key.
+# RATE_LIMIT_*_RPS=0 disables that bucket.
+RATE_LIMIT_CONFIG = {
+    "user_rps": float(os.getenv("RATE_LIMIT_USER_RPS", "2")),
+    "user_burst": float(os.getenv("RATE_LIMIT_USER_BURST", "10")),
+    "key_rps": float(os.getenv("RATE_LIMIT_KEY_RPS", "200")),
+    "key_burst": float(os.getenv("RATE_LIMIT_KEY_BURST", "400")),
+    "max_keys": int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")),
+}
+user_rate_limiter = TokenBucketLimiter(
+    RATE_LIMIT_CONFIG["user_rps"], RATE_LIMIT_CONFIG["user_burst"], RATE_LIMIT_CONFIG["max_keys"]
+)
+key_rate_limiter = TokenBucketLimiter(
+    RATE_LIMIT_CONFIG["key_rps"], RATE_LIMIT_CONFIG["key_burst"], RATE_LIMIT_CONFIG["max_keys"]
+)
+
+
+def check_rate_limit(request: ChatRequest, api_key: str, ticket_id: str):
+    """
+    Raises 429 (with Retry-After) if the user or the API key is over its rate.
+    """
+    checks = []
+    if RATE_LIMIT_CONFIG["key_rps"] > 0:
+        checks.append(("API key", key_rate_limiter, api_key))
+    if RATE_LIMIT_CONFIG["user_rps"] > 0 and request.user_id and request.user_id != "anonymous":
+        checks.append(("user", user_rate_limiter, request.user_id))
+    for scope, limiter, client_id in checks:
+        allowed, retry_after = limiter.allow(client_id)
+        if not allowed:
+            logger.warning(
+                f"🐢 [Ticket {ticket_id}] Rate limited ({scope}), retry in {retry_after:.1f}s"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded ({scope})",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
 # Guardrails: PII MASKING (Hybrid: Regex + NER)
 # Global State
 model = None
-ner_pipeline = None
-executor = ThreadPoolExecutor(max_workers=1)
-
-
-def get_ner_pipeline():
-    global ner_pipeline
-    if ner_pipeline is None:
-        logger.info("⏳ Lazy Loading NER Pipeline...")
+classifier = None
+ner_backend = None
+# NER_BACKEND=bert (dslim/bert-base-NER) | gazetteer (Aho-Corasick over
+# GAZETTEER_DIR files) | tiered (gazetteer first, BERT only when still needed)
+NER_BACKEND = os.getenv("NER_BACKEND", "bert")
+# Inference worker pool: INFERENCE_POOL=thread|process, INFERENCE_WORKERS=N.
+# Created in lifespan *after* the models load so forked workers share them.
+POOL_CONFIG = {
+    "kind": os.getenv("INFERENCE_POOL", "thread"),
+    "workers": int(os.getenv("INFERENCE_WORKERS", "1")),
+    "torch_threads": int(os.getenv("TORCH_THREADS_PER_WORKER", "0")),
+}
+# The pool is built in a background task; fail at import, not silently there
+if POOL_CONFIG["kind"] not in POOL_KINDS:
+    raise ValueError(
+        f"Unknown INFERENCE_POOL '{POOL_CONFIG['kind']}', expected one of {POOL_KINDS}"
+    )
+executor = None
+
+# Split classifier artifact (see backend/artifact.py); joblib is the fallback
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR)
+
+# Classifier cascade: a lexical model answers first, MiniLM only when it is
+# below CASCADE_THRESHOLD (needs an artifact trained with the lexical tier)
+CASCADE_CONFIG = {
+    "enabled": os.getenv("CASCADE_MODE", "off") == "on",
+    "threshold": float(os.getenv("CASCADE_THRESHOLD", "0.9")),
+}
+tier_counts = {"lexical": 0, "bert": 0}
+
+# Semantic injection detector on the routing embedding: INJECTION_DETECTOR=
+# auto | block | log | off. "auto" blocks only with a calibrated threshold
+# (artifact bank or INJECTION_THRESHOLD), otherwise it only logs: the
+# built-in examples' default threshold can flag ordinary tickets.
+# INJECTION_THRESHOLD overrides the artifact's calibrated threshold
+# (0 = keep it). Lexical-tier answers carry no embedding.
+INJECTION_CONFIG = {
+    "mode": os.getenv("INJECTION_DETECTOR", "auto"),
+    "threshold": float(os.getenv("INJECTION_THRESHOLD", "0")),
+}
+injection_counts = {"scored": 0, "flagged": 0}
+
+# Embedder runtime: torch (SentenceTransformer) | onnx | onnx-int8 (onnxruntime)
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "torch")
+
+# Embedding cache in front of BertEmbedder.transform (0 MB disables it)
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64"))
+EMBEDDING_CACHE_TTL_S = float(os.getenv("EMBEDDING_CACHE_TTL_S", "0"))
+embedding_cache = (
+    EmbeddingCache(
+        max_bytes=int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=EMBEDDING_CACHE_TTL_S,
+    )
+    if EMBEDDING_CACHE_MAX_MB > 0
+    else None
+)
+
+
+def embedding_cache_stats():
+    if embedding_cache is None:
+        return None
+    stats = embedding_cache.stats()
+    if POOL_CONFIG["kind"] == "process":
+        # Each forked worker embeds with its own copy of the cache; these
+        # numbers are the parent's, which does no inference after warmup
+        stats["scope"] = "parent_only"
+    return stats
+
+
+def get_ner_backend():
+    global ner_backend
+    if ner_backend is None:
+        logger.info(f"⏳ Lazy Loading NER backend ({NER_BACKEND})...")
         try:
-            ner_pipeline = pipeline(
-                "ner", model="dslim/bert-base-NER", aggregation_strategy="simple"
-            )
-            logger.info("✅ NER Pipeline Loaded.")
+            ner_backend = make_ner_backend(NER_BACKEND, gate=ner_gate).load()
+            logger.info("✅ NER backend Loaded.")
         except Exception as e:
             logger.error(f"❌ Failed to load NER: {e}")
-    return ner_pipeline
+    return ner_backend
 
 
 def mask_pii(text: str):
     """
+    Blocking version (notebooks/scripts). The API uses mask_pii_async.
     Returns: (masked_text, pii_types_list)
     """
-    pii_types = []
-    masked = text
-
-    # 1. Regex-based (Structured PII)
-    if re.search(r"[\w\.-]+@[\w\.-]+\.\w+", masked):
-        pii_types.append("EMAIL")
-        masked = re.sub(r"[\w\.-]+@[\w\.-]+\.\w+", "[EMAIL]", masked)
-    
-    # 2. Strict Phone (Formatted) - e.g. 555-0199-8888, (555) 123-4567
-    # Requires at least one separator to distinguish from long numbers
-    phone_strict = r"(?:\+?\d{1,3})?[-.\s]?\(?\d{3}\)?[-.\s]+\d{3,4}[-.\s]+\d{4}"
-    if re.search(phone_strict, masked):
-        pii_types.append("PHONE")
-        masked = re.sub(phone_strict, "[PHONE]", masked)
-
-    # 3. Special Credit Card (User's specific "12312 12312" format)
-    # Must run before generic CC to catch this specific pattern accurately
-    if re.search(r"\b\d{5} \d{5}\b", masked):
-        pii_types.append("CREDIT_CARD")
-        masked = re.sub(r"\b\d{5} \d{5}\b", "[CREDIT_CARD]", masked)
-
-    # 4. Standard Credit Card (13-19 digits)
-    if re.search(r"\b(?:\d[ -]*?){13,19}\b", masked):
-        pii_types.append("CREDIT_CARD")
-        masked = re.sub(r"\b(?:\d[ -]*?){13,19}\b", "[CREDIT_CARD]", masked)
-
-    # 5. National ID (11 digits, continuous) - e.g. TCKN
-    # Strict 11 digits check
-    if re.search(r"\b\d{11}\b", masked):
-        pii_types.append("ID_NUMBER")
-        masked = re.sub(r"\b\d{11}\b", "[ID_NUMBER]", masked)
-
-    # 6. Context-Aware Fallbacks
-    
-    # ID Context: "id is 123456", "identification number: 12345"
-    # Matches keyword + up to 20 non-digit chars (e.g. " is ", " number is ") + number
-    context_id = r"(?i)\b(?:id|identification|tckn|passport|no|number)\b(?:[^0-9]{0,20})?(\d{5,})\b"
-    if re.search(context_id, masked):
-         pii_types.append("ID_NUMBER")
-         def repl(m): return m.group(0).replace(m.group(1), "[ID_NUMBER]")
-         masked = re.sub(context_id, repl, masked)
-
-    # Phone Context: "phone is 123456", "call me at 123456"
-    context_phone = r"(?i)\b(?:phone|call|mobile|cell|contact)\b(?:[^0-9]{0,20})?(\d{6,})\b"
-    if re.search(context_phone, masked):
-         pii_types.append("PHONE")
-         def repl(m): return m.group(0).replace(m.group(1), "[PHONE]")
-         masked = re.sub(context_phone, repl, masked)
-
-    # 2. NER-based (Unstructured PII: Names, Locations, Orgs)
-    # Lazy Load if needed (for Notebook usage)
-    nlp = get_ner_pipeline()
+    # 1. Regex-based (Structured PII) - compiled scanner, see backend/pii.py
+    spans = find_regex_spans(text)
 
-    if nlp:
+    # 2. NER-based (Unstructured PII: Names, Locations, Orgs), on the original
+    # text; overlaps with regex spans are resolved by priority in mask_spans
+    # Lazy Load if needed (for Notebook usage)
+    nlp = get_ner_backend()
+    if nlp and (not nlp.gated or ner_gate.should_run(text)):
         try:
-            # CRITICAL FIX: Run NER on 'masked' (current state), not 'text' (original)
-            # This prevents index misalignment if regex replacements occurred earlier.
-            entities = nlp(masked)
-            # Sort by start position in reverse to avoid index shifting during replacement
-            entities_sorted = sorted(entities, key=lambda x: x["start"], reverse=True)
-
-            for ent in entities_sorted:
-                entity_type = (
-                    ent.get("entity_group", ent.get("entity", ""))
-                    .replace("B-", "")
-                    .replace("I-", "")
-                )
-                start, end = ent["start"], ent["end"]
-
-                # Check if we are overwriting an existing mask (heuristic)
-                segment = masked[start:end]
-                if "[" in segment and "]" in segment:
-                    continue
-
-                if entity_type == "PER":
-                    if "PERSON" not in pii_types:
-                        pii_types.append("PERSON")
-                    masked = masked[:start] + "[PERSON]" + masked[end:]
-                elif entity_type == "LOC":
-                    if "LOCATION" not in pii_types:
-                        pii_types.append("LOCATION")
-                    masked = masked[:start] + "[LOCATION]" + masked[end:]
-                elif entity_type == "ORG":
-                    if "ORGANIZATION" not in pii_types:
-                        pii_types.append("ORGANIZATION")
-                    masked = masked[:start] + "[ORG]" + masked[end:]
+            spans += ner_spans(nlp.predict_batch([text])[0])
         except Exception as e:
             logger.warning(f"NER failed: {e}")
+
+    result = mask_spans(text, spans)
+    return result.masked, result.pii_types
+
+
+# NER gate: NER_GATE=off|conservative|aggressive decides per request whether
+# the NER pass can find anything (see scripts/eval_ner_gate.py for recall)
+ner_gate = NerGate(
+    os.getenv("NER_GATE", "conservative"),
+    load_gazetteer(os.getenv("NER_GATE_GAZETTEER")),
+)
+
+
+def run_ner_batch(texts):
+    """
+    Blocking NER for a whole micro-batch: one backend call, one entity list per text.
+    """
+    if ner_backend is None:
+        return [[] for _ in texts]
+    return ner_backend.predict_batch(texts)
+
+
+# --- ASYNC NER STAGE ---
+# The BERT NER forward pass never runs on the event loop: concurrent requests
+# are batched and run on a dedicated executor, so /health, /stats and other
+# in-flight requests keep being served while NER is busy.
+NER_CONFIG = {
+    "workers": int(os.getenv("NER_WORKERS", "1")),
+    "max_batch_size": int(os.getenv("NER_BATCH_MAX_SIZE", "16")),
+    "max_wait_ms": float(os.getenv("NER_BATCH_WINDOW_MS", "5")),
+}
+ner_executor = ThreadPoolExecutor(
+    max_workers=NER_CONFIG["workers"], thread_name_prefix="ner"
+)
+ner_batcher = MicroBatcher(
+    run_ner_batch,
+    ner_executor,
+    max_batch_size=NER_CONFIG["max_batch_size"],
+    max_wait_ms=NER_CONFIG["max_wait_ms"],
+    max_in_flight=NER_CONFIG["workers"],
+    name="ner_batcher",
+)
+
+
+async def mask_pii_async(text: str) -> PiiResult:
+    """
+    Non-blocking mask_pii. NER (batched on the NER executor) and the regex
+    scan both work on the original text, concurrently; their spans are
+    merged by priority and the masked text is built once.
+    Returns: PiiResult(masked, pii_types, spans)
+    """
+    ner_future = None
+    if ner_backend is not None and (not ner_backend.gated or ner_gate.should_run(text)):
+        ner_future = asyncio.ensure_future(ner_batcher.submit(text))
+
+    # Regex runs on the loop (sub-millisecond) while NER is in flight
+    spans = find_regex_spans(text)
+
+    if ner_future is not None:
+        try:
+            spans += ner_spans(await ner_future)
         except Exception as e:
             logger.warning(f"NER failed: {e}")
 
-    return masked, pii_types
+    return mask_spans(text, spans)
+
 
+# Guardrails: Prompt Injection Detection + Output Filtering
+# Rules live in GUARDRAIL_RULES_PATH (JSON), compiled into one matcher per
+# rule set; see backend/guardrails.py. Reload without a restart via
+# POST /guardrails/reload, PUT /guardrails/rules or by editing the file
+# (checked every GUARDRAIL_RULES_WATCH_S seconds, 0 disables).
+guardrails = GuardrailEngine(GUARDRAIL_RULES_PATH)
+guardrails.load_file()
+GUARDRAIL_RULES_WATCH_S = float(os.getenv("GUARDRAIL_RULES_WATCH_S", "5"))
 
-# Guardrails: Prompt Injection Detection
-def detect_prompt_injection(text: str) -> bool:
+
+async def watch_guardrail_rules():
+    while True:
+        await asyncio.sleep(GUARDRAIL_RULES_WATCH_S)
+        try:
+            guardrails.reload_if_changed()
+        except Exception as e:
+            # Keep serving the previous rules until the file is fixed
+            logger.error(f"❌ Guardrail rules reload failed: {e}")
+
+
+# --- STARTUP / READINESS ---
+# Models load in the background; /health is liveness, /ready flips only once
+# every model is loaded *and* has served a warmup batch.
+WARMUP_TEXTS = [
+    "My credit card was stolen, block it now!",
+    "Hello, my name is John and I live in Berlin",
+    "track my order",
+]
+startup_state = {
+    "ready": False,
+    "loading": False,
+    "errors": {},
+    # Seconds per startup step + total time-to-ready, tracked across releases
+    "timings": {},
+}
+
+
+def load_urgency_classifier():
     """
-    Heuristic check for common jailbreak patterns.
+    Builds the UrgencyClassifier (artifact first, legacy joblib second).
+    Embedder weights are loaded separately by the startup sequence.
     """
-    patterns = [
-        r"ignore previous",
-        r"ignore all",
-        r"ignore.*instructions",
-        r"ignore.*rules",
-        r"system prompt",
-        r"you are now DAN",
-        r"do anything now",
-        r"browse the web",
-        r"delete your data",
-    ]
-    for pattern in patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return True
-    return False
+    global model
+    logger.info("Loading Urgency Model...")
+    classifier = None
+    embedder_threads = POOL_CONFIG["torch_threads"] or default_torch_threads(
+        POOL_CONFIG["workers"]
+    )
 
+    # Preferred: split artifact (mmapped head + embedder by name, nothing unpickled)
+    if os.path.exists(os.path.join(MODEL_ARTIFACT_DIR, "manifest.json")):
+        try:
+            classifier = load_artifact(
+                MODEL_ARTIFACT_DIR, EMBEDDER_BACKEND, num_threads=embedder_threads
+            )
+            logger.info(f"✅ Urgency Model assembled from artifact: {MODEL_ARTIFACT_DIR}")
+        except Exception as e:
+            logger.warning(f"⚠️ Artifact {MODEL_ARTIFACT_DIR} unusable ({e}). Trying joblib...")
+
+    # Legacy: whole pickled Pipeline
+    if classifier is None:
+        try:
+            import sys
+            import backend.train_model
+
+            sys.modules["__main__"].BertEmbedder = backend.train_model.BertEmbedder
 
-# Guardrails: Output Filtering
-def validate_output(text: str) -> bool:
+            # Try local model first (for development/NAS)
+            local_path = "backend/urgency_model.joblib"
+            if os.path.exists(local_path):
+                model = joblib.load(local_path)
+                logger.info(f"✅ Urgency Model loaded from local file: {local_path}")
+            else:
+                # Training inline would block readiness for minutes; do it offline
+                logger.error(
+                    f"❌ No model at {MODEL_ARTIFACT_DIR} or {local_path}. "
+                    "Run `python -m backend.train_model` first."
+                )
+        except Exception as e:
+            logger.error(f"❌ Failed to load urgency model: {e}")
+
+        # Single-pass inference wrapper (embed once, classify once)
+        if model is not None:
+            classifier = UrgencyClassifier.from_pipeline(model)
+            if EMBEDDER_BACKEND != "torch":
+                from .embedders import make_embedder
+
+                # Same embedding model, different runtime; the classifier head is unchanged
+                classifier.embedder = make_embedder(
+                    EMBEDDER_BACKEND, classifier.embedder.model_name, num_threads=embedder_threads
+                )
+
+    if classifier is not None:
+        logger.info(f"✅ Embedder backend: {EMBEDDER_BACKEND}")
+        classifier.embedder.cache = embedding_cache
+
+        if CASCADE_CONFIG["enabled"]:
+            lexical = None
+            if os.path.exists(os.path.join(MODEL_ARTIFACT_DIR, "manifest.json")):
+                lexical = load_lexical_tier(MODEL_ARTIFACT_DIR)
+            if lexical is None:
+                logger.warning("⚠️ CASCADE_MODE=on but the artifact has no lexical tier; BERT only.")
+            else:
+                classifier = CascadeClassifier(*lexical, classifier, CASCADE_CONFIG["threshold"])
+                logger.info(f"✅ Cascade enabled (threshold={CASCADE_CONFIG['threshold']})")
+    return classifier
+
+
+def attach_injection_detector(loaded):
     """
-    Ensures the model/agent response is safe.
+    Gives the embedding-tier classifier its InjectionDetector (artifact bank
+    if present, otherwise ATTACK_EXAMPLES embedded now) and resolves "auto".
     """
-    blocked_patterns = [r"hashed_password", r"private_key", r"internal_server_error"]
-    for pattern in blocked_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return False
-    return True
-
+    if INJECTION_CONFIG["mode"] == "off":
+        return None
+    base = getattr(loaded, "fallback", loaded)  # CascadeClassifier wraps it
+    detector = None
+    if os.path.exists(os.path.join(MODEL_ARTIFACT_DIR, "manifest.json")):
+        detector = load_injection_detector(MODEL_ARTIFACT_DIR)
+    calibrated = detector is not None or INJECTION_CONFIG["threshold"] > 0
+    if detector is None:
+        logger.warning("⚠️ No injection bank in the artifact; embedding built-in attack examples.")
+        detector = InjectionDetector.from_examples(base.embedder)
+    if INJECTION_CONFIG["threshold"] > 0:
+        detector.threshold = INJECTION_CONFIG["threshold"]
+    if INJECTION_CONFIG["mode"] == "auto":
+        INJECTION_CONFIG["mode"] = "block" if calibrated else "log"
+        if not calibrated:
+            logger.warning("⚠️ Injection threshold is not calibrated; logging matches, not blocking.")
+    base.injection = detector
+    logger.info(
+        f"✅ Injection detector: {detector.attacks.shape[0]} attacks, "
+        f"threshold={detector.threshold:.3f}, mode={INJECTION_CONFIG['mode']}"
+    )
+    return detector
 
-# Global State
-model = None
-ner_pipeline = None
-# executor is defined in global scope above, no need to redefine if not moved,
-# but my previous edit put it in the block. Let's make sure it's cleaning up correctly.
 
+def load_ner_backend():
+    logger.info(f"Loading NER backend ({NER_BACKEND}) for PII...")
+    nlp = make_ner_backend(NER_BACKEND, gate=ner_gate).load()
+    logger.info("✅ NER backend Loaded Successfully.")
+    return nlp
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup: Load Models
-    global model, ner_pipeline
 
-    # 1. Load Urgency Model
-    logger.info("Loading Urgency Model...")
+async def _timed_step(name, fn, *args):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
     try:
-        import sys
-        import backend.train_model
+        return await loop.run_in_executor(None, fn, *args)
+    except Exception as e:
+        startup_state["errors"][name] = str(e)
+        logger.error(f"❌ Startup step '{name}' failed: {e}")
+        return None
+    finally:
+        startup_state["timings"][f"{name}_s"] = round(time.perf_counter() - start, 3)
 
-        sys.modules["__main__"].BertEmbedder = backend.train_model.BertEmbedder
 
-        # Try local model first (for development/NAS)
-        local_path = "backend/urgency_model.joblib"
-        if os.path.exists(local_path):
+async def load_models():
+    """
+    Loads, wires and warms every model; the two heavy chains
+    (classifier + embedder, NER) run in parallel.
+    """
+    global classifier, ner_backend, executor
+    started = time.perf_counter()
+
+    async def classifier_chain():
+        global classifier
+        loaded = await _timed_step("classifier", load_urgency_classifier)
+        if loaded is not None:
+            # Build the encoder now instead of on the first transform() call
+            if await _timed_step("embedder", loaded.embedder.load) is not None:
+                await _timed_step("injection", attach_injection_detector, loaded)
+                classifier = loaded
+
+    async def ner_chain():
+        global ner_backend
+        nlp = await _timed_step("ner", load_ner_backend)
+        if nlp is not None and await _timed_step("ner_warmup", nlp, WARMUP_TEXTS) is not None:
+            ner_backend = nlp
+
+    # Runs as an unawaited task: whatever happens, leave loading and say why
+    try:
+        await asyncio.gather(classifier_chain(), ner_chain())
+
+        # Inference workers (forked after loading in "process" mode), then one
+        # warmup batch per worker so lazy init never hits a real request
+        executor = create_inference_pool(**POOL_CONFIG)
+        inference_batcher.executor = executor
+        inference_batcher.start()
+        ner_batcher.start()
+        if classifier is not None:
+            loop = asyncio.get_running_loop()
+            warmup_start = time.perf_counter()
             try:
-                model = joblib.load(local_path)
-                logger.info(f"✅ Urgency Model loaded from local file: {local_path}")
-            except Exception as load_err:
-                logger.warning(f"⚠️ Local model incompatible/corrupt ({load_err}). Retraining...")
-                model = train_model()
-                logger.info("✅ Model successfully retrained and loaded.")
+                await asyncio.gather(
+                    *[
+                        loop.run_in_executor(executor, run_inference_batch, WARMUP_TEXTS)
+                        for _ in range(POOL_CONFIG["workers"])
+                    ]
+                )
+            except Exception as e:
+                startup_state["errors"]["classifier_warmup"] = str(e)
+                logger.error(f"❌ Classifier warmup failed: {e}")
+            startup_state["timings"]["classifier_warmup_s"] = round(
+                time.perf_counter() - warmup_start, 3
+            )
+            if embedding_cache:
+                embedding_cache.clear()
         else:
-            # If not found locally, try to train new one instead of failing to cloud immediately
-            # (Better for NAS)
-            logger.warning(f"⚠️ Model file not found at {local_path}. Training a new one...")
-            model = train_model()
-            
-            # Fallback to Hugging Face Hub (Only if training failed or for specific cloud envs)
-            # Keeping this block commented or secondary if we prefer local resilience
-            # But let's leave existing structure if training fails? 
-            # Actually, let's keep it simple: If local logic fails, we are in trouble.
+            startup_state["errors"].setdefault("classifier", "not loaded")
     except Exception as e:
-        logger.error(f"❌ Failed to load urgency model: {e}")
-        # Final safety net
-        try:
-             model = train_model()
-        except:
-             pass
-
-    # 2. Load NER Pipeline for PII Detection
-    logger.info("Loading NER Pipeline for PII...")
-    try:
-        ner_pipeline = pipeline(
-            "ner", model="dslim/bert-base-NER", aggregation_strategy="simple"
+        startup_state["errors"]["startup"] = repr(e)
+        logger.error(f"❌ Startup failed: {e!r}")
+        raise
+    finally:
+        startup_state["timings"]["total_s"] = round(time.perf_counter() - started, 3)
+        startup_state["loading"] = False
+        startup_state["ready"] = not startup_state["errors"]
+        logger.info(
+            f"⏱️ Startup finished in {startup_state['timings']['total_s']}s "
+            f"(ready={startup_state['ready']}) {startup_state['timings']}"
         )
-        logger.info("✅ NER Pipeline Loaded Successfully.")
-    except Exception as e:
-        logger.error(f"❌ Failed to load NER: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: accept traffic immediately, load models in the background
+    startup_state["loading"] = True
+    loader = asyncio.create_task(load_models())
+    watcher = (
+        asyncio.create_task(watch_guardrail_rules()) if GUARDRAIL_RULES_WATCH_S > 0 else None
+    )
+    lease_heartbeat = asyncio.create_task(lane_leases.heartbeat())
 
     yield
-    executor.shutdown()
+    loader.cancel()
+    if watcher is not None:
+        watcher.cancel()
+    lease_heartbeat.cancel()
+    await lane_leases.close()
+    if llm_client is not None:
+        await llm_client.aclose()
+    await inference_batcher.stop()
+    await ner_batcher.stop()
+    if executor is not None:
+        executor.shutdown()
+    ner_executor.shutdown()
 
 
 app = FastAPI(title="EmpathicGateway API", lifespan=lifespan)
@@ -266,175 +704,627 @@ app = FastAPI(title="EmpathicGateway API", lifespan=lifespan)
 async def health_check():
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
-        "ner_loaded": ner_pipeline is not None,
+        "model_loaded": classifier is not None,
+        "ner_loaded": ner_backend is not None,
+    }
+
+
+# Readiness: 200 only once every model is loaded and warmed up
+@app.get("/ready")
+async def readiness_check(response: Response):
+    if not startup_state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "ready": startup_state["ready"],
+        "loading": startup_state["loading"],
+        "errors": startup_state["errors"],
+        "startup_timings": startup_state["timings"],
     }
 
 
 @app.post("/config", dependencies=[Depends(get_api_key)])
 async def update_config(config: dict):
-    # Expects {"fast_limit": 10, "normal_limit": 5}
+    # Expects {"fast_limit": 10, "normal_limit": 5}. With an adaptive
+    # LANE_LIMIT_MODE this sets the current limit, adaptation continues from it.
     global LANE_CONFIG
     if "fast_limit" in config:
         LANE_CONFIG["fast_limit"] = config["fast_limit"]
+        lane_scheduler.set_reserved("fast", config["fast_limit"])
     if "normal_limit" in config:
         LANE_CONFIG["normal_limit"] = config["normal_limit"]
+        lane_scheduler.set_reserved("normal", config["normal_limit"])
     return {"status": "updated", "config": LANE_CONFIG}
 
 
-# --- PRIORITY MAPPING ---
-def map_priority(intent):
-    # CRITICAL: Money related, complaints
-    if intent in [
-        "payment_issue",
-        "get_refund",
-        "track_refund",
-        "complaint",
-        "check_cancellation_fee",
-        "fraud_report",
-    ]:
-        return 1
-    # HIGH: Order changes, shipping, delivery
-    elif intent in [
-        "cancel_order",
-        "change_order",
-        "change_shipping_address",
-        "place_order",
-        "track_order",
-        "delivery_options",
-        "delivery_period",
-    ]:
-        return 2
-    # NORMAL: Info, account, newsletter
-    else:
-        return 3
-
-
-def run_inference(text: str):
+@app.get("/guardrails")
+async def get_guardrails():
+    return guardrails.snapshot()
+
+
+@app.post("/guardrails/reload", dependencies=[Depends(get_api_key)])
+async def reload_guardrails():
+    # Re-read GUARDRAIL_RULES_PATH; on error the previous rules stay active
+    try:
+        return {"status": "reloaded", "guardrails": guardrails.load_file()}
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Rules not reloaded: {e}")
+
+
+@app.put("/guardrails/rules", dependencies=[Depends(get_api_key)])
+async def replace_guardrail_rules(rules: dict):
+    # Expects {"version": "...", "input": [{"name", "pattern"}], "output": [...]}
+    try:
+        return {"status": "updated", "guardrails": guardrails.load_dict(rules, source="api")}
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Rules not updated: {e}")
+
+
+def run_inference(text: str) -> InferenceResult:
     """
     CPU-bound blocking inference operation.
     """
-    if not model:
-        return "unknown", 3, 0.0, {}
+    return run_inference_batch([text])[0]
 
-    probs = model.predict_proba([text])[0]
-    predicted_intent = model.predict([text])[0]
-    max_prob = float(max(probs))
 
-    priority = map_priority(predicted_intent)
+def run_inference_batch(texts):
+    """
+    CPU-bound blocking inference for a whole micro-batch.
+    One batched BertEmbedder.transform + one predict_proba for all texts.
+    """
+    if not classifier:
+        return [UNKNOWN_RESULT for _ in texts]
+    return classifier.predict(texts)
+
+
+# --- MICRO-BATCHING ---
+# Concurrent /chat requests are grouped for a short window so that a burst of
+# N requests costs ~N/batch_size forward passes instead of N.
+BATCH_CONFIG = {
+    "max_batch_size": int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "32")),
+    "max_wait_ms": float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5")),
+}
+inference_batcher = MicroBatcher(
+    run_inference_batch,
+    executor,
+    max_batch_size=BATCH_CONFIG["max_batch_size"],
+    max_wait_ms=BATCH_CONFIG["max_wait_ms"],
+    max_in_flight=POOL_CONFIG["workers"],
+    name="inference_batcher",
+)
+
+
+LANE_LABELS = {1: "CRITICAL", 2: "HIGH", 3: "NORMAL"}
+
+
+def blocked_response(ticket_id, rule, confidence=1.0, **fields):
+    return ChatResponse(
+        ticket_id=ticket_id,
+        priority=0,
+        label="BLOCKED",
+        wait_time="0.0s",
+        message="Request blocked by security policy (Prompt Injection Detected).",
+        confidence=confidence,
+        pii_detected=fields.pop("pii_detected", False),
+        pii_types=fields.pop("pii_types", []),
+        intent="malicious",
+        explainability={},
+        blocked_rule=rule,
+        **fields,
+    )
 
-    classes = model.classes_
-    explainability = {c: float(p) for c, p in zip(classes, probs)}
 
-    if max_prob < 0.40:
-        return "uncertain", 3, max_prob, explainability
+async def triage(request: ChatRequest, ticket_id: str):
+    """
+    Everything before the LLM call: input guardrails, PII masking and
+    classification. Returns (blocked ChatResponse or None, PiiResult,
+    InferenceResult).
+    """
+    # Models are still loading/warming in the background
+    if startup_state["loading"]:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Models warming up",
+            headers={"Retry-After": "5"},
+        )
 
-    return predicted_intent, priority, max_prob, explainability
+    # Guardrails 1: Prompt Injection Check
+    blocked_rule = guardrails.check_input(request.text)
+    if blocked_rule:
+        logger.warning(
+            f"🚨 [SECURITY_AUDIT] [Ticket {ticket_id}] Prompt Injection Detected! "
+            f"Rule: {blocked_rule} | Input: {request.text}"
+        )
+        return blocked_response(ticket_id, blocked_rule), None, None
 
+    # Guardrails 2: PII Masking
+    pii = await mask_pii_async(request.text)
+    if pii.pii_types:
+        logger.info(
+            f"🛡️ [SECURITY_AUDIT] [Ticket {ticket_id}] PII Masked: {pii.masked} | Types: {pii.pii_types}"
+        )
 
-@app.post("/chat", response_model=ChatResponse, dependencies=[Depends(get_api_key)])
-async def chat_endpoint(request: ChatRequest):
-    ticket_id = str(uuid.uuid4())[:8]
-    loop = asyncio.get_running_loop()
+    # 1. CPU Offloading: Predict (micro-batched with concurrent requests)
+    result = await inference_batcher.submit(pii.masked)
+    tier_counts[result.tier] = tier_counts.get(result.tier, 0) + 1
 
-    # Guardrails 1: Prompt Injection Check
-    if detect_prompt_injection(request.text):
+    # Guardrails 1b: Semantic Injection Check (same embedding, no extra pass)
+    if result.injection_score is not None:
+        injection_counts["scored"] += 1
+        detector = getattr(classifier, "fallback", classifier).injection
+        if detector is not None and detector.is_attack(result.injection_score):
+            injection_counts["flagged"] += 1
+            logger.warning(
+                f"🚨 [SECURITY_AUDIT] [Ticket {ticket_id}] Semantic Injection Suspected! "
+                f"Score: {result.injection_score:.3f} | Mode: {INJECTION_CONFIG['mode']}"
+            )
+            if INJECTION_CONFIG["mode"] == "block":
+                blocked = blocked_response(
+                    ticket_id,
+                    "semantic_injection",
+                    confidence=result.injection_score,
+                    pii_detected=bool(pii.pii_types),
+                    pii_types=pii.pii_types,
+                    tier=result.tier,
+                )
+                return blocked, pii, result
+
+    return None, pii, result
+
+
+def request_deadline(http_request: Request):
+    """
+    Absolute deadline (loop time) from X-Deadline-Ms or DEFAULT_DEADLINE_MS,
+    or None.
+    """
+    raw = http_request.headers.get(DEADLINE_HEADER)
+    budget_ms = DEADLINE_CONFIG["default_ms"]
+    if raw is not None:
+        try:
+            budget_ms = int(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {DEADLINE_HEADER} header")
+        if budget_ms <= 0:
+            raise HTTPException(status_code=400, detail=f"{DEADLINE_HEADER} must be positive")
+    if budget_ms <= 0:
+        return None
+    return asyncio.get_running_loop().time() + budget_ms / 1000
+
+
+def remaining_s(deadline) -> float:
+    return max(0.0, deadline - asyncio.get_running_loop().time())
+
+
+async def wait_for_disconnect(http_request: Request):
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(DEADLINE_CONFIG["disconnect_poll_s"])
+
+
+async def run_until_deadline(http_request: Request, work, deadline, ticket_id: str):
+    """
+    Awaits `work` (the whole request: triage, lane wait, LLM call) unless
+    the client disconnects or the deadline passes first. Then the work is
+    cancelled, which releases its lane slot right away instead of after an
+    LLM call nobody is waiting for.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(wait_for_disconnect(http_request))
+    timeout = remaining_s(deadline) if deadline is not None else None
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            # Let its finally blocks (slot release) run before we answer
+            await asyncio.gather(task, return_exceptions=True)
+    if task in done:
+        return task.result()
+    if watcher in done:
+        cancel_counts["disconnected"] += 1
+        logger.warning(f"🔌 [Ticket {ticket_id}] Client disconnected, request cancelled")
+        # Nobody reads this; 499 (client closed request) keeps access logs honest
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    cancel_counts["deadline_exceeded"] += 1
+    logger.warning(f"⏰ [Ticket {ticket_id}] Deadline exceeded, request cancelled")
+    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Deadline exceeded")
+
+
+def observe_llm_call(admission: Admission, latency_s: float, failed: bool = False):
+    global llm_call_ewma_s
+    # Upstream latency drives the adaptive lane limit (LANE_LIMIT_MODE)
+    lane_scheduler.observe(admission, latency_s, failed=failed)
+    if not failed:
+        llm_call_ewma_s += 0.1 * (latency_s - llm_call_ewma_s)
+
+
+def record_cancelled_slot(admission: Admission):
+    """
+    Counts a slot given back before its LLM call finished; the time saved is
+    estimated from the average completed LLM call.
+    """
+    held = time.perf_counter() - admission.granted_at
+    cancel_counts["slots_freed"] += 1
+    cancel_counts["slot_seconds_recovered"] += max(0.0, llm_call_ewma_s - held)
+
+
+def lane_for(priority: int) -> str:
+    return "fast" if priority in [1, 2] else "normal"
+
+
+def lane_hint(text: str):
+    """
+    Provisional lane from the cascade's lexical tier (well under a
+    millisecond), or None without one; the gate then checks all lanes.
+    """
+    if ADMISSION_GATE_ENABLED and isinstance(classifier, CascadeClassifier):
+        return lane_for(classifier.guess_priority(text))
+    return None
+
+
+async def acquire_lane(priority: int, ticket_id: str, deadline=None) -> Admission:
+    """
+    Waits (up to the lane deadline, or the request's own if sooner) for a
+    slot in the lane for `priority`, or raises 429 if the request is shed.
+    """
+    lane_key = lane_for(priority)
+    lane = lanes[lane_key]
+    queue_deadline_s = LANE_QUEUE_CONFIG[f"{lane_key}_deadline_s"]
+    if deadline is not None:
+        queue_deadline_s = min(queue_deadline_s, remaining_s(deadline))
+    try:
+        admission = await lane_scheduler.acquire(lane_key, priority, queue_deadline_s)
+    except LaneFull as e:
         logger.warning(
-            f"🚨 [SECURITY_AUDIT] [Ticket {ticket_id}] Prompt Injection Detected! Input: {request.text}"
+            f"⛔ [Ticket {ticket_id}] {lane.label} Full! ({lane.active}/{lane.reserved}, "
+            f"queue {lane.waiting}/{lane.max_queue}, {e.reason})"
         )
-        return ChatResponse(
-            ticket_id=ticket_id,
-            priority=0,
-            label="BLOCKED",
-            wait_time="0.0s",
-            message="Request blocked by security policy (Prompt Injection Detected).",
-            confidence=1.0,
-            pii_detected=False,
-            pii_types=[],
-            intent="malicious",
-            explainability={},
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{lane.label} Full",
+            headers={"Retry-After": "1"},
+        )
+    # The local slot is only half of it: other workers/replicas share the caps
+    deadline_s = queue_deadline_s - admission.waited_s
+    lease_start = time.perf_counter()
+    try:
+        admission.lease = await lane_leases.acquire(cluster_limits(lane), deadline_s)
+    except LaneStateError as e:
+        # LANE_STATE_FAIL_OPEN=off: no shared state, no admission
+        lane_scheduler.release(admission)
+        logger.error(f"❌ [Ticket {ticket_id}] Lane state unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Lane state unavailable",
+            headers={"Retry-After": "1"},
         )
+    except asyncio.CancelledError:
+        lane_scheduler.release(admission)
+        raise
+    if admission.lease is None:
+        lane_scheduler.release(admission)
+        logger.warning(
+            f"⛔ [Ticket {ticket_id}] {lane.label} Full cluster-wide! "
+            f"(local {lane.active}/{lane.reserved})"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{lane.label} Full",
+            headers={"Retry-After": "1"},
+        )
+    admission.waited_s += time.perf_counter() - lease_start
+    logger.info(
+        f"✅ Processing in {lane.label} ({lane.active}/{lane.reserved}"
+        f"{', borrowed slot' if admission.borrowed else ''}, "
+        f"waited {admission.waited_s * 1000:.0f}ms)"
+    )
+    return admission
 
-    # Guardrails 2: PII Masking
-    safe_text, pii_types = mask_pii(request.text)
-    pii_detected = len(pii_types) > 0
 
-    if pii_detected:
-        logger.info(
-            f"🛡️ [SECURITY_AUDIT] [Ticket {ticket_id}] PII Masked: {safe_text} | Types: {pii_types}"
+async def triage_and_admit(request: ChatRequest, ticket_id: str, deadline=None):
+    """
+    Admission gate, triage, then a lane slot. Returns (blocked ChatResponse
+    or None, PiiResult, InferenceResult, Admission or None).
+    """
+    hint = lane_hint(request.text)
+    if not admission_gate.enter(hint):
+        logger.warning(
+            f"🚧 [Ticket {ticket_id}] Overloaded: rejected before triage "
+            f"({admission_gate.in_triage} in triage, no headroom in {hint or 'any lane'})"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Overloaded",
+            headers={"Retry-After": "1"},
         )
+    triage_start = time.perf_counter()
+    try:
+        blocked, pii, result = await triage(request, ticket_id)
+    finally:
+        admission_gate.leave(hint)
+    triage_s = time.perf_counter() - triage_start
+    if blocked is not None:
+        return blocked, pii, result, None
+
+    try:
+        admission = await acquire_lane(result.priority, ticket_id, deadline)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            # Paid for guardrails, NER and classification, then shed anyway
+            admission_gate.record_shed(triage_s)
+        raise
+    return None, pii, result, admission
 
-    # 1. CPU Offloading: Predict
-    intent, priority, confidence, explainability = await loop.run_in_executor(
-        executor, run_inference, safe_text
-    )
 
-    label_map = {1: "CRITICAL", 2: "HIGH", 3: "NORMAL"}
-    label = label_map.get(priority, "NORMAL")
+def release_lane(admission: Admission):
+    lane_leases.release(admission.lease)
+    lane_scheduler.release(admission)
 
-    # 2. Routing Logic...
-    is_fast_lane = priority in [1, 2]
-    lane_limit = (
-        LANE_CONFIG["fast_limit"] if is_fast_lane else LANE_CONFIG["normal_limit"]
+
+def pii_span_models(pii: PiiResult):
+    return [
+        PiiSpan(start=span.start, end=span.end, type=span.detector.pii_type)
+        for span in pii.spans
+    ]
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(
+    request: ChatRequest, http_request: Request, api_key: str = Depends(get_api_key)
+):
+    ticket_id = str(uuid.uuid4())[:8]
+    check_rate_limit(request, api_key, ticket_id)
+    deadline = request_deadline(http_request)
+    return await run_until_deadline(
+        http_request, chat_pipeline(request, ticket_id, deadline), deadline, ticket_id
     )
-    lane_key = "fast_active" if is_fast_lane else "normal_active"
-    lane_name = "FAST LANE" if is_fast_lane else "NORMAL LANE"
 
-    # Check Capacity (Atomic Check)
-    async with state_lock:
-        if lane_state[lane_key] >= lane_limit:
-            logger.warning(
-                f"⛔ [Ticket {ticket_id}] {lane_name} Full! ({lane_state[lane_key]}/{lane_limit})"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"{lane_name} Full",
-            )
-        lane_state[lane_key] += 1
+
+async def chat_pipeline(request: ChatRequest, ticket_id: str, deadline):
+    # 2. Routing Logic (gate -> triage -> lane slot)...
+    blocked, pii, result, admission = await triage_and_admit(request, ticket_id, deadline)
+    if blocked is not None:
+        return blocked
 
     try:
-        logger.info(
-            f"✅ Processing in {lane_name} ({lane_state[lane_key]}/{lane_limit})"
-        )
-        # Simulate Processing
-        llm_response = await simulate_llm_processing(request.text, ticket_id)
+        # LLM call (a borrowed slot may be reclaimed mid-call)
+        llm_start = time.perf_counter()
+        try:
+            llm_response = await run_preemptible(
+                admission,
+                llm_complete(request.text, ticket_id, admission.lane.name, result.intent),
+            )
+        except Preempted:
+            raise
+        except Exception:
+            observe_llm_call(admission, time.perf_counter() - llm_start, failed=True)
+            raise
+        observe_llm_call(admission, time.perf_counter() - llm_start)
 
         # Guardrails 3: Output Filtering
-        if not validate_output(llm_response):
+        output_rule = guardrails.check_output(llm_response)
+        if output_rule:
             logger.error(
-                f"🚨 [SECURITY_AUDIT] [Ticket {ticket_id}] Unsafe Output Blocked!"
+                f"🚨 [SECURITY_AUDIT] [Ticket {ticket_id}] Unsafe Output Blocked! Rule: {output_rule}"
             )
             llm_response = "[Response Redacted by Safety Policy]"
 
         return ChatResponse(
             ticket_id=ticket_id,
-            priority=priority,
-            label=label,
-            wait_time="0.05s",
+            priority=result.priority,
+            label=LANE_LABELS.get(result.priority, "NORMAL"),
+            wait_time=f"{admission.waited_s:.2f}s",
             message=f"{llm_response}",
-            confidence=confidence,
-            pii_detected=pii_detected,
-            pii_types=pii_types,
-            intent=intent,
-            explainability=explainability,
+            confidence=result.confidence,
+            pii_detected=bool(pii.pii_types),
+            pii_types=pii.pii_types,
+            pii_spans=pii_span_models(pii),
+            intent=result.intent,
+            explainability=result.explainability,
+            tier=result.tier,
         )
 
+    except Preempted:
+        logger.warning(f"⚡ [Ticket {ticket_id}] Preempted: borrowed slot reclaimed by FAST LANE")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Preempted by higher-priority traffic",
+            headers={"Retry-After": "1"},
+        )
+    except asyncio.CancelledError:
+        # Disconnect / deadline (run_until_deadline): the LLM call is dropped
+        record_cancelled_slot(admission)
+        raise
+    except (UpstreamError, SimulatedLLMError) as e:
+        logger.error(f"❌ [Ticket {ticket_id}] Upstream LLM failed: {e}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Upstream LLM failed")
     except Exception as e:
         logger.error(f"Error processing ticket {ticket_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     finally:
         # Release Slot
-        async with state_lock:
-            # Prevent negative (just in case)
-            if lane_state[lane_key] > 0:
-                lane_state[lane_key] -= 1
+        release_lane(admission)
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class LaneStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases the request's lane slot when the
+    response ends, however it ends. The generator's own finally is not
+    enough: it never runs if the client is gone before the body starts, and
+    runs only at garbage collection if the stream is abandoned at a yield.
+    """
+
+    def __init__(self, content, admission: Admission, **kwargs):
+        super().__init__(self._track(content), **kwargs)
+        self.admission = admission
+        self.finished = False
+
+    async def _track(self, content):
+        async for chunk in content:
+            yield chunk
+        self.finished = True  # the stream reached its last event
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if not self.finished:
+                cancel_counts["disconnected"] += 1
+                record_cancelled_slot(self.admission)
+            release_lane(self.admission)
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest, http_request: Request, api_key: str = Depends(get_api_key)
+):
+    """
+    Server-Sent Events variant of /chat. Triage (guardrails, PII,
+    classification, lane admission) happens up front, so errors are still
+    plain HTTP status codes; then the stream sends:
+
+    - `meta`: the ChatResponse fields (message empty) as soon as triage is done
+    - `token`: {"text": ...} response chunks that passed the output filter
+    - `blocked`: {"rule", "message"} if an output rule fired (stream ends)
+    - `preempted`: the borrowed slot was reclaimed by the fast lane (stream ends)
+    - `deadline`: X-Deadline-Ms passed mid-stream (stream ends)
+    - `done`: {"ticket_id"} after the last token
+
+    Triage and the lane wait are cancelled on disconnect or deadline like
+    /chat; once streaming, a disconnect ends the response and frees the slot.
+    """
+    ticket_id = str(uuid.uuid4())[:8]
+    check_rate_limit(request, api_key, ticket_id)
+    deadline = request_deadline(http_request)
+
+    blocked, pii, result, admission = await run_until_deadline(
+        http_request, triage_and_admit(request, ticket_id, deadline), deadline, ticket_id
+    )
+    if blocked is not None:
+
+        async def blocked_stream():
+            yield sse_event("meta", blocked.model_dump())
+            yield sse_event("done", {"ticket_id": ticket_id})
+
+        return StreamingResponse(blocked_stream(), media_type="text/event-stream")
+
+    meta = ChatResponse(
+        ticket_id=ticket_id,
+        priority=result.priority,
+        label=LANE_LABELS.get(result.priority, "NORMAL"),
+        wait_time=f"{admission.waited_s:.2f}s",
+        message="",
+        confidence=result.confidence,
+        pii_detected=bool(pii.pii_types),
+        pii_types=pii.pii_types,
+        pii_spans=pii_span_models(pii),
+        intent=result.intent,
+        explainability=result.explainability,
+        tier=result.tier,
+    )
+
+    async def event_stream():
+        output_filter = guardrails.output_stream()
+        llm_start = None
+        try:
+            yield sse_event("meta", meta.model_dump())
+            llm_start = time.perf_counter()
+            chunks = llm_stream(
+                request.text, ticket_id, admission.lane.name, result.intent
+            ).__aiter__()
+            while True:
+                try:
+                    if deadline is None:
+                        chunk = await chunks.__anext__()
+                    else:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), remaining_s(deadline))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    cancel_counts["deadline_exceeded"] += 1
+                    record_cancelled_slot(admission)
+                    logger.warning(f"⏰ [Ticket {ticket_id}] Deadline exceeded mid-stream")
+                    yield sse_event("deadline", {"detail": "Deadline exceeded"})
+                    return
+                if admission.preempted.is_set():
+                    logger.warning(f"⚡ [Ticket {ticket_id}] Stream preempted: slot reclaimed")
+                    yield sse_event("preempted", {"detail": "Preempted by higher-priority traffic"})
+                    return
+                # Guardrails 3: Output Filtering, chunk by chunk
+                safe, output_rule = output_filter.feed(chunk)
+                if safe:
+                    yield sse_event("token", {"text": safe})
+                if output_rule:
+                    logger.error(
+                        f"🚨 [SECURITY_AUDIT] [Ticket {ticket_id}] Unsafe Output Blocked "
+                        f"mid-stream! Rule: {output_rule}"
+                    )
+                    yield sse_event(
+                        "blocked",
+                        {"rule": output_rule, "message": "[Response Redacted by Safety Policy]"},
+                    )
+                    return
+            # Whole-stream duration is the upstream latency sample
+            observe_llm_call(admission, time.perf_counter() - llm_start)
+            rest = output_filter.flush()
+            if rest:
+                yield sse_event("token", {"text": rest})
+            yield sse_event("done", {"ticket_id": ticket_id})
+        except Exception as e:
+            logger.error(f"Error streaming ticket {ticket_id}: {e}")
+            if llm_start is not None:
+                observe_llm_call(admission, time.perf_counter() - llm_start, failed=True)
+            yield sse_event("error", {"detail": "Internal Server Error"})
+        finally:
+            # Release Slot (held for the whole stream)
+            release_lane(admission)
+
+    return LaneStreamingResponse(event_stream(), admission, media_type="text/event-stream")
 
 
 @app.get("/stats")
 async def get_stats():
     return {
-        "model_loaded": model is not None,
-        "fast_lane_usage": f"{lane_state['fast_active']}/{LANE_CONFIG['fast_limit']}",
-        "normal_lane_usage": f"{lane_state['normal_active']}/{LANE_CONFIG['normal_limit']}",
+        "model_loaded": classifier is not None,
+        "fast_lane_usage": f"{lanes['fast'].active}/{lanes['fast'].reserved}",
+        "normal_lane_usage": f"{lanes['normal'].active}/{lanes['normal'].reserved}",
+        "lanes": {
+            **lane_scheduler.snapshot(),
+            "queue": LANE_QUEUE_CONFIG,
+            "scheduler": LANE_SCHEDULER_CONFIG,
+            "limits": LANE_LIMIT_CONFIG,
+            "cluster": await lane_leases.snapshot(),
+        },
+        "llm": llm_client.snapshot() if llm_client is not None else simulator.snapshot(),
+        # Requests cancelled on disconnect/deadline and the slot time saved
+        "cancellation": {
+            **DEADLINE_CONFIG,
+            **cancel_counts,
+            "slot_seconds_recovered": round(cancel_counts["slot_seconds_recovered"], 3),
+        },
+        # Rejected before triage vs. triaged and then shed (wasted inference)
+        "admission_gate": admission_gate.snapshot(),
+        # Per-client rejections, separate from lane 429s above
+        "rate_limit": {
+            **RATE_LIMIT_CONFIG,
+            "user": user_rate_limiter.snapshot(),
+            "api_key": key_rate_limiter.snapshot(),
+        },
+        "inference_pool": POOL_CONFIG,
+        "embedder_backend": EMBEDDER_BACKEND,
+        "cascade": {**CASCADE_CONFIG, "decided_by_tier": tier_counts},
+        "injection_detector": {**INJECTION_CONFIG, **injection_counts},
+        "startup_timings": startup_state["timings"],
+        "inference_batching": {**BATCH_CONFIG, **inference_batcher.snapshot()},
+        "ner_batching": {**NER_CONFIG, **ner_batcher.snapshot()},
+        "ner_backend": NER_BACKEND,
+        "ner_gate": ner_gate.snapshot(),
+        "guardrails": guardrails.snapshot(),
+        "embedding_cache": embedding_cache_stats(),
         "status": "Operational",
     }
@@ -9,6 +9,13 @@ class ChatRequest(BaseModel):
     user_id: Optional[str] = "anonymous"
 
 
+class PiiSpan(BaseModel):
+    # Offsets into the original request text (end exclusive)
+    start: int
+    end: int
+    type: str
+
+
 class ChatResponse(BaseModel):
     ticket_id: str
     priority: int
@@ -18,8 +25,13 @@ class ChatResponse(BaseModel):
     confidence: float
     pii_detected: bool
     pii_types: List[str] = []
+    pii_spans: List[PiiSpan] = []
     intent: str
     explainability: Dict[str, float] = {}
+    # Classifier cascade tier that decided: "lexical" or "bert"
+    tier: str = "bert"
+    # Guardrail rule that blocked the request, if any
+    blocked_rule: Optional[str] = None
 
 
 class ConfigRequest(BaseModel):
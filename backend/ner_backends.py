@@ -0,0 +1,254 @@
+import logging
+import os
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# NER_BACKEND values accepted at startup
+NER_BACKENDS = ("bert", "gazetteer", "tiered")
+GAZETTEER_DIR = os.getenv("GAZETTEER_DIR", "backend/gazetteers")
+# <file name>.txt in GAZETTEER_DIR -> entity group
+GAZETTEER_FILES = {"persons": "PER", "locations": "LOC", "organizations": "ORG"}
+
+
+class NerBackend:
+    """
+    Interface for the NER stage of the PII guard.
+
+    predict_batch(texts) returns one list of entities per text, in the
+    transformers "ner" pipeline format (dicts with entity_group, start, end,
+    word, score), so backend.pii.ner_spans works with any backend.
+    `gated` tells the caller whether the NerGate should be consulted first
+    (worth it for expensive backends only).
+    """
+
+    name = "base"
+    gated = False
+
+    def load(self):
+        return self
+
+    def predict_batch(self, texts) -> List[List[Dict]]:
+        raise NotImplementedError
+
+    def __call__(self, texts):
+        return self.predict_batch(texts)
+
+
+class TransformerNerBackend(NerBackend):
+    """
+    dslim/bert-base-NER through the transformers pipeline (~150 ms/message).
+    """
+
+    name = "bert"
+    gated = True
+
+    def __init__(self, model_name="dslim/bert-base-NER"):
+        self.model_name = model_name
+        self.pipeline = None
+
+    def load(self):
+        if self.pipeline is None:
+            from transformers import pipeline
+
+            self.pipeline = pipeline("ner", model=self.model_name, aggregation_strategy="simple")
+        return self
+
+    def predict_batch(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.pipeline(texts, batch_size=len(texts))
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: every occurrence of every pattern in one
+    left-to-right pass over the text (linear in text length + matches).
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # node -> [(pattern length, label)]
+        self._built = False
+
+    def add(self, pattern: str, label):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), label))
+        self._built = False
+
+    def build(self):
+        # Breadth-first failure links; outputs inherit their fail node's
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter(self, text: str):
+        """
+        Yields (start, end, label) for every match, in order of end position.
+        """
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, label in out[node]:
+                yield i + 1 - length, i + 1, label
+
+
+def _fold(text: str) -> str:
+    # Case-insensitive matching with offsets that stay valid for the original
+    # text ("İ".lower() is two characters)
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower()[0] for ch in text)
+
+
+class GazetteerNerBackend(NerBackend):
+    """
+    Dictionary NER: name, city and company lists compiled into one
+    Aho-Corasick automaton. Case-insensitive, whole words only,
+    leftmost-longest non-overlapping matches. No model, ~1 ms/message.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, directory=GAZETTEER_DIR):
+        self.directory = directory
+        self.automaton = None
+        self.size = 0
+
+    def load(self):
+        if self.automaton is not None:
+            return self
+        automaton = AhoCorasick()
+        for stem, group in GAZETTEER_FILES.items():
+            path = os.path.join(self.directory, f"{stem}.txt")
+            if not os.path.exists(path):
+                logger.warning(f"⚠️ Gazetteer file missing: {path}")
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    term = " ".join(line.split())
+                    if term and not term.startswith("#"):
+                        automaton.add(_fold(term), group)
+                        self.size += 1
+        self.automaton = automaton.build()
+        logger.info(f"✅ Gazetteer NER loaded: {self.size} terms from {self.directory}")
+        return self
+
+    def find(self, text: str) -> List[Dict]:
+        folded = _fold(text)
+        candidates = [
+            (start, end, group)
+            for start, end, group in self.automaton.iter(folded)
+            if (start == 0 or not folded[start - 1].isalnum())
+            and (end == len(folded) or not folded[end].isalnum())
+        ]
+        candidates.sort(key=lambda m: (m[0], m[0] - m[1]))
+
+        entities, last_end = [], 0
+        for start, end, group in candidates:
+            if start >= last_end:
+                entities.append(
+                    {
+                        "entity_group": group,
+                        "start": start,
+                        "end": end,
+                        "word": text[start:end],
+                        "score": 1.0,
+                    }
+                )
+                last_end = end
+        return entities
+
+    def predict_batch(self, texts):
+        return [self.find(text) for text in texts]
+
+
+def _blank(text, entities):
+    # Replaces each (sorted, non-overlapping) entity with spaces
+    parts, pos = [], 0
+    for ent in entities:
+        parts.append(text[pos : ent["start"]])
+        parts.append(" " * (ent["end"] - ent["start"]))
+        pos = ent["end"]
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+class TieredNerBackend(NerBackend):
+    """
+    Gazetteer first, transformer second: the transformer only sees texts
+    that still look like they contain an entity once the gazetteer hits are
+    blanked out (per `gate`, a NerGate). Entities from both tiers are
+    returned; overlaps are resolved downstream by span priority.
+    """
+
+    name = "tiered"
+
+    def __init__(self, first, second, gate=None):
+        self.first = first
+        self.second = second
+        self.gate = gate
+
+    def load(self):
+        self.first.load()
+        self.second.load()
+        return self
+
+    def predict_batch(self, texts):
+        texts = list(texts)
+        results = self.first.predict_batch(texts)
+
+        escalate = []
+        for i, (text, entities) in enumerate(zip(texts, results)):
+            if self.gate is None or self.gate.should_run(_blank(text, entities)):
+                escalate.append(i)
+
+        if escalate:
+            second = self.second.predict_batch([texts[i] for i in escalate])
+            for i, entities in zip(escalate, second):
+                results[i] = results[i] + list(entities)
+        return results
+
+
+def make_ner_backend(kind="bert", gate=None, gazetteer_dir=GAZETTEER_DIR):
+    """
+    Builds the NER backend for NER_BACKEND (bert | gazetteer | tiered).
+    Call .load() before use.
+    """
+    if kind == "bert":
+        return TransformerNerBackend()
+    if kind == "gazetteer":
+        return GazetteerNerBackend(gazetteer_dir)
+    if kind == "tiered":
+        return TieredNerBackend(GazetteerNerBackend(gazetteer_dir), TransformerNerBackend(), gate)
+    raise ValueError(f"Unknown NER backend '{kind}', expected one of {NER_BACKENDS}")
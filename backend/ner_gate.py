@@ -0,0 +1,118 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# NER_GATE values accepted at startup
+NER_GATE_MODES = ("off", "conservative", "aggressive")
+
+# Mask tokens left by the regex stage ("[EMAIL]", "[ID_NUMBER]", ...)
+_MASK_TOKEN = re.compile(r"\[[A-Z_]+\]")
+# Letter-only words, allowing inner apostrophes/hyphens (O'Brien, Jean-Luc)
+_WORD = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+
+# Capitalized words that start customer-support sentences (or are shouted)
+# without being names. Only the aggressive mode ignores them.
+COMMON_CAPITALIZED = frozenset(
+    """
+    a about after also am an and any anyone are as asap at be because been before
+    but by can cannot could dear did do does dont emergency even every for from
+    good great hello help hey hi how however i if im in is it its ive just last
+    let me my need next no not now of ok okay on or our please pls so someone
+    somebody sorry still thank thanks that the then there these this today
+    tomorrow too urgent we what when where which who why will with would yes yet
+    yesterday you your
+    """.split()
+)
+
+# dslim/bert-base-NER is cased and rarely tags lowercase text, but a few very
+# common names/places are worth a pass even when typed in lowercase.
+GAZETTEER = frozenset(
+    """
+    amsterdam ankara athens bangkok barcelona beijing berlin boston brussels
+    cairo chicago delhi dubai dublin frankfurt hamburg istanbul izmir jakarta
+    lisbon london madrid manchester milan moscow mumbai munich
+    paris prague rome seoul shanghai singapore stockholm
+    sydney tokyo toronto vienna warsaw zurich
+    amazon apple google microsoft paypal visa mastercard
+    ahmed ali anna david emily emma fatma james john maria mary mehmet michael
+    mohammed robert sarah
+    """.split()
+) | {"new york", "los angeles", "san francisco"}
+
+
+def _is_pronoun_i(word):
+    return word == "I" or word.startswith(("I'", "I’"))
+
+
+class NerGate:
+    """
+    Cheap per-request decision whether the BERT NER pass can find anything.
+
+    conservative: skip only text with no capitalized word (besides "I") and
+                  no gazetteer hit - e.g. "thanks", "where is my order".
+    aggressive:   additionally ignore capitalized common words
+                  (greetings, pronouns, question words: "Hello, can you
+                  help?" is skipped).
+    off:          always run NER.
+    """
+
+    def __init__(self, mode="conservative", gazetteer=GAZETTEER):
+        if mode not in NER_GATE_MODES:
+            raise ValueError(f"Unknown NER gate mode '{mode}', expected one of {NER_GATE_MODES}")
+        self.mode = mode
+        self.gazetteer = gazetteer
+        self.stats = {"executed": 0, "skipped": 0}
+
+    def should_run(self, text: str) -> bool:
+        run = self.decide(text)
+        self.stats["executed" if run else "skipped"] += 1
+        return run
+
+    def decide(self, text: str) -> bool:
+        """
+        Same decision as should_run, without touching the counters.
+        """
+        if self.mode == "off":
+            return True
+
+        text = _MASK_TOKEN.sub(" ", text)
+        previous = None
+        for m in _WORD.finditer(text):
+            word = m.group()
+            lower = word.lower()
+            if lower in self.gazetteer or (
+                previous is not None and f"{previous} {lower}" in self.gazetteer
+            ):
+                return True
+            previous = lower
+
+            if not word[0].isupper() or _is_pronoun_i(word):
+                continue
+            if self.mode == "conservative":
+                return True
+            # aggressive: names are rarely common words, even when capitalized
+            if lower.replace("'", "").replace("’", "") not in COMMON_CAPITALIZED:
+                return True
+        return False
+
+    def snapshot(self):
+        total = self.stats["executed"] + self.stats["skipped"]
+        return {
+            "mode": self.mode,
+            **self.stats,
+            "skip_rate": round(self.stats["skipped"] / total, 4) if total else 0.0,
+        }
+
+
+def load_gazetteer(path=None):
+    """
+    Built-in gazetteer, extended with one term (one or two words) per line
+    from `path`.
+    """
+    if not path:
+        return GAZETTEER
+    with open(path, encoding="utf-8") as f:
+        extra = {line.strip().lower() for line in f if line.strip() and not line.startswith("#")}
+    logger.info(f"📖 NER gate gazetteer: {len(extra)} extra terms from {path}")
+    return GAZETTEER | extra
@@ -0,0 +1,247 @@
+import re
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional, Pattern, Tuple
+
+
+class Detector(NamedTuple):
+    name: str
+    pii_type: str
+    token: str
+    pattern: Optional[Pattern]
+    # Lower wins when two detectors claim overlapping text
+    priority: int = 0
+    # Cheap pattern every match must contain; absent from the text = skip
+    prefilter: Optional[Pattern] = None
+    # If set, every match contains a prefilter hit starting at most `lead`
+    # chars after the match start, so the full pattern is only tried from
+    # there (needs a pattern without \b / lookbehind at its start)
+    lead: Optional[int] = None
+
+
+class Span(NamedTuple):
+    start: int
+    end: int
+    detector: Detector
+
+
+class PiiResult(NamedTuple):
+    masked: str
+    pii_types: List[str]
+    # Resolved spans, in original-text coordinates
+    spans: List[Span]
+
+
+# Structured detectors in precedence order: when two detectors could claim
+# overlapping text, the earlier one wins (same order the old regex chain ran).
+# Each is compiled once at import.
+STRUCTURED_DETECTORS = [
+    Detector(
+        "email", "EMAIL", "[EMAIL]", re.compile(r"[\w\.-]+@[\w\.-]+\.\w+"), 0, re.compile("@")
+    ),
+    # Strict Phone (Formatted) - e.g. 555-0199-8888, (555) 123-4567
+    # Requires at least one separator to distinguish from long numbers
+    Detector(
+        "phone",
+        "PHONE",
+        "[PHONE]",
+        re.compile(r"(?:\+?\d{1,3})?[-.\s]?\(?\d{3}\)?[-.\s]+\d{3,4}[-.\s]+\d{4}"),
+        1,
+        # The mandatory core, without the optional prefix ("+ddd", a
+        # separator and "(", 6 chars at most) that makes the full pattern
+        # try several paths at every digit
+        re.compile(r"\d{3}\)?[-.\s]+\d{3,4}[-.\s]+\d{4}"),
+        6,
+    ),
+    # Special Credit Card (User's specific "12312 12312" format)
+    Detector("card_split", "CREDIT_CARD", "[CREDIT_CARD]", re.compile(r"\b\d{5} \d{5}\b"), 2),
+    # Standard Credit Card (13-19 digits). Same matches as the old
+    # \b(?:\d[ -]*?){13,19}\b: separators are only ever crossed before the
+    # 13th digit, so this form has a single path and never backtracks.
+    Detector(
+        "card", "CREDIT_CARD", "[CREDIT_CARD]", re.compile(r"\b(?:\d[ -]*){12}\d{1,7}\b"), 3
+    ),
+    # National ID (11 digits, continuous) - e.g. TCKN
+    Detector("national_id", "ID_NUMBER", "[ID_NUMBER]", re.compile(r"\b\d{11}\b"), 4),
+]
+
+# Context-aware fallbacks: keyword + up to 20 non-digit chars + number.
+# Only the number (group 1) is masked. They see the text with earlier
+# detections masked, as the old chain did (e.g. "[PHONE] or 1234567").
+CONTEXT_DETECTORS = [
+    Detector(
+        "context_id",
+        "ID_NUMBER",
+        "[ID_NUMBER]",
+        re.compile(
+            r"(?i)\b(?:id|identification|tckn|passport|no|number)\b(?:[^0-9]{0,20})?(\d{5,})\b"
+        ),
+        5,
+    ),
+    Detector(
+        "context_phone",
+        "PHONE",
+        "[PHONE]",
+        re.compile(r"(?i)\b(?:phone|call|mobile|cell|contact)\b(?:[^0-9]{0,20})?(\d{6,})\b"),
+        6,
+    ),
+]
+
+# NER entity groups (dslim/bert-base-NER) -> detector. Regex detections win
+# over NER when they overlap.
+NER_DETECTORS = {
+    "PER": Detector("ner_person", "PERSON", "[PERSON]", None, 10),
+    "LOC": Detector("ner_location", "LOCATION", "[LOCATION]", None, 11),
+    "ORG": Detector("ner_org", "ORGANIZATION", "[ORG]", None, 12),
+}
+
+# Single prefilter pass: every regex detector needs a digit or an "@"
+_CANDIDATE = re.compile(r"[\d@]")
+_CONTEXT_CANDIDATE = re.compile(r"\d{5}")
+
+
+def render(text: str, spans: List[Span]) -> str:
+    """
+    Builds the masked string in one go from sorted, non-overlapping spans.
+    """
+    parts = []
+    pos = 0
+    for span in spans:
+        parts.append(text[pos : span.start])
+        parts.append(span.detector.token)
+        pos = span.end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _shift_table(spans: List[Span]):
+    """
+    Masked-text offset where each gap starts, and its shift vs. the original.
+    """
+    gap_starts, shifts = [0], [0]
+    shift = 0
+    for span in spans:
+        shift += len(span.detector.token) - (span.end - span.start)
+        gap_starts.append(span.end + shift)
+        shifts.append(shift)
+    return gap_starts, shifts
+
+
+def _finditer(detector: Detector, text: str):
+    """
+    detector.pattern.finditer(text), skipping text the prefilter rules out.
+    """
+    if detector.prefilter is None:
+        yield from detector.pattern.finditer(text)
+        return
+    if detector.lead is None:
+        if detector.prefilter.search(text):
+            yield from detector.pattern.finditer(text)
+        return
+    pos = 0
+    while True:
+        hit = detector.prefilter.search(text, pos)
+        if hit is None:
+            return
+        m = detector.pattern.search(text, max(pos, hit.start() - detector.lead))
+        if m is None:
+            return
+        yield m
+        pos = m.end()
+
+
+def find_regex_spans(text: str) -> List[Span]:
+    """
+    Returns non-overlapping regex PII spans in original-text coordinates.
+
+    Like the old chain, each detector (in precedence order) scans the text
+    with earlier detections masked, in one finditer over one string; the
+    masked view is only re-rendered after a detector that fired. The part a
+    detector masks (the whole match, or just the number for the context
+    fallbacks) is mapped back to the original text exactly. Email runs
+    first, on the unmasked text; every later masked part is digits and
+    separators, which never occur inside a mask token, so it lies within
+    one unmasked gap.
+    """
+    if not _CANDIDATE.search(text):
+        return []
+
+    spans: List[Span] = []
+    masked, gap_starts, shifts = text, [0], [0]
+    for detector in STRUCTURED_DETECTORS + CONTEXT_DETECTORS:
+        if detector in CONTEXT_DETECTORS and not _CONTEXT_CANDIDATE.search(masked):
+            break
+        group = 1 if detector.pattern.groups else 0
+        found = []
+        for m in _finditer(detector, masked):
+            start, end = m.span(group)
+            shift = shifts[bisect_right(gap_starts, start) - 1]
+            found.append(Span(start - shift, end - shift, detector))
+        if found:
+            spans = sorted(spans + found)
+            masked = render(text, spans)
+            gap_starts, shifts = _shift_table(spans)
+    return spans
+
+
+def ner_spans(entities) -> List[Span]:
+    """
+    Converts NER pipeline entities (found on the original text) to spans.
+    Entity types other than PER/LOC/ORG are ignored.
+    """
+    spans = []
+    for ent in entities:
+        entity_type = (
+            ent.get("entity_group", ent.get("entity", "")).replace("B-", "").replace("I-", "")
+        )
+        detector = NER_DETECTORS.get(entity_type)
+        if detector is not None and ent["end"] > ent["start"]:
+            spans.append(Span(int(ent["start"]), int(ent["end"]), detector))
+    return spans
+
+
+def resolve_spans(spans: List[Span]) -> List[Span]:
+    """
+    Merges possibly overlapping spans from several detectors: spans are taken
+    by priority (then position) and dropped if they overlap one already
+    taken. Returns the kept spans sorted by start.
+    """
+    kept_starts, kept = [], []
+    for span in sorted(spans, key=lambda s: (s.detector.priority, s.start, -s.end)):
+        i = bisect_right(kept_starts, span.start)
+        if i > 0 and kept[i - 1].end > span.start:
+            continue
+        if i < len(kept) and kept[i].start < span.end:
+            continue
+        kept_starts.insert(i, span.start)
+        kept.insert(i, span)
+    return kept
+
+
+def mask_spans(text: str, spans: List[Span]) -> PiiResult:
+    """
+    Resolves `spans` and builds the masked text in a single pass.
+    pii_types: one entry per regex detector that fired, in precedence order
+    (as before), then each NER type once, in order of appearance.
+    """
+    resolved = resolve_spans(spans)
+    fired = {span.detector.name for span in resolved}
+
+    pii_types = [
+        d.pii_type for d in STRUCTURED_DETECTORS + CONTEXT_DETECTORS if d.name in fired
+    ]
+    for span in resolved:
+        if span.detector.pattern is None and span.detector.pii_type not in pii_types:
+            pii_types.append(span.detector.pii_type)
+
+    masked = render(text, resolved) if resolved else text
+    return PiiResult(masked, pii_types, resolved)
+
+
+def mask_structured_pii(text: str) -> Tuple[str, List[str]]:
+    """
+    Regex layer of the PII guard (email, phone, card, national ID and the
+    context-aware ID/phone fallbacks).
+    Returns: (masked_text, pii_types_list)
+    """
+    result = mask_spans(text, find_regex_spans(text))
+    return result.masked, result.pii_types
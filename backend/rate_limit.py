@@ -0,0 +1,89 @@
+"""
+Per-client token-bucket rate limiting (per user_id, per API key).
+
+Buckets live in one bounded LRU table keyed by a 64-bit digest of the
+client id, so memory stays flat however many distinct ids show up. Each
+entry is a single float, the time at which the bucket will be full again
+(GCRA form of a token bucket): tokens = burst - (full_at - now) x rate.
+
+- An entry whose bucket is full again is identical to a missing one, so
+  those are dropped from the cold end on every check (exact, no limit is
+  loosened).
+- If the table is still over `max_keys`, the least recently seen entry is
+  evicted anyway (counted; that client starts again with a full bucket).
+
+Runs on the event loop only, so no locks are needed.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = float(rate)  # tokens per second
+        self.burst = float(burst)  # bucket size
+        self.max_keys = int(max_keys)
+        self._buckets = OrderedDict()  # digest -> full_at, least recently seen first
+        self.allowed = 0
+        self.limited = 0
+        self.idle_evictions = 0
+        self.lru_evictions = 0
+
+    @staticmethod
+    def make_key(client_id: str) -> int:
+        return int.from_bytes(hashlib.blake2b(client_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def allow(self, client_id: str, cost: float = 1.0, now: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        Takes `cost` tokens from the client's bucket. Returns (allowed,
+        seconds until that many tokens are available again).
+        """
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+        if self.rate <= 0:
+            self.limited += 1
+            return False, float("inf")
+        key = self.make_key(client_id)
+        full_at = max(now, self._buckets.pop(key, now))
+        tokens = self.burst - (full_at - now) * self.rate
+
+        if tokens >= cost:
+            full_at += cost / self.rate
+            allowed, retry_after = True, 0.0
+            self.allowed += 1
+        else:
+            allowed, retry_after = False, (cost - tokens) / self.rate
+            self.limited += 1
+
+        self._buckets[key] = full_at  # most recently seen at the end
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.lru_evictions += 1
+        return allowed, retry_after
+
+    def _evict_idle(self, now: float):
+        # Least recently seen first: stop at the first bucket not yet full.
+        # (full_at isn't sorted, so a few full ones may linger behind it.)
+        while self._buckets:
+            key = next(iter(self._buckets))
+            if self._buckets[key] > now:
+                break
+            del self._buckets[key]
+            self.idle_evictions += 1
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def snapshot(self):
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "tracked_keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "idle_evictions": self.idle_evictions,
+            "lru_evictions": self.lru_evictions,
+        }
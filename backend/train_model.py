@@ -1,7 +1,8 @@
-import pandas as pd
+import numpy as np
 import joblib
-from datasets import load_dataset
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, accuracy_score
 from sentence_transformers import SentenceTransformer
@@ -10,29 +11,102 @@ from sklearn.base import BaseEstimator, TransformerMixin
 
 # Define BertEmbedder class at module level so it can be pickled/unpickled
 class BertEmbedder(BaseEstimator, TransformerMixin):
+    # Optional EmbeddingCache attached by the serving process (never pickled)
+    cache = None
+
     def __init__(self, model_name="all-MiniLM-L6-v2"):
         self.model_name = model_name
         self.model = None
 
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("cache", None)
+        return state
+
+    @property
+    def cache_namespace(self):
+        # Embeddings from different models/backends must never share entries
+        return self.model_name
+
     def fit(self, X, y=None):
         print("📥 Loading BERT Model for Embedding...")
         self.model = SentenceTransformer(self.model_name)
         return self
 
-    def transform(self, X):
-        # logging.info("🧠 Generating BERT Embeddings...")
+    def load(self):
+        # Eagerly build the encoder instead of on the first transform() call
         if self.model is None:
             self.model = SentenceTransformer(self.model_name)
+        return self
 
+    def transform(self, X):
         # Handle different input types (Pandas Series vs List)
         if hasattr(X, "tolist"):
             texts = X.tolist()
         else:
-            texts = X
+            texts = list(X)
 
+        if self.cache is None or not texts:
+            return self._encode(texts)
+
+        # Serve repeated texts from the cache, encode only the misses
+        vectors = self.cache.get_many(self.cache_namespace, texts)
+        misses = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if misses:
+            encoded = self._encode(misses)
+            self.cache.put_many(self.cache_namespace, misses, encoded)
+            fresh = dict(zip(misses, encoded))
+            vectors = [fresh[t] if v is None else v for t, v in zip(texts, vectors)]
+
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    def _encode(self, texts):
+        # logging.info("🧠 Generating BERT Embeddings...")
+        self.load()
         return self.model.encode(texts, show_progress_bar=False)
 
 
+def build_lexical_pipeline():
+    # Cascade tier 1: word uni/bi-grams hashed into a fixed space (no vocabulary
+    # to store) + a linear head. Microseconds per request, no transformer.
+    return Pipeline(
+        [
+            (
+                "hash",
+                HashingVectorizer(
+                    n_features=2**16, ngram_range=(1, 2), alternate_sign=False, norm="l2"
+                ),
+            ),
+            ("clf", LogisticRegression(max_iter=1000, class_weight="balanced", C=10.0)),
+        ]
+    )
+
+
+def cascade_report(y_true, lexical_probs, lexical_classes, bert_pred, thresholds):
+    """
+    Prints per-tier accuracy and the share of traffic each tier would decide
+    for a range of cascade confidence thresholds.
+    """
+    y_true = np.asarray(y_true)
+    bert_pred = np.asarray(bert_pred)
+    lexical_pred = np.asarray(lexical_classes)[lexical_probs.argmax(axis=1)]
+    lexical_conf = lexical_probs.max(axis=1)
+
+    print(f"Lexical tier alone: {accuracy_score(y_true, lexical_pred):.4f}")
+    print(f"BERT tier alone:    {accuracy_score(y_true, bert_pred):.4f}")
+    print(f"{'threshold':>9} {'lexical share':>14} {'lexical acc':>12} {'bert acc':>9} {'cascade acc':>12}")
+    for threshold in thresholds:
+        answered = lexical_conf >= threshold
+        share = answered.mean()
+        lex_acc = (lexical_pred[answered] == y_true[answered]).mean() if answered.any() else float("nan")
+        bert_acc = (bert_pred[~answered] == y_true[~answered]).mean() if (~answered).any() else float("nan")
+        cascade_pred = np.where(answered, lexical_pred, bert_pred)
+        print(
+            f"{threshold:>9.2f} {share:>13.1%} {lex_acc:>12.4f} {bert_acc:>9.4f} "
+            f"{accuracy_score(y_true, cascade_pred):>12.4f}"
+        )
+
+
 def map_priority(intent):
     # CRITICAL: Money related, complaints
     if intent in [
@@ -60,6 +134,14 @@ def map_priority(intent):
 
 
 if __name__ == "__main__":
+    # Training-only dependencies: kept out of module scope so the gateway can
+    # import BertEmbedder without paying for pandas/datasets at startup
+    import pandas as pd
+    from datasets import load_dataset
+
+    from backend.artifact import save_artifact
+    from backend.injection import InjectionDetector
+
     # 1. Load Dataset
     print("📥 Loading Bitext Customer Support Dataset...")
     dataset = load_dataset(
@@ -199,7 +281,41 @@ if __name__ == "__main__":
     print("\nClassification Report:")
     print(classification_report(y, y_pred))
 
-    # 6. Save Model
+    # 6. Cascade tier 1 (lexical). Its report uses a held-out split; the BERT
+    # column uses the final model, which saw that split, so it is optimistic.
+    print("\n⚡ Training Lexical Cascade Tier (HashingVectorizer + Logistic Regression)...")
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42
+    )
+    lexical_eval = build_lexical_pipeline().fit(X_train, y_train)
+    print("\n📊 Cascade Evaluation (held-out 20%):")
+    cascade_report(
+        y_test,
+        lexical_eval.predict_proba(X_test),
+        lexical_eval.classes_,
+        pipeline.predict(X_test),
+        thresholds=[0.5, 0.7, 0.8, 0.9, 0.95, 0.99],
+    )
+    lexical = build_lexical_pipeline().fit(X, y)
+
+    # 7. Semantic injection detector: known-attack embedding bank, threshold
+    # calibrated so (almost) no legitimate support message reaches it
+    print("\n🛡️  Building Injection Detector (known-attack embedding bank)...")
+    embedder = pipeline.steps[0][1]
+    injection = InjectionDetector.from_examples(embedder)
+    benign = X.drop_duplicates().sample(n=min(5000, X.nunique()), random_state=42)
+    benign_embeddings = embedder.transform(benign)
+    threshold = injection.calibrate(benign_embeddings)
+    flagged = (injection.scores(benign_embeddings) >= threshold).mean()
+    print(f"Threshold: {threshold:.3f} (benign messages flagged: {flagged:.2%})")
+
+    # 8. Save Model
     model_path = "backend/urgency_model.joblib"
     joblib.dump(pipeline, model_path)
     print(f"\n✅ Model saved to {model_path}")
+
+    # Split artifact used by the gateway (mmapped head, embedder by name)
+    artifact_dir = save_artifact(
+        pipeline, "backend/urgency_model", lexical=lexical, injection=injection
+    )
+    print(f"✅ Artifact saved to {artifact_dir}")
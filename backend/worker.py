@@ -1,18 +1,310 @@
 import asyncio
+import json
 import logging
+import math
+import os
+import random
+import re
+from typing import NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# Simulated LLM timing: time to first token, then the rest spread over tokens
+LLM_FIRST_TOKEN_S = float(os.getenv("LLM_FIRST_TOKEN_S", "0.3"))
+LLM_TOTAL_S = 2.5
 
-async def simulate_llm_processing(text: str, ticket_id: str):
+# LLM_SIM_CONFIG: path to (or inline) JSON with simulator profiles, see
+# LLMSimulator.from_config; unset = every call takes LLM_TOTAL_S.
+# LLM_SIM_SEED makes the draws reproducible.
+LLM_SIM_CONFIG = os.getenv("LLM_SIM_CONFIG", "")
+LLM_SIM_SEED = os.getenv("LLM_SIM_SEED", "")
+
+
+class SimulatedLLMError(Exception):
+    """
+    Injected upstream failure: `kind` is "error" (the provider answered
+    with an error) or "timeout" (it never answered within `timeout_s`).
+    """
+
+    def __init__(self, kind: str, after_s: float):
+        super().__init__(f"simulated LLM {kind} after {after_s:.2f}s")
+        self.kind = kind
+        self.after_s = after_s
+
+
+class SimDraw(NamedTuple):
+    # What the call would take if it succeeded
+    latency_s: float
+    # None, "error" or "timeout"
+    failure: Optional[str]
+    # How long the call actually runs before it returns or fails
+    held_s: float
+
+
+class FixedLatency:
+    def __init__(self, s: float = LLM_TOTAL_S):
+        self.s = s
+
+    def sample(self, rng: random.Random) -> float:
+        return self.s
+
+    def describe(self):
+        return {"dist": "fixed", "s": self.s}
+
+
+class LognormalLatency:
+    """
+    Heavy right tail: `median_s` at the middle, `sigma` (of the log) sets
+    how long the tail is (0.5 -> p99 ~3.2x median, 1.0 -> ~10x).
+    """
+
+    def __init__(self, median_s: float, sigma: float = 0.5):
+        self.median_s = median_s
+        self.sigma = sigma
+
+    def sample(self, rng):
+        return rng.lognormvariate(math.log(self.median_s), self.sigma)
+
+    def describe(self):
+        return {"dist": "lognormal", "median_s": self.median_s, "sigma": self.sigma}
+
+
+class BimodalLatency:
+    """
+    Two populations (e.g. cache hits vs. long generations): `slow_share`
+    of calls around `slow_s`, the rest around `fast_s`, each with lognormal
+    jitter `sigma`.
+    """
+
+    def __init__(self, fast_s: float, slow_s: float, slow_share: float = 0.1, sigma: float = 0.1):
+        self.fast_s = fast_s
+        self.slow_s = slow_s
+        self.slow_share = slow_share
+        self.sigma = sigma
+
+    def sample(self, rng):
+        mode = self.slow_s if rng.random() < self.slow_share else self.fast_s
+        return rng.lognormvariate(math.log(mode), self.sigma)
+
+    def describe(self):
+        return {
+            "dist": "bimodal",
+            "fast_s": self.fast_s,
+            "slow_s": self.slow_s,
+            "slow_share": self.slow_share,
+            "sigma": self.sigma,
+        }
+
+
+class HistogramLatency:
+    """
+    Replays an observed latency histogram: `buckets` is [[upper_s, count],
+    ...] in increasing order; a bucket is drawn by count, then a uniform
+    value between the previous bound and its own.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted((float(upper), float(count)) for upper, count in buckets)
+        self._weights = [count for _, count in self.buckets]
+
+    def sample(self, rng):
+        i = rng.choices(range(len(self.buckets)), weights=self._weights)[0]
+        low = self.buckets[i - 1][0] if i else 0.0
+        return rng.uniform(low, self.buckets[i][0])
+
+    def describe(self):
+        return {"dist": "histogram", "buckets": [list(b) for b in self.buckets]}
+
+
+LATENCY_DISTS = {
+    "fixed": FixedLatency,
+    "lognormal": LognormalLatency,
+    "bimodal": BimodalLatency,
+    "histogram": HistogramLatency,
+}
+
+
+def make_latency(spec: dict):
+    """
+    {"dist": "lognormal", "median_s": 2.0, "sigma": 0.6}, etc. A histogram
+    may give "path" to a JSON file holding its bucket list instead.
+    """
+    spec = dict(spec)
+    dist = spec.pop("dist", "fixed")
+    if dist not in LATENCY_DISTS:
+        raise ValueError(f"Unknown latency dist '{dist}', expected one of {list(LATENCY_DISTS)}")
+    if dist == "histogram" and "path" in spec:
+        with open(spec.pop("path")) as f:
+            spec["buckets"] = json.load(f)
+    return LATENCY_DISTS[dist](**spec)
+
+
+class SimProfile:
+    """
+    How one class of calls behaves: a latency distribution plus injected
+    failure rates. A timeout hangs for `timeout_s` (the client's read
+    timeout) and fails; an error fails partway through the call.
+    """
+
+    def __init__(self, name, latency, error_rate=0.0, timeout_rate=0.0, timeout_s=30.0):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+        self.stats = {"calls": 0, "errors": 0, "timeouts": 0, "total_s": 0.0}
+
+    @classmethod
+    def from_dict(cls, name, spec: dict):
+        return cls(
+            name,
+            make_latency(spec.get("latency", {"dist": "fixed", "s": LLM_TOTAL_S})),
+            error_rate=spec.get("error_rate", 0.0),
+            timeout_rate=spec.get("timeout_rate", 0.0),
+            timeout_s=spec.get("timeout_s", 30.0),
+        )
+
+    def draw(self, rng) -> SimDraw:
+        latency = self.latency.sample(rng)
+        u = rng.random()
+        if u < self.timeout_rate:
+            failure, held = "timeout", self.timeout_s
+        elif u < self.timeout_rate + self.error_rate:
+            failure, held = "error", latency * rng.random()
+        else:
+            failure, held = None, latency
+        self.stats["calls"] += 1
+        self.stats["total_s"] += held
+        if failure:
+            self.stats[f"{failure}s"] += 1
+        return SimDraw(latency, failure, held)
+
+    def snapshot(self):
+        calls = self.stats["calls"]
+        return {
+            **self.latency.describe(),
+            "error_rate": self.error_rate,
+            "timeout_rate": self.timeout_rate,
+            "timeout_s": self.timeout_s,
+            **{k: v for k, v in self.stats.items() if k != "total_s"},
+            "avg_s": round(self.stats["total_s"] / calls, 3) if calls else 0.0,
+        }
+
+
+class LLMSimulator:
+    """
+    Picks a profile per call (intent profile, else lane profile, else the
+    default) and draws its latency/failure from one seeded RNG, so a
+    single-loop benchmark replays the same sequence for the same seed.
+    """
+
+    def __init__(self, default: SimProfile, lanes=None, intents=None, seed=None):
+        self.default = default
+        self.lanes = lanes or {}
+        self.intents = intents or {}
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, config: dict, seed=None):
+        """
+        {
+          "seed": 7,
+          "default": {"latency": {"dist": "lognormal", "median_s": 2.0, "sigma": 0.6},
+                      "error_rate": 0.01, "timeout_rate": 0.002, "timeout_s": 30},
+          "lanes": {"fast": {...}},
+          "intents": {"fraud_report": {...}}
+        }
+        """
+        return cls(
+            SimProfile.from_dict("default", config.get("default", {})),
+            lanes={k: SimProfile.from_dict(f"lane:{k}", v) for k, v in config.get("lanes", {}).items()},
+            intents={
+                k: SimProfile.from_dict(f"intent:{k}", v) for k, v in config.get("intents", {}).items()
+            },
+            seed=seed if seed is not None else config.get("seed"),
+        )
+
+    @classmethod
+    def from_env(cls):
+        seed = int(LLM_SIM_SEED) if LLM_SIM_SEED else None
+        if not LLM_SIM_CONFIG:
+            return cls(SimProfile("default", FixedLatency(LLM_TOTAL_S)), seed=seed)
+        if LLM_SIM_CONFIG.lstrip().startswith("{"):
+            config = json.loads(LLM_SIM_CONFIG)
+        else:
+            with open(LLM_SIM_CONFIG) as f:
+                config = json.load(f)
+        logger.info(f"🎲 LLM simulator profiles loaded from {LLM_SIM_CONFIG[:60]}")
+        return cls.from_config(config, seed)
+
+    def profile(self, lane=None, intent=None) -> SimProfile:
+        return self.intents.get(intent) or self.lanes.get(lane) or self.default
+
+    def draw(self, lane=None, intent=None) -> SimDraw:
+        return self.profile(lane, intent).draw(self.rng)
+
+    def snapshot(self):
+        return {
+            "backend": "simulated",
+            "seed": self.seed,
+            "default": self.default.snapshot(),
+            "lanes": {k: p.snapshot() for k, p in self.lanes.items()},
+            "intents": {k: p.snapshot() for k, p in self.intents.items()},
+        }
+
+
+simulator = LLMSimulator.from_env()
+
+
+async def stream_llm_processing(text: str, ticket_id: str, lane=None, intent=None):
+    """
+    Simulates a streaming LLM call: yields the response a token (word plus
+    trailing whitespace) at a time. Same total latency as the blocking call;
+    the first token comes after the same share of it as LLM_FIRST_TOKEN_S
+    is of LLM_TOTAL_S. An injected error cuts the stream where it happens;
+    a timeout yields nothing.
+    """
+    logger.info(f"🤖 [Ticket {ticket_id}] Sending to LLM (streaming)...")
+
+    draw = simulator.draw(lane, intent)
+    if draw.failure == "timeout":
+        await asyncio.sleep(draw.held_s)
+        raise SimulatedLLMError(draw.failure, draw.held_s)
+
+    response = f"Response to: {text[:20]}..."
+    tokens = re.findall(r"\S+\s*", response) or [response]
+    first_s = draw.latency_s * min(1.0, LLM_FIRST_TOKEN_S / LLM_TOTAL_S)
+    per_token = max(0.0, draw.latency_s - first_s) / len(tokens)
+
+    elapsed = 0.0
+    for i, token in enumerate(tokens):
+        step = first_s if i == 0 else per_token
+        if draw.failure and elapsed + step > draw.held_s:
+            await asyncio.sleep(draw.held_s - elapsed)
+            raise SimulatedLLMError(draw.failure, draw.held_s)
+        await asyncio.sleep(step)
+        elapsed += step
+        yield token
+    if draw.failure:
+        # Failed after the last token, before the stream completed
+        await asyncio.sleep(max(0.0, draw.held_s - elapsed))
+        raise SimulatedLLMError(draw.failure, draw.held_s)
+
+
+async def simulate_llm_processing(text: str, ticket_id: str, lane=None, intent=None):
     """
     Simulates calling an external LLM (e.g. OpenAI/Gemini).
     This is an I/O bound operation, so asyncio.sleep is appropriate.
+    Latency and failures come from the simulator profile for the lane/intent.
     """
     logger.info(f"🤖 [Ticket {ticket_id}] Sending to LLM...")
 
     # Simulate network latency and processing time
-    # In a real app, this would be: response = await client.post(...)
-    await asyncio.sleep(2.5)
+    # (LLM_BACKEND=http sends real calls through backend/llm_client.py)
+    draw = simulator.draw(lane, intent)
+    await asyncio.sleep(draw.held_s)
+    if draw.failure:
+        raise SimulatedLLMError(draw.failure, draw.held_s)
 
     return f"Response to: {text[:20]}..."
@@ -0,0 +1,64 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+POOL_KINDS = ("thread", "process")
+
+
+def default_torch_threads(workers: int) -> int:
+    # Split the cores evenly so N workers x T threads never oversubscribes the box
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_inference_worker(torch_threads: int):
+    """
+    Runs once in every worker thread/process before it takes work.
+    """
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+        # Inter-op parallelism can only be set before any parallel work ran
+        # in this process; forked children inherit the parent's setting.
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+    except ImportError:
+        pass
+
+
+def create_inference_pool(kind="thread", workers=1, torch_threads=0):
+    """
+    Builds the executor that runs model inference.
+
+    - "thread": workers share the in-process models directly.
+    - "process": workers are forked from the current process, so models that
+      are already loaded are shared copy-on-write instead of being reloaded.
+      Create the pool only after the models are loaded.
+    """
+    if kind not in POOL_KINDS:
+        raise ValueError(f"Unknown inference pool '{kind}', expected one of {POOL_KINDS}")
+
+    workers = max(1, int(workers))
+    torch_threads = int(torch_threads) or default_torch_threads(workers)
+
+    logger.info(
+        f"🧵 Inference pool: {kind} x{workers} (torch intra-op threads per worker: {torch_threads})"
+    )
+    if kind == "process":
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_inference_worker,
+            initargs=(torch_threads,),
+        )
+    return ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix="inference",
+        initializer=_init_inference_worker,
+        initargs=(torch_threads,),
+    )
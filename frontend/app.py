@@ -246,9 +246,10 @@ try:
             fast_used = min(fast_used, fast_total)
             norm_used = min(norm_used, norm_total)
 
-        st.sidebar.progress(fast_used / fast_total)
+        # Lanes can borrow idle slots from each other, so usage may exceed the reservation
+        st.sidebar.progress(min(1.0, fast_used / fast_total))
         st.sidebar.caption(f"⚡ Fast Lane: {fast_used}/{fast_total}")
-        st.sidebar.progress(norm_used / norm_total)
+        st.sidebar.progress(min(1.0, norm_used / norm_total))
         st.sidebar.caption(f"🐢 Normal Lane: {norm_used}/{norm_total}")
 except Exception:
     st.sidebar.error("Backend Offline")
@@ -408,7 +409,9 @@ with col_chat:
                     res = requests.post(
                         f"{API_URL}/chat",
                         json={"text": prompt},
-                        headers={"X-API-Key": "empathic-secret-key"},
+                        # Same budget as the client timeout, so the gateway
+                        # gives up (and frees the slot) when we do
+                        headers={"X-API-Key": "empathic-secret-key", "X-Deadline-Ms": "30000"},
                         timeout=30,
                     )
 
@@ -630,7 +633,7 @@ if st.session_state.stress_active:
             res = requests.post(
                 f"{API_URL}/chat",
                 json=payload,
-                headers={"X-API-Key": "empathic-secret-key"},
+                headers={"X-API-Key": "empathic-secret-key", "X-Deadline-Ms": "30000"},
                 timeout=30,
             )
             if res.status_code == 200:
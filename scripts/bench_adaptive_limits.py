@@ -0,0 +1,117 @@
+"""
+Adaptive lane limits vs. static ones against a simulated upstream that
+saturates and, halfway through, slows down.
+
+The upstream serves `capacity` calls at base latency; beyond that every call
+slows proportionally (processor sharing). Closed-loop clients keep one
+request each in flight through a single lane (backend/lanes.py) whose
+reservation is static or driven by backend/limits.py. Reports per phase:
+throughput, p50/p99 upstream latency and the lane limit.
+
+Usage:
+    python -m scripts.bench_adaptive_limits [--clients 60] [--phase-s 20]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+
+from backend.lanes import Lane, LaneFull, LaneScheduler
+from backend.limits import make_limit
+
+
+class SaturatingUpstream:
+    def __init__(self, base_s, capacity):
+        self.base_s = base_s
+        self.capacity = capacity
+        self.in_flight = 0
+
+    async def call(self, rng):
+        self.in_flight += 1
+        try:
+            load = max(1.0, self.in_flight / self.capacity)
+            await asyncio.sleep(self.base_s * load * rng.uniform(0.8, 1.2))
+        finally:
+            self.in_flight -= 1
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def client(scheduler, upstream, rng, stop, samples, phase):
+    while not stop.is_set():
+        try:
+            admission = await scheduler.acquire("lane", 2, deadline_s=1.0)
+        except LaneFull:
+            await asyncio.sleep(0.05)
+            continue
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await upstream.call(rng)
+            latency = loop.time() - start
+            scheduler.observe(admission, latency)
+            samples[phase[0]].append(latency)
+        finally:
+            scheduler.release(admission)
+
+
+async def run(mode, initial, args):
+    rng = random.Random(args.seed)
+    limiter = make_limit(mode, initial, args.min_limit, args.max_limit, args.tolerance)
+    scheduler = LaneScheduler([Lane("lane", initial, max_queue=args.clients, limiter=limiter)])
+    upstream = SaturatingUpstream(args.base, args.capacity)
+    phases = ["healthy", "degraded", "recovered"]
+    samples = {name: [] for name in phases}
+    limits = {name: [] for name in phases}
+    phase, stop = [phases[0]], asyncio.Event()
+    tasks = [
+        asyncio.create_task(client(scheduler, upstream, rng, stop, samples, phase))
+        for _ in range(args.clients)
+    ]
+    for name, capacity in zip(phases, (args.capacity, args.capacity // 2, args.capacity)):
+        phase[0], upstream.capacity = name, capacity
+        for _ in range(int(args.phase_s * 10)):
+            await asyncio.sleep(0.1)
+            limits[name].append(scheduler.lanes["lane"].reserved)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return samples, limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--capacity", type=int, default=16, help="Upstream calls served at base latency")
+    parser.add_argument("--base", type=float, default=0.2, help="Upstream base latency (s)")
+    parser.add_argument("--phase-s", type=float, default=20.0)
+    parser.add_argument("--min-limit", type=int, default=2)
+    parser.add_argument("--max-limit", type=int, default=60)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("backend.lanes").setLevel(logging.ERROR)
+
+    runs = [("static", 4), ("static", 48), ("aimd", 4), ("gradient", 4)]
+    print(
+        f"🌊 upstream: {args.capacity} calls at {args.base * 1000:.0f} ms, "
+        f"halved in the 'degraded' phase; {args.clients} closed-loop clients"
+    )
+    print(f"{'limiter':>14} {'phase':>10} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'limit':>9}")
+    for mode, initial in runs:
+        samples, limits = asyncio.run(run(mode, initial, args))
+        name = f"{mode}({initial})" if mode == "static" else mode
+        for phase, latencies in samples.items():
+            lim = limits[phase]
+            print(
+                f"{name:>14} {phase:>10} {len(latencies) / args.phase_s:>7.1f} "
+                f"{statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f} "
+                f"{min(lim):>4}-{max(lim):<4}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Overload with and without the pre-triage admission gate (backend/lanes.py
+AdmissionGate).
+
+Requests arrive faster than the lanes can serve them. Each one first pays
+for triage (guardrails + NER + classification) on a small worker pool, then
+waits for a lane slot. Without the gate every request is triaged, and most
+of that CPU goes to requests the lanes shed anyway; with it, the excess is
+rejected before triage, per lane when a provisional lane hint is given.
+Reports goodput, where requests were turned away, triage CPU spent on shed
+requests and p50/p99 latency of served requests.
+
+Usage:
+    python -m scripts.bench_admission_gate [--rate 150] [--duration 10]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+
+from backend.lanes import AdmissionGate, Lane, LaneFull, LaneScheduler
+
+# no-gate: triage everything; gate: global headroom only; gate+hint: per-lane
+# headroom for a provisional lane from a cheap (imperfect) classifier
+POLICIES = ("no-gate", "gate", "gate+hint")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def one_request(gate, policy, scheduler, triage_pool, rng, args, deadlines, results):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    lane = "fast" if rng.random() < args.fast_share else "normal"
+    hint = None
+    if policy == "gate+hint":
+        # A cheap classifier that picks the right lane --hint-accuracy of the time
+        other = "normal" if lane == "fast" else "fast"
+        hint = lane if rng.random() < args.hint_accuracy else other
+    if not gate.enter(hint):
+        results.append("gated")
+        return
+    try:
+        # Triage holds one inference worker for its whole CPU time
+        async with triage_pool:
+            cost = rng.expovariate(1 / args.triage)
+            await asyncio.sleep(cost)
+    finally:
+        gate.leave(hint)
+    try:
+        admission = await scheduler.acquire(lane, 2 if lane == "fast" else 3, deadlines[lane])
+    except LaneFull:
+        gate.record_shed(cost)
+        results.append("shed")
+        return
+    try:
+        await asyncio.sleep(rng.expovariate(1 / args.hold))
+    finally:
+        scheduler.release(admission)
+    results.append(loop.time() - start)
+
+
+async def run(policy, args):
+    rng = random.Random(args.seed)
+    scheduler = LaneScheduler(
+        [
+            Lane("fast", args.fast_limit, weight=3, max_queue=args.max_queue),
+            Lane("normal", args.normal_limit, weight=1, max_queue=args.max_queue),
+        ]
+    )
+    deadlines = {"fast": args.fast_deadline, "normal": args.normal_deadline}
+    gate = AdmissionGate(scheduler, deadlines, enabled=policy != "no-gate")
+    triage_pool = asyncio.Semaphore(args.triage_workers)
+    results, tasks = [], []
+    loop = asyncio.get_running_loop()
+    end = loop.time() + args.duration
+    while loop.time() < end:
+        tasks.append(
+            asyncio.create_task(
+                one_request(gate, policy, scheduler, triage_pool, rng, args, deadlines, results)
+            )
+        )
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    return results, gate.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=float, default=150.0, help="Arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--triage", type=float, default=0.02, help="Mean triage CPU seconds")
+    parser.add_argument("--triage-workers", type=int, default=2)
+    parser.add_argument("--hold", type=float, default=0.25, help="Mean seconds a request holds a slot")
+    parser.add_argument("--fast-limit", type=int, default=10)
+    parser.add_argument("--normal-limit", type=int, default=2)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--fast-deadline", type=float, default=1.0)
+    parser.add_argument("--normal-deadline", type=float, default=3.0)
+    parser.add_argument("--fast-share", type=float, default=0.5, help="Share of requests for the fast lane")
+    parser.add_argument("--hint-accuracy", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    capacity = (args.fast_limit + args.normal_limit) / args.hold
+    print(
+        f"🚧 {args.rate:.0f} req/s offered; lanes serve ~{capacity:.0f} req/s, "
+        f"triage ~{args.triage_workers / args.triage:.0f} req/s"
+    )
+    print(
+        f"{'policy':>9} {'served':>7} {'gated':>6} {'shed':>6} {'wasted s':>9} "
+        f"{'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for policy in POLICIES:
+        results, snap = asyncio.run(run(policy, args))
+        served = [r for r in results if not isinstance(r, str)]
+        print(
+            f"{policy:>9} {len(served):>7} {results.count('gated'):>6} "
+            f"{results.count('shed'):>6} {snap['wasted_triage_s']:>9.2f} "
+            f"{statistics.median(served) * 1000:>8.0f} {percentile(served, 99) * 1000:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
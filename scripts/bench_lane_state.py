@@ -0,0 +1,164 @@
+"""
+Cluster-wide lane accounting across processes (backend/lane_state.py).
+
+Starts --workers processes that each run --clients concurrent "requests"
+against one slot limit through each lane state backend, and reports:
+
+- peak concurrency actually reached across all processes (the limit is
+  only cluster-wide if this stays <= --limit);
+- acquire + release round trip (p50/p99);
+- crash recovery: a process takes every slot and dies without releasing;
+  how long until a new lease is granted (about one --ttl).
+
+The "network" backend runs against the stand-in server
+(scripts/lane_state_server.py), started here on --port.
+
+Usage:
+    python -m scripts.bench_lane_state [--workers 4] [--limit 8] [--ttl 2]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend.lane_state import LANE_STATE_BACKENDS, make_lane_state
+
+KEYS = ("pool", "fast", "normal")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def backend_for(kind, args):
+    return make_lane_state(kind, KEYS, shm_path=args.shm_path, url=f"127.0.0.1:{args.port}")
+
+
+async def client(state, args, rng, in_flight, peak, latencies, stop_at):
+    limits = {"pool": args.limit, "fast": args.limit}
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        lease = await state.acquire(limits, args.ttl)
+        if lease is None:
+            await asyncio.sleep(0.005)
+            continue
+        took = time.perf_counter() - start
+        with in_flight.get_lock():
+            in_flight.value += 1
+            peak.value = max(peak.value, in_flight.value)
+        await asyncio.sleep(rng.expovariate(1 / args.hold))
+        with in_flight.get_lock():
+            in_flight.value -= 1
+        start = time.perf_counter()
+        await state.release(lease)
+        latencies.append(took + time.perf_counter() - start)
+
+
+def worker(kind, args, seed, in_flight, peak, results):
+    async def run():
+        state = backend_for(kind, args)
+        rng = random.Random(seed)
+        latencies = []
+        stop_at = time.monotonic() + args.duration
+        await asyncio.gather(
+            *(client(state, args, rng, in_flight, peak, latencies, stop_at) for _ in range(args.clients))
+        )
+        await state.close()
+        results.put(latencies)
+
+    asyncio.run(run())
+
+
+def hog(kind, args):
+    # Takes every slot, then dies without releasing (os._exit skips cleanup)
+    async def run():
+        state = backend_for(kind, args)
+        for _ in range(args.limit):
+            await state.acquire({"pool": args.limit}, args.ttl)
+
+    asyncio.run(run())
+    os._exit(1)
+
+
+async def time_to_recover(kind, args):
+    state = backend_for(kind, args)
+    start = time.monotonic()
+    while await state.acquire({"pool": args.limit}, args.ttl) is None:
+        await asyncio.sleep(0.05)
+        if time.monotonic() - start > args.ttl * 5:
+            break
+    await state.close()
+    return time.monotonic() - start
+
+
+def run_backend(kind, args):
+    ctx = multiprocessing.get_context("spawn")
+    in_flight, peak, results = ctx.Value("i", 0), ctx.Value("i", 0), ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(kind, args, args.seed + i, in_flight, peak, results))
+        for i in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    latencies = [lat for _ in procs for lat in results.get()]
+    for proc in procs:
+        proc.join()
+
+    crashed = ctx.Process(target=hog, args=(kind, args))
+    crashed.start()
+    crashed.join()
+    recover_s = asyncio.run(time_to_recover(kind, args)) if kind != "local" else None
+    return peak.value, latencies, recover_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", choices=LANE_STATE_BACKENDS, default=list(LANE_STATE_BACKENDS))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent requests per worker")
+    parser.add_argument("--limit", type=int, default=8, help="Cluster-wide slot limit")
+    parser.add_argument("--hold", type=float, default=0.02, help="Mean seconds a slot is held")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--ttl", type=float, default=2.0, help="Lease TTL (s)")
+    parser.add_argument("--port", type=int, default=7071)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    args.shm_path = os.path.join(tempfile.mkdtemp(), "lanes")
+
+    server = None
+    if "network" in args.backends:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "scripts.lane_state_server", "--port", str(args.port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        time.sleep(1.0)
+    try:
+        print(
+            f"🗄️ {args.workers} workers x {args.clients} clients, cluster limit {args.limit}, "
+            f"lease TTL {args.ttl}s"
+        )
+        print(f"{'backend':>8} {'peak':>6} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'recover s':>10}")
+        for kind in args.backends:
+            peak, latencies, recover_s = run_backend(kind, args)
+            recover = f"{recover_s:>10.2f}" if recover_s is not None else f"{'n/a':>10}"
+            print(
+                f"{kind:>8} {peak:>6} {len(latencies) / args.duration:>8.0f} "
+                f"{statistics.median(latencies) * 1000:>8.2f} {percentile(latencies, 99) * 1000:>8.2f} "
+                f"{recover}"
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
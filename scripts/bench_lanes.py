@@ -0,0 +1,179 @@
+"""
+Lane admission under bursts: instant 429 vs. a bounded priority queue vs.
+the work-conserving scheduler (borrowing + preemption).
+
+Simulates bursty arrivals into the two lanes (backend/lanes.py) with
+LLM-like hold times, no server or models needed, and reports per policy:
+goodput (requests served), shed/preempted counts, slot utilization and
+p50/p99 latency of served requests (queueing + hold), split by priority.
+
+--mix picks the traffic shape: "incident" (fraud spike, mostly fast lane),
+"quiet" (mostly normal lane) or "balanced".
+
+Hold times are exponential around --hold, or, with --sim-config, drawn per
+lane from the LLM simulator profiles (backend/worker.py, e.g.
+backend/llm_sim_profiles.json) with their injected errors/timeouts, seeded
+by --seed so every policy sees the same draws.
+
+Usage:
+    python -m scripts.bench_lanes [--mix incident] [--requests 400] [--burst 40]
+    python -m scripts.bench_lanes --sim-config backend/llm_sim_profiles.json --hold-scale 0.1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+
+from backend.lanes import Lane, LaneFull, LaneScheduler, Preempted, run_preemptible
+from backend.worker import LLMSimulator
+
+# Share of traffic per priority (1 CRITICAL, 2 HIGH, 3 NORMAL)
+PRIORITY_MIXES = {
+    "balanced": {1: 0.2, 2: 0.4, 3: 0.4},
+    "incident": {1: 0.6, 2: 0.3, 3: 0.1},
+    "quiet": {1: 0.05, 2: 0.1, 3: 0.85},
+}
+LABELS = {1: "CRITICAL", 2: "HIGH", 3: "NORMAL"}
+POLICIES = ("instant-429", "priority-queue", "work-conserving")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def make_scheduler(policy, args):
+    depth = 0 if policy == "instant-429" else args.max_queue
+    borrow = policy == "work-conserving"
+    return LaneScheduler(
+        [
+            Lane(
+                "fast",
+                args.fast_limit,
+                weight=3,
+                max_borrow=None if borrow else 0,
+                can_preempt=borrow,
+                max_queue=depth,
+            ),
+            Lane(
+                "normal",
+                args.normal_limit,
+                weight=1,
+                max_borrow=args.normal_max_borrow if borrow else 0,
+                max_queue=depth,
+            ),
+        ]
+    )
+
+
+async def one_request(scheduler, priority, hold, failure, deadlines, results, busy):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    key = "fast" if priority in (1, 2) else "normal"
+    try:
+        admission = await scheduler.acquire(key, priority, deadlines[key])
+    except LaneFull:
+        results.append((priority, "shed"))
+        return
+    granted = loop.time()
+    try:
+        await run_preemptible(admission, asyncio.sleep(hold))
+        # A failed upstream call still held its slot for `hold`
+        results.append((priority, failure or loop.time() - start))
+    except Preempted:
+        results.append((priority, "preempted"))
+    finally:
+        busy.append(loop.time() - granted)
+        scheduler.release(admission)
+
+
+async def run_policy(policy, args, seed):
+    rng = random.Random(seed)
+    sim = LLMSimulator.from_config(args.sim_config, seed) if args.sim_config else None
+    mix = PRIORITY_MIXES[args.mix]
+    scheduler = make_scheduler(policy, args)
+    deadlines = {"fast": args.fast_deadline, "normal": args.normal_deadline}
+    results, busy, tasks = [], [], []
+    loop = asyncio.get_running_loop()
+    began = loop.time()
+    sent = 0
+    while sent < args.requests:
+        # A burst, then a quiet gap long enough for part of it to drain
+        for _ in range(min(args.burst, args.requests - sent)):
+            priority = rng.choices(list(mix), weights=list(mix.values()))[0]
+            if sim is None:
+                hold, failure = rng.expovariate(1 / args.hold), None
+            else:
+                draw = sim.draw("fast" if priority in (1, 2) else "normal")
+                hold, failure = draw.held_s * args.hold_scale, draw.failure
+            tasks.append(
+                asyncio.create_task(
+                    one_request(scheduler, priority, hold, failure, deadlines, results, busy)
+                )
+            )
+            sent += 1
+            await asyncio.sleep(rng.expovariate(args.burst / 0.1))
+        await asyncio.sleep(args.gap)
+    await asyncio.gather(*tasks)
+    utilization = sum(busy) / (scheduler.total * (loop.time() - began))
+    return results, utilization
+
+
+def report(policy, results, utilization):
+    served = [(p, r) for p, r in results if not isinstance(r, str)]
+    preempted = sum(1 for _, r in results if r == "preempted")
+    failed = sum(1 for _, r in results if r in ("error", "timeout"))
+    print(
+        f"\n{policy}: served {len(served)}/{len(results)}, "
+        f"shed {sum(1 for _, r in results if r == 'shed')}, preempted {preempted}, "
+        f"upstream failed {failed}, slot utilization {utilization:.1%}"
+    )
+    print(f"{'priority':>10} {'served':>8} {'shed':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for priority, label in LABELS.items():
+        lat = [r for p, r in served if p == priority]
+        lost = sum(1 for p, r in results if p == priority and isinstance(r, str))
+        if lat:
+            print(
+                f"{label:>10} {len(lat):>8} {lost:>6} "
+                f"{statistics.median(lat) * 1000:>8.0f} {percentile(lat, 99) * 1000:>8.0f}"
+            )
+        else:
+            print(f"{label:>10} {0:>8} {lost:>6} {'-':>8} {'-':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mix", choices=PRIORITY_MIXES, default="balanced")
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--burst", type=int, default=40)
+    parser.add_argument("--gap", type=float, default=0.5, help="Seconds between bursts")
+    parser.add_argument("--hold", type=float, default=0.25, help="Mean seconds a request holds a slot")
+    parser.add_argument("--fast-limit", type=int, default=10)
+    parser.add_argument("--normal-limit", type=int, default=2)
+    parser.add_argument("--normal-max-borrow", type=int, default=5)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--fast-deadline", type=float, default=1.0)
+    parser.add_argument("--normal-deadline", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sim-config", help="LLM simulator profiles JSON for hold times")
+    parser.add_argument(
+        "--hold-scale", type=float, default=1.0, help="Multiplier on simulated hold times"
+    )
+    args = parser.parse_args()
+    if args.sim_config:
+        with open(args.sim_config) as f:
+            args.sim_config = json.load(f)
+
+    logging.getLogger("backend.lanes").setLevel(logging.ERROR)  # per-preemption warnings
+    print(f"🚦 mix={args.mix} {PRIORITY_MIXES[args.mix]}")
+    if args.sim_config:
+        print(f"🎲 hold times from LLM simulator profiles x{args.hold_scale}, seed {args.seed}")
+    for policy in args.policies:
+        report(policy, *asyncio.run(run_policy(policy, args, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Upstream LLM calls: a new connection per request vs. the pooled keep-alive
+client (backend/llm_client.py), against the bundled mock provider
+(scripts/mock_llm_server.py) with a short simulated generation time.
+
+Reports throughput and p50/p99 latency at --concurrency in-flight calls.
+Over plain HTTP this is the TCP handshake and client setup saved per call;
+against a TLS upstream the per-request path also pays a TLS handshake.
+
+Then streams --stream-requests calls from a mock that injects errors at
+--error-rate (seeded), and checks that every stream cut short is reported
+as a failure: the count must equal the errors the seeded simulator drew.
+
+Usage:
+    python -m scripts.bench_llm_client [--requests 2000] [--concurrency 32] [--error-rate 0.1]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from backend.llm_client import LLMClient, UpstreamError
+from backend.worker import LLMSimulator
+from scripts.bench_startup import poll
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def per_request(base_url, i):
+    # What a naive `client.post(...)` per call does
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        resp = await client.post("/v1/complete", json={"prompt": f"ticket {i}", "ticket_id": str(i)})
+        resp.raise_for_status()
+
+
+async def run(mode, args, base_url):
+    client = LLMClient(base_url, max_connections=args.concurrency, max_keepalive=args.concurrency)
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            if mode == "pooled":
+                await client.complete(f"ticket {i}", str(i))
+            else:
+                await per_request(base_url, i)
+            latencies.append(time.perf_counter() - start)
+
+    # Warm-up opens the pool's connections
+    await asyncio.gather(*(one(i) for i in range(args.concurrency)))
+    latencies.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    took = time.perf_counter() - start
+    await client.aclose()
+    return latencies, took
+
+
+async def run_streams(args, base_url):
+    client = LLMClient(base_url, max_connections=args.concurrency, max_keepalive=args.concurrency)
+    sem = asyncio.Semaphore(args.concurrency)
+    failed = 0
+
+    async def one(i):
+        nonlocal failed
+        async with sem:
+            try:
+                async for _ in client.stream(f"ticket {i}", str(i)):
+                    pass
+            except UpstreamError:
+                failed += 1
+
+    await asyncio.gather(*(one(i) for i in range(args.stream_requests)))
+    stats = client.snapshot()
+    await client.aclose()
+    return failed, stats["failures"]
+
+
+def start_mock(args, *extra):
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "scripts.mock_llm_server",
+            "--port", str(args.port), "--total-s", str(args.total_s), *extra,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if poll(f"http://127.0.0.1:{args.port}/openapi.json", 30)[0] is None:
+        server.terminate()
+        print("❌ Mock LLM server never came up")
+        sys.exit(1)
+    return server
+
+
+def check_stream_failures(args, base_url):
+    sim_config = {
+        "default": {
+            "latency": {"dist": "fixed", "s": args.total_s},
+            "error_rate": args.error_rate,
+        }
+    }
+    # Same config and seed as the mock: the number of errors it injects
+    sim = LLMSimulator.from_config(sim_config, args.seed)
+    expected = sum(sim.draw().failure is not None for _ in range(args.stream_requests))
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+        json.dump(sim_config, f)
+        f.flush()
+        server = start_mock(args, "--sim-config", f.name, "--seed", str(args.seed))
+        try:
+            failed, counted = asyncio.run(run_streams(args, base_url))
+        finally:
+            server.terminate()
+            server.wait()
+
+    ok = failed == expected == counted
+    print(
+        f"\n{'✅' if ok else '❌'} {args.stream_requests} streams at error rate {args.error_rate}: "
+        f"injected {expected}, raised {failed}, client failures {counted}"
+    )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--total-s", type=float, default=0.005, help="Mock generation time per call")
+    parser.add_argument("--port", type=int, default=9011)
+    parser.add_argument("--stream-requests", type=int, default=500)
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Injected stream errors")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_mock(args)
+    try:
+        print(
+            f"🔌 {args.requests} calls, {args.concurrency} in flight, "
+            f"mock generation {args.total_s * 1000:.0f} ms"
+        )
+        print(f"{'client':>12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode in ("per-request", "pooled"):
+            latencies, took = asyncio.run(run(mode, args, base_url))
+            print(
+                f"{mode:>12} {len(latencies) / took:>8.0f} "
+                f"{statistics.median(latencies) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not check_stream_failures(args, base_url):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Event-loop responsiveness check: /health latency while /chat is under load.
+
+Launches the gateway, waits for /ready, then samples /health latency idle and
+again while concurrent /chat requests (names/places, so NER has work to do)
+are in flight. With NER on its own executor the two distributions should be
+close; a blocked event loop shows up as a much larger p99 under load.
+
+Usage:
+    python -m scripts.bench_loop_latency [--concurrency 16] [--duration 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from scripts.bench_startup import poll
+
+CHAT_TEXTS = [
+    "Hello, my name is John Smith and I live in Berlin",
+    "Maria from Acme Corp says her card was charged twice",
+    "Please ask Dr. Ahmed Yilmaz in Istanbul to call me back",
+    "My order to Paris hasn't arrived, Emily Clark",
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def sample_health(base_url, duration):
+    timings = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        with urllib.request.urlopen(f"{base_url}/health", timeout=30) as resp:
+            resp.read()
+        timings.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.02)
+    return timings
+
+
+def chat_load(base_url, api_key, stop, counter):
+    i = 0
+    while not stop.is_set():
+        body = json.dumps({"text": CHAT_TEXTS[i % len(CHAT_TEXTS)]}).encode()
+        req = urllib.request.Request(
+            f"{base_url}/chat",
+            data=body,
+            headers={"Content-Type": "application/json", "X-API-Key": api_key},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=60) as resp:
+                resp.read()
+        except urllib.error.HTTPError:
+            pass  # 429 lane full still went through NER
+        counter.append(1)
+        i += 1
+
+
+def report(name, timings):
+    print(
+        f"{name:>10} n={len(timings):<5} p50={statistics.median(timings):>7.2f}ms "
+        f"p99={percentile(timings, 99):>7.2f}ms max={max(timings):>7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8092)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    api_key = os.getenv("API_KEY", "empathic-secret-key")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        ready_s, _ = poll(f"{base_url}/ready", args.timeout)
+        if ready_s is None:
+            print("❌ Gateway never became ready")
+            sys.exit(1)
+
+        idle = sample_health(base_url, args.duration / 2)
+
+        stop, counter = threading.Event(), []
+        workers = [
+            threading.Thread(target=chat_load, args=(base_url, api_key, stop, counter), daemon=True)
+            for _ in range(args.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        loaded = sample_health(base_url, args.duration)
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+        print(f"⏱️  /health latency ({args.concurrency} concurrent /chat clients)")
+        report("idle", idle)
+        report("under load", loaded)
+        print(f"   /chat completed: {len(counter)} ({len(counter) / args.duration:.1f} req/s)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
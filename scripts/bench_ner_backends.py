@@ -0,0 +1,84 @@
+"""
+NER backend benchmark: throughput and entity recall/precision per backend
+(gazetteer, bert, tiered) on the same labeled corpus.
+
+Uses the labeled sets of scripts.eval_ner_gate (built-in support messages,
+or CoNLL-2003 validation with --conll).
+
+Usage:
+    python -m scripts.bench_ner_backends [--backends gazetteer tiered bert] [--conll]
+"""
+import argparse
+import time
+
+from backend.ner_backends import NER_BACKENDS, make_ner_backend
+from backend.ner_gate import NerGate
+from scripts.eval_ner_gate import LABELED, entity_type, found, load_conll
+
+PII_GROUPS = ("PER", "LOC", "ORG")
+
+
+def score(labeled, predictions):
+    total_gold = sum(len(gold) for _, gold in labeled)
+    hits = sum(
+        found(surface, kind, text, entities)
+        for (text, gold), entities in zip(labeled, predictions)
+        for surface, kind in gold
+    )
+
+    predicted = correct = 0
+    for (text, gold), entities in zip(labeled, predictions):
+        for ent in entities:
+            kind = entity_type(ent)
+            if kind not in PII_GROUPS:
+                continue
+            predicted += 1
+            correct += any(
+                kind == gold_kind
+                and ent["start"] < text.find(surface) + len(surface)
+                and ent["end"] > text.find(surface)
+                for surface, gold_kind in gold
+            )
+    recall = hits / total_gold if total_gold else 0.0
+    precision = correct / predicted if predicted else 0.0
+    return recall, precision
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=list(NER_BACKENDS), choices=NER_BACKENDS)
+    parser.add_argument("--conll", action="store_true")
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--gate", default="conservative", help="NerGate mode for the tiered backend")
+    args = parser.parse_args()
+
+    labeled = load_conll(args.limit) if args.conll else LABELED
+    texts = [text for text, _ in labeled]
+    print(f"🔬 {len(texts)} messages, {sum(len(g) for _, g in labeled)} gold entities")
+    print(f"{'backend':>10} {'load s':>7} {'msg/s':>9} {'ms/msg':>8} {'recall':>7} {'precision':>10}")
+
+    for kind in args.backends:
+        gate = NerGate(args.gate)
+        start = time.perf_counter()
+        backend = make_ner_backend(kind, gate=gate).load()
+        load_s = time.perf_counter() - start
+        backend.predict_batch(texts[:4])  # warm up
+
+        predictions = []
+        start = time.perf_counter()
+        for i in range(0, len(texts), args.batch_size):
+            predictions.extend(backend.predict_batch(texts[i : i + args.batch_size]))
+        elapsed = time.perf_counter() - start
+
+        recall, precision = score(labeled, predictions)
+        print(
+            f"{kind:>10} {load_s:>7.2f} {len(texts) / elapsed:>9.1f} "
+            f"{elapsed / len(texts) * 1000:>8.2f} {recall:>7.1%} {precision:>10.1%}"
+        )
+        if kind == "tiered":
+            print(f"{'':>10} BERT tier ran on {gate.snapshot()['executed']} messages (gate={args.gate})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Regression + microbenchmark for the structured PII scanner (backend/pii.py).
+
+Checks that mask_structured_pii produces exactly the same (masked_text,
+pii_types) as the previous search-then-sub regex chain on a regression corpus
+plus randomly generated digit/separator soup, then reports the per-request
+cost of both on 2048-char inputs.
+
+Usage:
+    python -m scripts.bench_pii [--fuzz 20000] [--repeats 200]
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+
+from backend.pii import mask_structured_pii
+
+
+def legacy_mask_structured_pii(text):
+    """The regex chain mask_pii ran before backend/pii.py (reference only)."""
+    pii_types = []
+    masked = text
+    if re.search(r"[\w\.-]+@[\w\.-]+\.\w+", masked):
+        pii_types.append("EMAIL")
+        masked = re.sub(r"[\w\.-]+@[\w\.-]+\.\w+", "[EMAIL]", masked)
+    phone_strict = r"(?:\+?\d{1,3})?[-.\s]?\(?\d{3}\)?[-.\s]+\d{3,4}[-.\s]+\d{4}"
+    if re.search(phone_strict, masked):
+        pii_types.append("PHONE")
+        masked = re.sub(phone_strict, "[PHONE]", masked)
+    if re.search(r"\b\d{5} \d{5}\b", masked):
+        pii_types.append("CREDIT_CARD")
+        masked = re.sub(r"\b\d{5} \d{5}\b", "[CREDIT_CARD]", masked)
+    if re.search(r"\b(?:\d[ -]*?){13,19}\b", masked):
+        pii_types.append("CREDIT_CARD")
+        masked = re.sub(r"\b(?:\d[ -]*?){13,19}\b", "[CREDIT_CARD]", masked)
+    if re.search(r"\b\d{11}\b", masked):
+        pii_types.append("ID_NUMBER")
+        masked = re.sub(r"\b\d{11}\b", "[ID_NUMBER]", masked)
+    context_id = r"(?i)\b(?:id|identification|tckn|passport|no|number)\b(?:[^0-9]{0,20})?(\d{5,})\b"
+    if re.search(context_id, masked):
+        pii_types.append("ID_NUMBER")
+        masked = re.sub(context_id, lambda m: m.group(0).replace(m.group(1), "[ID_NUMBER]"), masked)
+    context_phone = r"(?i)\b(?:phone|call|mobile|cell|contact)\b(?:[^0-9]{0,20})?(\d{6,})\b"
+    if re.search(context_phone, masked):
+        pii_types.append("PHONE")
+        masked = re.sub(context_phone, lambda m: m.group(0).replace(m.group(1), "[PHONE]"), masked)
+    return masked, pii_types
+
+
+CORPUS = [
+    "Please call me at 555-0199-8888 regarding my issue.",
+    "My email is john.doe@example.com, send the receipt there.",
+    "My National ID is 12345678901, you can verify my identity.",
+    "Here is my credit card number 4532-1234-5678-9012 to pay.",
+    "Contact me at sarah.connor@sky.net or 555-123-4567.",
+    "My ID is 98765432101 and phone is 0500-123-4567.",
+    "my card is 12312 12312 please block it",
+    "card 4532 1234 5678 9012 3456 7 was charged twice",
+    "call (555) 123-4567 or +1 555.123.4567 after 5pm",
+    "passport no: AB 1234567, phone 05001234567",
+    "order #12345 hasn't arrived, tracking 1Z999AA10123456784",
+    "my identification number is 123456 and my mobile is 5551234567",
+    "email a.b-c_d@mail.co.uk and cc x@y.io about 4111111111111111",
+    "Hi, what are your working hours during the weekend?",
+    "I have been charged twice for the same transaction, need refund ASAP.",
+    "1234567890123456789012345 is not a card but 4111 1111 1111 1111 is",
+    "ref 2024-01-15 amount 1,234.56 account 12-34-56 78901234",
+    "",
+]
+
+ADVERSARIAL_ATOMS = [
+    "id", "no", "number", "phone", "call", "card", "my", "is", "x", "a.b",
+    "bob@mail.com", "-", "(", ")", "+", " ", "  ", ".", ":", "@", "#", "_", "\n",
+]
+
+
+def random_text(rnd):
+    parts = []
+    for _ in range(rnd.randint(1, 14)):
+        if rnd.random() < 0.45:
+            length = rnd.choice([1, 2, 3, 4, 5, 6, 7, 10, 11, 12, 13, 16, 19, 20])
+            parts.append("".join(rnd.choice("0123456789") for _ in range(length)))
+        else:
+            parts.append(rnd.choice(ADVERSARIAL_ATOMS))
+        if rnd.random() < 0.5:
+            parts.append(rnd.choice([" ", "-", ".", "", " - "]))
+    return "".join(parts)
+
+
+def pad_to(pieces, size=2048):
+    text = ""
+    while len(text) < size:
+        text += random.Random(len(text)).choice(pieces) + " "
+    return text[:size]
+
+
+def per_call_us(fn, text, repeats):
+    fn(text)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(text)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    cases = CORPUS + [random_text(rnd) for _ in range(args.fuzz)]
+    mismatches = [t for t in cases if mask_structured_pii(t) != legacy_mask_structured_pii(t)]
+    print(f"🔬 Equivalence: {len(cases) - len(mismatches)}/{len(cases)} identical")
+    for text in mismatches[:5]:
+        print(f"   ❌ {text!r}")
+        print(f"      legacy: {legacy_mask_structured_pii(text)}")
+        print(f"      new:    {mask_structured_pii(text)}")
+
+    inputs = {
+        "no PII (prose)": pad_to([s for s in CORPUS if not re.search(r"[\d@]", s)]),
+        "PII-dense": pad_to(CORPUS[:13]),
+        "digit runs": pad_to(["4" * 40, "1 2 3 4 5 6 7 8 9", "12-34-56-78", "id 123456789"]),
+        "spaced digits": ("1 - " * 512)[:2048],
+    }
+    print(f"\n⏱️  Median per-request cost on 2048-char inputs (µs), {args.repeats} repeats")
+    print(f"{'input':>16} {'legacy':>9} {'new':>9} {'speedup':>8}")
+    for name, text in inputs.items():
+        old = per_call_us(legacy_mask_structured_pii, text, args.repeats)
+        new = per_call_us(mask_structured_pii, text, args.repeats)
+        print(f"{name:>16} {old:>9.1f} {new:>9.1f} {old / new:>7.1f}x")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
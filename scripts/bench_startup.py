@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark: time from process launch until /health (live) and
+/ready (all models loaded + warmed), plus the per-step breakdown reported
+by the gateway. Use --record to append the result to a JSON-lines history
+file so startup time can be tracked across releases.
+
+Usage:
+    python -m scripts.bench_startup --runs 3 --record startup_history.jsonl
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def poll(url, timeout):
+    """
+    Returns (seconds until HTTP 200, json body), or (None, None) on timeout.
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as resp:
+                return time.perf_counter() - start, json.loads(resp.read())
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.05)
+    return None, None
+
+
+def run_once(port, timeout):
+    launched = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        live_s, _ = poll(f"http://127.0.0.1:{port}/health", timeout)
+        remaining = timeout - (time.perf_counter() - launched)
+        _, ready = poll(f"http://127.0.0.1:{port}/ready", remaining)
+        ready_s = time.perf_counter() - launched if ready else None
+        return {
+            "live_s": round(live_s, 3) if live_s is not None else None,
+            "ready_s": round(ready_s, 3) if ready_s is not None else None,
+            "steps": (ready or {}).get("startup_timings", {}),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--record", help="append results to this JSON-lines file")
+    args = parser.parse_args()
+
+    results = []
+    for i in range(args.runs):
+        result = run_once(args.port, args.timeout)
+        results.append(result)
+        print(f"Run {i + 1}: live {result['live_s']}s | ready {result['ready_s']}s | {result['steps']}")
+
+    ready_times = sorted(r["ready_s"] for r in results if r["ready_s"] is not None)
+    if not ready_times:
+        print("❌ Gateway never became ready")
+        sys.exit(1)
+    median = ready_times[len(ready_times) // 2]
+    print(f"\n⏱️ Median time-to-ready: {median:.3f}s over {len(ready_times)} runs")
+
+    if args.record:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True
+        ).stdout.strip()
+        entry = {
+            "revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "embedder_backend": os.getenv("EMBEDDER_BACKEND", "torch"),
+            "median_ready_s": median,
+            "runs": results,
+        }
+        with open(args.record, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"📝 Recorded to {args.record}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Time-to-first-byte: /chat (whole response) vs. /chat/stream (SSE).
+
+Launches the gateway, waits for /ready, then sends the same messages to both
+endpoints one at a time and reports time to the first response byte, time to
+the first token event (stream only) and total time.
+
+Usage:
+    python -m scripts.bench_streaming [--requests 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from scripts.bench_startup import poll
+
+TEXTS = [
+    "where is my order, it has not arrived yet",
+    "I was charged twice for the same order",
+    "how do I change my shipping address",
+    "what is your refund policy",
+]
+
+
+def timed_post(url, api_key, text):
+    """
+    Returns (first byte s, first token s or None, total s).
+    """
+    req = urllib.request.Request(
+        url,
+        data=json.dumps({"text": text}).encode(),
+        headers={"Content-Type": "application/json", "X-API-Key": api_key},
+    )
+    start = time.perf_counter()
+    first_byte = first_token = None
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        for line in resp:
+            now = time.perf_counter() - start
+            if first_byte is None:
+                first_byte = now
+            if first_token is None and line.startswith(b"event: token"):
+                first_token = now
+    return first_byte, first_token, time.perf_counter() - start
+
+
+def report(name, samples):
+    def ms(values):
+        values = [v for v in values if v is not None]
+        return f"{statistics.median(values) * 1000:>8.1f}" if values else f"{'-':>8}"
+
+    first_byte, first_token, total = zip(*samples)
+    print(f"{name:>12} {ms(first_byte)} {ms(first_token)} {ms(total)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8093)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    api_key = os.getenv("API_KEY", "empathic-secret-key")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        ready_s, _ = poll(f"{base_url}/ready", args.timeout)
+        if ready_s is None:
+            print("❌ Gateway never became ready")
+            sys.exit(1)
+
+        results = {"/chat": [], "/chat/stream": []}
+        for i in range(args.requests):
+            text = TEXTS[i % len(TEXTS)]
+            for path, samples in results.items():
+                samples.append(timed_post(f"{base_url}{path}", api_key, text))
+
+        print(f"⏱️  Median over {args.requests} sequential requests (ms)")
+        print(f"{'endpoint':>12} {'1st byte':>8} {'1st tok':>8} {'total':>8}")
+        for path, samples in results.items():
+            report(path, samples)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
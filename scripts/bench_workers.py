@@ -0,0 +1,97 @@
+"""
+Inference worker pool benchmark: requests/sec as the worker count grows.
+
+Usage:
+    python -m scripts.bench_workers --pool thread --workers 1 2 4 8 16
+    python -m scripts.bench_workers --pool process --workers 1 2 4 8 --requests 2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+import joblib
+
+import backend.train_model
+from backend.batching import MicroBatcher
+from backend.inference import UrgencyClassifier
+from backend.worker_pool import create_inference_pool
+
+# Same sentence mix as the dashboard stress test, with some variation so the
+# benchmark measures the model rather than a perfectly warm cache.
+SAMPLES = [
+    "My credit card was stolen, block it now!",
+    "I want a refund for my last order",
+    "Where is my package? track my order",
+    "I need to change my shipping address",
+    "Can I get a discount code?",
+    "hello, just browsing thanks",
+    "i have been charged twice for the same order",
+    "how long does delivery take to my city",
+]
+
+classifier = None
+
+
+def classify_batch(texts):
+    # Module-level so process pools can pickle it by reference
+    return classifier.predict(texts)
+
+
+async def run_load(pool, requests, batch_size, window_ms, workers):
+    batcher = MicroBatcher(
+        classify_batch,
+        pool,
+        max_batch_size=batch_size,
+        max_wait_ms=window_ms,
+        max_in_flight=workers,
+        name="bench_batcher",
+    )
+    texts = [f"{random.choice(SAMPLES)} #{i}" for i in range(requests)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[batcher.submit(t) for t in texts])
+    elapsed = time.perf_counter() - start
+
+    await batcher.stop()
+    return requests / elapsed, batcher.snapshot()["avg_batch_size"]
+
+
+def main():
+    global classifier
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="backend/urgency_model.joblib")
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--torch-threads", type=int, default=0, help="0 = cores / workers")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    sys.modules["__main__"].BertEmbedder = backend.train_model.BertEmbedder
+    classifier = UrgencyClassifier.from_pipeline(joblib.load(args.model))
+    # Build the SentenceTransformer before forking so workers share it
+    classifier.predict(["warmup"])
+
+    print(f"📊 {args.pool} pool, {args.requests} requests, batch<= {args.batch_size}")
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'avg batch':>10}")
+    baseline = None
+    for workers in args.workers:
+        pool = create_inference_pool(args.pool, workers, args.torch_threads)
+        # Prime every worker so process start-up is not measured
+        list(pool.map(classify_batch, [["warmup"]] * workers))
+
+        rps, avg_batch = asyncio.run(
+            run_load(pool, args.requests, args.batch_size, args.window_ms, workers)
+        )
+        pool.shutdown()
+
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {rps / baseline:>7.2f}x {avg_batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+NER gate evaluation: how much NER work each gate mode skips and how much
+entity recall that costs, measured on a labeled set.
+
+Labeled sets:
+    built-in   support-style messages with gold PER/LOC/ORG entities
+               (including lowercase and entity-free messages)
+    --conll    CoNLL-2003 validation split (news text, PER/LOC/ORG only)
+
+"gate recall" counts gold entities in messages the gate lets through (the
+best NER can do behind the gate). With --ner the real dslim/bert-base-NER
+pipeline runs too, reporting the recall NER achieves with and without the
+gate, plus NER latency to estimate time saved per request.
+
+Usage:
+    python -m scripts.eval_ner_gate [--ner] [--conll --limit 2000]
+"""
+import argparse
+import statistics
+import time
+
+from backend.ner_gate import NER_GATE_MODES, NerGate
+
+# (text, [(surface, type), ...])
+LABELED = [
+    ("thanks", []),
+    ("hello", []),
+    ("where is my order", []),
+    ("track my order please", []),
+    ("i want a refund for my last order", []),
+    ("Hello, can you help me with my account?", []),
+    ("Hi, what are your working hours during the weekend?", []),
+    ("I have been charged twice for the same transaction, need refund ASAP.", []),
+    ("Please cancel my subscription before the next billing cycle.", []),
+    ("My order #12345 hasn't arrived yet, where is it?", []),
+    ("Can you expedite the delivery of my package? I need it by Friday.", []),
+    ("Is there a fee for international wire transfers?", []),
+    ("My credit card was stolen, block it now!", []),
+    ("Suspicious login attempt detected from another country.", []),
+    ("Hello, my name is John Smith and I live in Berlin", [("John Smith", "PER"), ("Berlin", "LOC")]),
+    ("This is Maria from Acme Corp, my card was charged twice", [("Maria", "PER"), ("Acme Corp", "ORG")]),
+    ("Please ask Ahmed Yilmaz in Istanbul to call me back", [("Ahmed Yilmaz", "PER"), ("Istanbul", "LOC")]),
+    ("My package to Paris is late. Emily Clark", [("Paris", "LOC"), ("Emily Clark", "PER")]),
+    ("I ordered from Amazon but paid with PayPal", [("Amazon", "ORG"), ("PayPal", "ORG")]),
+    ("Ship it to my office in London please", [("London", "LOC")]),
+    ("hi this is sarah, i live in london", [("sarah", "PER"), ("london", "LOC")]),
+    ("my name is mehmet and my order is late", [("mehmet", "PER")]),
+    ("Dear team, Robert Brown here, I need a refund", [("Robert Brown", "PER")]),
+    ("I moved from Izmir to Ankara last month", [("Izmir", "LOC"), ("Ankara", "LOC")]),
+    ("The courier from DHL left it at the wrong door", [("DHL", "ORG")]),
+    ("Can Lukas Becker pick up the order in Munich?", [("Lukas Becker", "PER"), ("Munich", "LOC")]),
+    ("please send it to new york, attention carlos", [("new york", "LOC"), ("carlos", "PER")]),
+    ("Thanks Priya, that solved it", [("Priya", "PER")]),
+    ("Please forward this to Kowalski at Allegro in Gdansk", [("Kowalski", "PER"), ("Allegro", "ORG"), ("Gdansk", "LOC")]),
+    ("Olumide Adeyemi from Lagos here, my refund is missing", [("Olumide Adeyemi", "PER"), ("Lagos", "LOC")]),
+    ("I bought it at Tesco in Leeds", [("Tesco", "ORG"), ("Leeds", "LOC")]),
+    ("my sister nguyen lan ordered it for me", [("nguyen lan", "PER")]),
+]
+
+CONLL_TYPES = {1: "PER", 2: "PER", 3: "ORG", 4: "ORG", 5: "LOC", 6: "LOC"}
+
+
+def load_conll(limit):
+    from datasets import load_dataset
+
+    rows = load_dataset("eriktks/conll2003", split="validation")
+    labeled = []
+    for row in rows.select(range(min(limit, len(rows)))):
+        text, gold, current = "", [], None
+        for token, tag in zip(row["tokens"], row["ner_tags"]):
+            start = len(text) + (1 if text else 0)
+            text = f"{text} {token}" if text else token
+            kind = CONLL_TYPES.get(tag)
+            if kind and tag % 2 == 0 and current and current[1] == kind:
+                current[2] = len(text)  # I- continues the entity
+            elif kind:
+                current = [start, kind, len(text)]
+                gold.append(current)
+            else:
+                current = None
+        labeled.append((text, [(text[s:e], k) for s, k, e in gold]))
+    return labeled
+
+
+def entity_type(ent):
+    return ent.get("entity_group", ent.get("entity", "")).replace("B-", "").replace("I-", "")
+
+
+def found(gold_surface, gold_type, text, entities):
+    start = text.find(gold_surface)
+    end = start + len(gold_surface)
+    return any(
+        entity_type(e) == gold_type and e["start"] < end and e["end"] > start for e in entities
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ner", action="store_true", help="run the real NER pipeline")
+    parser.add_argument("--conll", action="store_true", help="use CoNLL-2003 validation")
+    parser.add_argument("--limit", type=int, default=2000)
+    args = parser.parse_args()
+
+    labeled = load_conll(args.limit) if args.conll else LABELED
+    texts = [text for text, _ in labeled]
+    total_entities = sum(len(gold) for _, gold in labeled)
+    entity_free = sum(1 for _, gold in labeled if not gold)
+
+    ner_entities, ner_ms = None, None
+    if args.ner:
+        from transformers import pipeline
+
+        nlp = pipeline("ner", model="dslim/bert-base-NER", aggregation_strategy="simple")
+        nlp(texts[:4])  # warm up
+        ner_entities, timings = [], []
+        for text in texts:
+            start = time.perf_counter()
+            ner_entities.append(nlp(text))
+            timings.append((time.perf_counter() - start) * 1000)
+        ner_ms = statistics.median(timings)
+
+    print(f"🔬 {len(labeled)} messages, {total_entities} gold entities, {entity_free} entity-free")
+    header = f"{'mode':>13} {'skipped':>8} {'skip(free)':>11} {'gate recall':>12}"
+    if args.ner:
+        header += f" {'NER recall':>11} {'recall loss':>12} {'saved ms/req':>13}"
+    print(header)
+
+    baseline = None
+    for mode in NER_GATE_MODES:
+        gate = NerGate(mode)
+        passed = [gate.should_run(text) for text in texts]
+        stats = gate.snapshot()
+        free_skipped = sum(1 for run, (_, gold) in zip(passed, labeled) if not run and not gold)
+        gate_hits = sum(len(gold) for run, (_, gold) in zip(passed, labeled) if run)
+        row = (
+            f"{mode:>13} {stats['skip_rate']:>8.1%} "
+            f"{free_skipped / max(entity_free, 1):>11.1%} "
+            f"{gate_hits / max(total_entities, 1):>12.1%}"
+        )
+        if args.ner:
+            hits = sum(
+                found(surface, kind, text, entities)
+                for run, (text, gold), entities in zip(passed, labeled, ner_entities)
+                if run
+                for surface, kind in gold
+            )
+            recall = hits / max(total_entities, 1)
+            baseline = recall if baseline is None else baseline
+            row += (
+                f" {recall:>11.1%} {baseline - recall:>12.1%}"
+                f" {stats['skip_rate'] * ner_ms:>13.1f}"
+            )
+        print(row)
+
+    if args.ner:
+        print(f"\n⏱️  Median NER latency: {ner_ms:.1f} ms per message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Stand-in lane state service for LANE_STATE_BACKEND=network: holds the
+cluster's slot leases in memory (backend/lane_state.py LaneStateServer).
+
+Usage:
+    python -m scripts.lane_state_server [--host 0.0.0.0] [--port 7070]
+"""
+import argparse
+import asyncio
+import logging
+
+from backend.lane_state import LaneStateServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(LaneStateServer().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Local mock LLM provider for LLM_BACKEND=http, tests and benchmarks.
+
+Serves the API backend/llm_client.py speaks, with the response, timing and
+injected failures of the in-process simulator (backend/worker.py); a
+simulated failure is answered with a 503 (or a stream cut short):
+
+- POST /v1/complete {"prompt", "ticket_id"} -> {"text"}
+- POST /v1/stream   {"prompt", "ticket_id"} -> SSE `token` events, then `done`
+
+Usage:
+    python -m scripts.mock_llm_server [--port 9000] [--total-s 2.5] [--first-token-s 0.3]
+    python -m scripts.mock_llm_server --sim-config backend/llm_sim_profiles.json [--seed 7]
+"""
+import argparse
+import json
+import logging
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from backend import worker
+
+app = FastAPI(title="Mock LLM")
+
+
+class CompletionRequest(BaseModel):
+    prompt: str
+    ticket_id: str = "-"
+
+
+@app.post("/v1/complete")
+async def complete(request: CompletionRequest):
+    try:
+        return {"text": await worker.simulate_llm_processing(request.prompt, request.ticket_id)}
+    except worker.SimulatedLLMError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.post("/v1/stream")
+async def stream(request: CompletionRequest):
+    async def events():
+        try:
+            async for token in worker.stream_llm_processing(request.prompt, request.ticket_id):
+                yield f"event: token\ndata: {json.dumps({'text': token})}\n\n"
+        except worker.SimulatedLLMError:
+            return  # connection closes without `done`
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--total-s", type=float, default=worker.LLM_TOTAL_S)
+    parser.add_argument("--first-token-s", type=float, default=worker.LLM_FIRST_TOKEN_S)
+    parser.add_argument("--sim-config", help="LLM simulator profiles JSON (see LLM_SIM_CONFIG)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    worker.LLM_TOTAL_S = args.total_s
+    worker.LLM_FIRST_TOKEN_S = args.first_token_s
+    if args.sim_config:
+        with open(args.sim_config) as f:
+            worker.simulator = worker.LLMSimulator.from_config(json.load(f), args.seed)
+    else:
+        worker.simulator = worker.LLMSimulator(
+            worker.SimProfile("default", worker.FixedLatency(args.total_s)), seed=args.seed
+        )
+    # One log line per simulated call is noise at benchmark rates
+    logging.getLogger(worker.__name__).setLevel(logging.WARNING)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Parity + latency check: ONNX Runtime (fp32 / int8) vs PyTorch MiniLM embedder.
+
+Reports embedding cosine similarity and intent agreement against the PyTorch
+path, plus median latency at batch sizes 1, 8 and 32.
+
+Usage:
+    python -m scripts.onnx_parity [--model backend/urgency_model.joblib]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import joblib
+import numpy as np
+
+import backend.train_model
+from backend.embedders import make_embedder
+from backend.inference import UrgencyClassifier
+
+CORPUS = [
+    "My credit card was stolen, block it now!",
+    "I want a refund for my last order",
+    "Where is my package? track my order",
+    "I need to change my shipping address",
+    "Can I get a discount code?",
+    "hello, just browsing thanks",
+    "i have been charged twice for the same order",
+    "how long does delivery take to my city",
+    "someone used my card without permission, this is fraud",
+    "cancel order 12345 please",
+    "what is the cancellation fee if i cancel today",
+    "I would like to subscribe to the newsletter",
+    "my wallet is lost and i dont remember my password",
+    "can you help me set up a new account",
+    "the item arrived broken and I am very upset",
+    "which payment methods do you accept",
+]
+
+
+def latency_ms(embedder, batch_size, repeats):
+    batch = (CORPUS * (batch_size // len(CORPUS) + 1))[:batch_size]
+    embedder.transform(batch)  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embedder.transform(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="backend/urgency_model.joblib")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    sys.modules["__main__"].BertEmbedder = backend.train_model.BertEmbedder
+    pipeline = joblib.load(args.model)
+    reference = UrgencyClassifier.from_pipeline(pipeline)
+    model_name = reference.embedder.model_name
+
+    ref_embeddings = reference.embed(CORPUS)
+    ref_intents = [r.intent for r in reference.predict_from_embeddings(ref_embeddings)]
+
+    backends = {"torch": reference.embedder}
+    for name in ("onnx", "onnx-int8"):
+        backends[name] = make_embedder(name, model_name, num_threads=args.threads)
+
+    print(f"🔬 Parity vs torch on {len(CORPUS)} sentences")
+    print(f"{'backend':>10} {'cos mean':>9} {'cos min':>9} {'intent agree':>13}")
+    for name, embedder in backends.items():
+        candidate = UrgencyClassifier(embedder, reference.clf)
+        embeddings = candidate.embed(CORPUS)
+        cos = np.sum(embeddings * ref_embeddings, axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(ref_embeddings, axis=1)
+        )
+        intents = [r.intent for r in candidate.predict_from_embeddings(embeddings)]
+        agree = np.mean([a == b for a, b in zip(intents, ref_intents)])
+        print(f"{name:>10} {cos.mean():>9.5f} {cos.min():>9.5f} {agree:>12.1%}")
+
+    print(f"\n⏱️  Median embed latency (ms), {args.repeats} repeats")
+    print(f"{'backend':>10} {'bs=1':>8} {'bs=8':>8} {'bs=32':>8}")
+    for name, embedder in backends.items():
+        row = [latency_ms(embedder, bs, args.repeats) for bs in (1, 8, 32)]
+        print(f"{name:>10} " + " ".join(f"{ms:>8.2f}" for ms in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.lane_state import LaneLeases, LaneStateError, LaneStateServer, NetworkLaneState
+
+
+async def start_server(handler):
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_network_state_enforces_limits_across_clients():
+    async def run():
+        server, port = await start_server(LaneStateServer()._serve_client)
+        a, b = NetworkLaneState("127.0.0.1", port), NetworkLaneState("127.0.0.1", port)
+        limits = {"pool": 2, "fast": 2}
+        first = await a.acquire(limits, 5)
+        second = await b.acquire(limits, 5)
+        assert first and second
+        assert await a.acquire(limits, 5) is None
+        assert await b.usage() == {"pool": 2, "fast": 2}
+        assert await a.renew([first, "gone-1"], 5) == ["gone-1"]
+        await a.release(first)
+        assert await b.acquire(limits, 5) is not None
+        await a.close()
+        await b.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_cancel_mid_call_does_not_shift_replies():
+    gate = asyncio.Event()
+    table = LaneStateServer()
+
+    async def slow_first_reply(reader, writer):
+        # Holds the reply to the first request until `gate` is set
+        first = True
+        while line := await reader.readline():
+            request = json.loads(line)
+            if first:
+                first = False
+                await gate.wait()
+            reply = {**table.handle(request), "id": request["id"]}
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    async def run():
+        server, port = await start_server(slow_first_reply)
+        state = NetworkLaneState("127.0.0.1", port)
+        call = asyncio.create_task(state.acquire({"pool": 4}, 5))
+        await asyncio.sleep(0.05)  # request written, reply pending
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        gate.set()
+        assert isinstance(await state.usage(), dict)
+        assert await state.renew([], 5) == []
+        await state.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_malformed_reply_is_a_lane_state_error():
+    async def garbage(reader, writer):
+        await reader.readline()
+        writer.write(b"not json\n")
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server, port = await start_server(garbage)
+        state = NetworkLaneState("127.0.0.1", port)
+        with pytest.raises(LaneStateError):
+            await state.usage()
+        # The heartbeat side survives it
+        leases = LaneLeases(state, ttl_s=5)
+        assert "error" in (await leases.snapshot())["cluster_usage"]
+        await state.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_unreachable_server_fails_open():
+    async def run():
+        server, port = await start_server(LaneStateServer()._serve_client)
+        server.close()
+        await server.wait_closed()
+        leases = LaneLeases(NetworkLaneState("127.0.0.1", port, timeout_s=0.2), fail_open=True)
+        assert await leases.acquire({"pool": 1}, 0.1) == ""
+        assert leases.stats["failed_open"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from backend.lanes import Lane, LaneFull, LaneScheduler, Preempted, run_preemptible
+
+
+def make_scheduler(normal_max_borrow=None, max_queue=8):
+    return LaneScheduler(
+        [
+            Lane("fast", 2, weight=3, can_preempt=True, max_queue=max_queue),
+            Lane("normal", 1, weight=1, max_borrow=normal_max_borrow, max_queue=max_queue),
+        ]
+    )
+
+
+def test_idle_slots_are_borrowed_up_to_max_borrow():
+    async def run():
+        scheduler = make_scheduler(normal_max_borrow=1)
+        own = await scheduler.acquire("normal", 3, 1.0)
+        borrowed = await scheduler.acquire("normal", 3, 1.0)
+        assert not own.borrowed and borrowed.borrowed
+        assert scheduler.lanes["normal"].borrowing == 1
+        # One idle slot is left, but normal may only borrow one
+        with pytest.raises(LaneFull):
+            await scheduler.acquire("normal", 3, 0.05)
+        assert scheduler.lanes["normal"].stats["borrowed_total"] == 1
+
+    asyncio.run(run())
+
+
+def test_queued_waiter_gets_the_released_slot_by_priority():
+    async def run():
+        scheduler = LaneScheduler([Lane("fast", 1, max_borrow=0)])
+        held = await scheduler.acquire("fast", 2, 1.0)
+        high = asyncio.create_task(scheduler.acquire("fast", 2, 1.0))
+        critical = asyncio.create_task(scheduler.acquire("fast", 1, 1.0))
+        await asyncio.sleep(0)
+        assert scheduler.lanes["fast"].waiting == 2
+        scheduler.release(held)
+        first = await critical
+        assert not high.done()
+        scheduler.release(first)
+        scheduler.release(await high)
+        assert scheduler.active == 0
+
+    asyncio.run(run())
+
+
+def test_fast_lane_reclaims_borrowed_slot():
+    async def run():
+        scheduler = make_scheduler()
+        normal = [await scheduler.acquire("normal", 3, 1.0) for _ in range(3)]
+        assert [a.borrowed for a in normal] == [False, True, True]
+
+        fast_task = asyncio.create_task(scheduler.acquire("fast", 1, 1.0))
+        await asyncio.sleep(0)
+        # The newest borrowed slot is reclaimed; the lender keeps its reservation
+        assert normal[2].preempted.is_set()
+        assert not normal[0].preempted.is_set()
+
+        with pytest.raises(Preempted):
+            await run_preemptible(normal[2], asyncio.sleep(10))
+        scheduler.release(normal[2])
+        fast = await asyncio.wait_for(fast_task, 1.0)
+        assert fast.lane.name == "fast"
+        assert scheduler.lanes["normal"].stats["preempted_total"] == 1
+        assert scheduler.lanes["fast"].reclaiming == 0
+
+    asyncio.run(run())
+
+
+def test_release_is_idempotent():
+    async def run():
+        scheduler = make_scheduler()
+        admission = await scheduler.acquire("fast", 1, 1.0)
+        scheduler.release(admission)
+        scheduler.release(admission)
+        assert scheduler.lanes["fast"].active == 0
+
+    asyncio.run(run())
+
+
+def test_queue_full_is_shed():
+    async def run():
+        scheduler = LaneScheduler([Lane("normal", 1, max_borrow=0, max_queue=1)])
+        held = await scheduler.acquire("normal", 3, 1.0)
+        waiter = asyncio.create_task(scheduler.acquire("normal", 3, 1.0))
+        await asyncio.sleep(0)
+        with pytest.raises(LaneFull) as shed:
+            await scheduler.acquire("normal", 3, 1.0)
+        assert shed.value.reason == "queue_full"
+        scheduler.release(held)
+        scheduler.release(await waiter)
+
+    asyncio.run(run())
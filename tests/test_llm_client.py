@@ -0,0 +1,114 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from backend import worker
+from backend.llm_client import LLMClient, UpstreamError
+from scripts.mock_llm_server import app
+
+EXPECTED = "Response to: where is my order?..."
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.should_exit = True
+    thread.join(5)
+
+
+@pytest.fixture
+def simulate(monkeypatch):
+    def set_profile(**failures):
+        profile = worker.SimProfile("default", worker.FixedLatency(0.05), **failures)
+        monkeypatch.setattr(worker, "simulator", worker.LLMSimulator(profile, seed=7))
+
+    set_profile()
+    return set_profile
+
+
+async def with_client(base_url, call, **limits):
+    client = LLMClient(base_url, **limits)
+    try:
+        return await call(client), client.snapshot()
+    finally:
+        await client.aclose()
+
+
+async def collect(client):
+    return "".join([chunk async for chunk in client.stream("where is my order?", "t1")])
+
+
+def test_complete(base_url, simulate):
+    text, stats = asyncio.run(
+        with_client(base_url, lambda client: client.complete("where is my order?", "t1"))
+    )
+    assert text == EXPECTED
+    assert (stats["requests"], stats["failures"]) == (1, 0)
+
+
+def test_concurrent_calls_share_a_small_pool(base_url, simulate):
+    async def burst(client):
+        return await asyncio.gather(
+            *(client.complete("where is my order?", f"t{i}") for i in range(10))
+        )
+
+    texts, stats = asyncio.run(with_client(base_url, burst, max_connections=2, max_keepalive=2))
+    assert texts == [EXPECTED] * 10
+    assert (stats["requests"], stats["failures"]) == (10, 0)
+
+
+def test_stream(base_url, simulate):
+    text, stats = asyncio.run(with_client(base_url, collect))
+    assert text == EXPECTED
+    assert (stats["streams"], stats["failures"]) == (1, 0)
+
+
+def test_stream_without_done_fails(base_url, simulate):
+    simulate(error_rate=1.0)
+    with pytest.raises(UpstreamError, match="without done"):
+        asyncio.run(with_client(base_url, collect))
+
+
+def test_failures_are_counted(base_url, simulate):
+    simulate(error_rate=1.0)
+
+    async def calls(client):
+        for call in (lambda: client.complete("where is my order?", "t1"), lambda: collect(client)):
+            with pytest.raises(UpstreamError):
+                await call()
+
+    _, stats = asyncio.run(with_client(base_url, calls))
+    assert (stats["requests"], stats["failures"]) == (2, 2)
+
+
+def test_error_status_is_an_upstream_error(base_url, simulate):
+    simulate(error_rate=1.0)
+    with pytest.raises(UpstreamError, match="503"):
+        asyncio.run(
+            with_client(base_url, lambda client: client.complete("where is my order?", "t1"))
+        )
+
+
+def test_unreachable_upstream_is_an_upstream_error():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    with pytest.raises(UpstreamError):
+        asyncio.run(
+            with_client(
+                f"http://127.0.0.1:{port}",
+                lambda client: client.complete("where is my order?", "t1"),
+            )
+        )
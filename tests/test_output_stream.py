@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from backend.guardrails import DEFAULT_RULES, OutputStreamFilter, RuleSet
+
+BOUNDED = RuleSet.from_list(DEFAULT_RULES["output"])
+UNBOUNDED = RuleSet.from_list(
+    DEFAULT_RULES["output"] + [{"name": "secret_dump", "pattern": r"BEGIN SECRET.*END SECRET"}]
+)
+
+TEXTS = [
+    "Your order ships tomorrow. Anything else I can help with?",
+    "Sure, the private_key is on its way",
+    "Error: internal_server_error while loading hashed_password",
+    "no match here: private key, hashed password, internal server error",
+    "prefix BEGIN SECRET " + "x" * 300 + " END SECRET suffix",
+    "BEGIN SECRET but never closed " + "y" * 100,
+]
+
+
+def chunkings(text, seed, count=25):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        chunks, pos = [], 0
+        while pos < len(text):
+            step = rnd.choice([1, 2, 3, 5, 8, 40])
+            chunks.append(text[pos : pos + step])
+            pos += step
+        yield chunks
+
+
+def stream(rules, chunks):
+    stream_filter = OutputStreamFilter(rules)
+    sent, blocked = [], None
+    for chunk in chunks:
+        safe, rule = stream_filter.feed(chunk)
+        sent.append(safe)
+        if rule:
+            blocked = rule
+            break
+    if blocked is None:
+        sent.append(stream_filter.flush())
+    return "".join(sent), blocked
+
+
+@pytest.mark.parametrize("rules", [BOUNDED, UNBOUNDED], ids=["bounded", "unbounded"])
+@pytest.mark.parametrize("text", TEXTS)
+def test_stream_decision_matches_whole_text_check(rules, text):
+    whole = rules.match(text)
+    for chunks in chunkings(text, seed=len(text)):
+        sent, blocked = stream(rules, chunks)
+        assert (blocked is not None) == (whole is not None)
+        assert text.startswith(sent)
+        if blocked is None:
+            assert sent == text
+        else:
+            # Nothing that was already sent contains a blocked pattern
+            assert rules.match(sent) is None
+
+
+def test_blocked_stream_stays_blocked():
+    stream_filter = OutputStreamFilter(BOUNDED)
+    assert stream_filter.feed("here is the private_")[1] is None
+    assert stream_filter.feed("key")[1] == "private_key"
+    assert stream_filter.feed(" more text") == ("", "private_key")
+    assert stream_filter.flush() == ""
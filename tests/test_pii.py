@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from backend.pii import find_regex_spans, mask_structured_pii, render
+from scripts.bench_pii import CORPUS, legacy_mask_structured_pii, random_text
+
+FUZZ = [random_text(random.Random(seed)) for seed in range(3000)]
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_corpus_matches_legacy_chain(text):
+    assert mask_structured_pii(text) == legacy_mask_structured_pii(text)
+
+
+def test_fuzzed_digit_soup_matches_legacy_chain():
+    mismatches = [t for t in FUZZ if mask_structured_pii(t) != legacy_mask_structured_pii(t)]
+    assert mismatches == []
+
+
+def test_spans_are_in_original_coordinates():
+    for text in CORPUS + FUZZ[:500]:
+        spans = find_regex_spans(text)
+        assert spans == sorted(spans)
+        for prev, span in zip(spans, spans[1:]):
+            assert prev.end <= span.start
+        assert render(text, spans) == legacy_mask_structured_pii(text)[0]
+
+
+def test_context_fallback_masks_only_the_number():
+    text = "my identification number is 123456 and my mobile is 5551234567"
+    masked, types = mask_structured_pii(text)
+    assert masked == "my identification number is [ID_NUMBER] and my mobile is [PHONE]"
+    assert types == ["ID_NUMBER", "PHONE"]
@@ -0,0 +1,66 @@
+import pytest
+
+from backend.rate_limit import TokenBucketLimiter
+
+
+def test_burst_then_refill_at_rate():
+    limiter = TokenBucketLimiter(rate=2, burst=5)
+    assert all(limiter.allow("u", now=0.0)[0] for _ in range(5))
+    allowed, retry_after = limiter.allow("u", now=0.0)
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+    # One token every 0.5 s
+    assert limiter.allow("u", now=0.5)[0]
+    assert not limiter.allow("u", now=0.5)[0]
+    assert limiter.allow("u", now=1.0)[0]
+
+
+def test_rejected_requests_do_not_consume_tokens():
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.allow("u", now=0.0)[0]
+    for _ in range(100):
+        assert not limiter.allow("u", now=0.1)[0]
+    assert limiter.allow("u", now=1.0)[0]
+
+
+def test_matches_a_reference_token_bucket():
+    # Binary-exact steps, so float rounding can't decide a boundary case
+    rate, burst = 4.0, 4.0
+    limiter = TokenBucketLimiter(rate, burst)
+    tokens, last = burst, 0.0
+    now = 0.0
+    outcomes = []
+    for i in range(500):
+        now += (i * 7919 % 13) / 64  # irregular arrivals, 0 to 0.19 s apart
+        tokens = min(burst, tokens + (now - last) * rate)
+        last = now
+        expected = tokens >= 1
+        if expected:
+            tokens -= 1
+        assert limiter.allow("u", now=now)[0] == expected
+        outcomes.append(expected)
+    assert 0 < sum(outcomes) < len(outcomes)
+
+
+def test_clients_are_independent():
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.allow("noisy", now=0.0)[0]
+    assert not limiter.allow("noisy", now=0.0)[0]
+    assert limiter.allow("quiet", now=0.0)[0]
+
+
+def test_idle_buckets_are_dropped_and_table_is_bounded():
+    limiter = TokenBucketLimiter(rate=10, burst=1, max_keys=100)
+    for i in range(1000):
+        limiter.allow(f"one-off-{i}", now=i * 0.001)
+    assert len(limiter) <= 100
+    assert limiter.lru_evictions > 0
+    # Everything is full again a second later: the table empties itself
+    limiter.allow("late", now=10.0)
+    assert len(limiter) == 1
+    assert limiter.idle_evictions > 0
+
+
+def test_zero_rate_rejects():
+    limiter = TokenBucketLimiter(rate=0, burst=10)
+    assert limiter.allow("u", now=0.0) == (False, float("inf"))